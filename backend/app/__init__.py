@@ -4,39 +4,64 @@ from flask_bcrypt import Bcrypt
 from flask_cors import CORS
 from flask_migrate import Migrate
 from app.config import Config
+from app.utils.replicas import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 bcrypt = Bcrypt()
 migrate = Migrate()
 
-def create_app():
+def create_app(config=None):
+    """config: dict ที่ override Config (เช่น DB ของชุดทดสอบ) — ใช้ก่อน init extension ทุกตัว"""
     app = Flask(__name__)
     app.config.from_object(Config)
+    app.config.update(config or {})
+
+    # อยู่หลัง reverse proxy: remote_addr/scheme จาก X-Forwarded-* (เฉพาะจำนวนชั้นที่เชื่อ)
+    hops = int(app.config.get("TRUSTED_PROXY_COUNT", 0))
+    if hops:
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops)
+
+    from app.utils.json_provider import FastJSONProvider
+    app.json = FastJSONProvider(app)
 
     CORS(app)
     db.init_app(app)
     bcrypt.init_app(app)
     migrate.init_app(app, db)
 
+    from app.utils.hashing import init_hashing
+    init_hashing(app)
+
+    from app.utils.replicas import init_replicas
+    init_replicas(app)
+
+    from app.utils.querystats import init_query_stats
+    init_query_stats(app)
+
+    from app.utils.metrics import init_metrics
+    init_metrics(app)
+
+    from app.utils.compression import init_compression
+    init_compression(app)
+
+    # PgBouncer (transaction pooling): statement_timeout ต้องตั้งต่อ transaction
+    if app.config.get("DB_PGBOUNCER") and app.config.get("DB_STATEMENT_TIMEOUT_MS"):
+        from app.utils.dbpool import install_statement_timeout
+        with app.app_context():
+            install_statement_timeout(db.engine, app.config["DB_STATEMENT_TIMEOUT_MS"])
+
     # โหลด models
     from app import models
+    from app.utils import task_counters  # noqa: F401 — ลงทะเบียน before_flush ของ task_status_counts
+    from app.utils import httpcache  # noqa: F401 — ลงทะเบียน before_flush ของ table_versions (ETag)
+
+    # ไม่มี DB I/O ตอนสร้าง app (ทุก gunicorn worker เรียก create_app) — seed admin ใช้ `flask seed-admin`
+    # register routes (import ตอนสร้าง app ไม่ใช่ตอน import package)
+    from app.routes import register_blueprints
+    register_blueprints(app)
 
-    # ✅ seed admin แบบปลอดภัย
-    with app.app_context():
-        from app.utils.seed import seed_admin
-        seed_admin()
-
-    # register routes
-    from app.routes.auth import auth_bp
-    from app.routes.task import task_bp
-    from app.routes.timesheet import timesheet_bp
-    from app.routes.users import users_bp
-    from app.routes.dashboard import dashboard_bp
-
-    app.register_blueprint(auth_bp, url_prefix="/api/auth")
-    app.register_blueprint(task_bp, url_prefix="/api/tasks")
-    app.register_blueprint(timesheet_bp, url_prefix="/api/timesheet")
-    app.register_blueprint(users_bp, url_prefix="/api/users")
-    app.register_blueprint(dashboard_bp, url_prefix="/api/dashboard")
+    from app.cli import register_commands
+    register_commands(app)
 
     return app
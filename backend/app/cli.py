@@ -0,0 +1,181 @@
+import click
+
+
+def register_commands(app):
+    """flask CLI ของโปรเจกต์ (เรียกจาก create_app)"""
+
+    @app.cli.command("rollup-rebuild")
+    @click.option("--since", type=click.DateTime(formats=["%Y-%m-%d"]), default=None,
+                  help="สร้างใหม่เฉพาะตั้งแต่วันนี้ (เก็บยอดของเดือนที่ archive แล้ว)")
+    def rollup_rebuild(since):
+        """สร้างตาราง timesheet_daily_rollups ใหม่จาก timesheets ทั้งหมด"""
+        from app.utils.rollup import rebuild_rollups
+        n = rebuild_rollups(since=since.date() if since else None)
+        click.echo(f"✅ rebuilt {n} rollup rows")
+
+    @app.cli.command("task-counts-reconcile")
+    @click.option("--dry-run", is_flag=True, help="แสดง drift อย่างเดียว ไม่ซ่อม")
+    def task_counts_reconcile(dry_run):
+        """ตรวจ task_status_counts เทียบกับ tasks จริง แล้วซ่อมส่วนที่เพี้ยน"""
+        from app.utils.task_counters import reconcile_task_counts
+        drift = reconcile_task_counts(repair=not dry_run)
+        for assignee_id, status, stored, actual in drift:
+            click.echo(f"assignee={assignee_id} status={status!r}: stored={stored} actual={actual}")
+        if not drift:
+            click.echo("✅ task_status_counts is consistent")
+        elif not dry_run:
+            click.echo(f"✅ repaired {len(drift)} counter rows")
+
+    @app.cli.command("refresh-tokens-purge")
+    def refresh_tokens_purge():
+        """ลบ refresh token ที่หมดอายุ/ถูก revoke นานแล้ว"""
+        from app.utils.refresh_tokens import purge_expired
+        click.echo(f"✅ purged {purge_expired()} refresh tokens")
+
+    @app.cli.command("imports-purge")
+    @click.option("--max-age", type=float, default=None, help="วินาที (default IMPORT_RESULT_TTL)")
+    def imports_purge(max_age):
+        """ลบไฟล์สถานะ/error ของ timesheet import ที่เก่าเกิน TTL"""
+        from app.utils.imports import purge_results
+        click.echo(f"✅ purged {purge_results(max_age)} import files")
+
+    @app.cli.command("task-create-bench")
+    @click.option("--database-url", required=True, help="DB สำหรับทดสอบเท่านั้น (ถูกสร้างตารางใหม่และลบทิ้งตอนจบ)")
+    @click.option("--workers", default=8, show_default=True, help="จำนวน thread ที่สร้าง task พร้อมกัน")
+    @click.option("--count", default=500, show_default=True, help="จำนวน task ต่อ thread")
+    @click.option("--keep", is_flag=True, help="ไม่ลบตารางหลังวัด")
+    def task_create_bench(database_url, workers, count, keep):
+        """วัด throughput ของการสร้าง task (insert + task_code + counter) แบบหลาย writer บน DB แยก"""
+        import time
+        from concurrent.futures import ThreadPoolExecutor
+        from app import create_app, db
+        from app.config import engine_options
+        from app.models import Task, User
+        from app.routes.task import insert_task
+
+        if database_url == app.config.get("SQLALCHEMY_DATABASE_URI"):
+            raise click.ClickException("--database-url must not be the application database")
+        bench = create_app({"SQLALCHEMY_DATABASE_URI": database_url,
+                            "SQLALCHEMY_ENGINE_OPTIONS": engine_options(database_url)})
+        with bench.app_context():
+            db.create_all()
+            user = User(username="bench", email="bench@example.com", password_hash="!", role="User")
+            db.session.add(user); db.session.commit()
+            uid = user.id
+
+        def run(w):
+            codes, errors = [], 0
+            with bench.app_context():
+                for i in range(count):
+                    t = Task(title=f"bench {w}-{i}", assignee_id=uid, status="Open")
+                    try:
+                        if insert_task(t):
+                            errors += 1; db.session.rollback(); continue
+                        db.session.commit()
+                        codes.append(t.task_code)
+                    except Exception:
+                        errors += 1; db.session.rollback()
+                db.session.remove()
+            return codes, errors
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(run, range(workers)))
+        elapsed = time.perf_counter() - started
+        codes = [c for chunk, _ in results for c in chunk]
+        errors = sum(e for _, e in results)
+        dupes = len(codes) - len(set(codes))
+        click.echo(f"{len(codes)} tasks / {elapsed:.2f}s = {len(codes) / elapsed:,.0f} creates/s "
+                   f"({workers} workers), errors={errors}, duplicate codes={dupes}")
+        if not keep:
+            with bench.app_context():
+                db.drop_all()
+        if dupes or errors:
+            raise SystemExit(1)
+
+    @app.cli.command("seed-demo")
+    @click.option("--users", default=200, show_default=True)
+    @click.option("--tasks", default=100_000, show_default=True)
+    @click.option("--timesheets", default=1_000_000, show_default=True)
+    def seed_demo_cmd(users, tasks, timesheets):
+        """ใส่ข้อมูลจำลองขนาดใหญ่ (สำหรับ explain-hot-queries / load test) — อย่ารันบน production"""
+        from app.utils.seed import seed_demo
+        u, t, ts = seed_demo(users=users, tasks=tasks, timesheets=timesheets)
+        click.echo(f"✅ seeded {u} users, {t} tasks, {ts} timesheets")
+
+    @app.cli.command("explain-hot-queries")
+    def explain_hot_queries():
+        """EXPLAIN SQL ที่ hot endpoint ส่งจริง — fail ถ้ามี Seq Scan บน tasks/timesheets/rollups (PostgreSQL)"""
+        from app.utils.query_plans import check_hot_queries, sample_params
+        from app.utils.search import is_postgres
+        if not is_postgres():
+            raise click.ClickException("EXPLAIN check requires PostgreSQL")
+        params = sample_params()
+        if params is None:
+            raise click.ClickException("no timesheets to sample parameters from — run `flask seed-demo` first")
+        failed = 0
+        for name, scans in check_hot_queries(params).items():
+            failed += bool(scans)
+            click.echo(f"{'❌' if scans else '✅'} {name}" + (f": Seq Scan on {', '.join(scans)}" if scans else ""))
+        if failed:
+            raise SystemExit(1)
+
+    @app.cli.command("timesheet-partitions-ensure")
+    @click.option("--months-ahead", default=3, show_default=True)
+    def timesheet_partitions_ensure(months_ahead):
+        """สร้าง partition รายเดือนล่วงหน้าของ timesheets (ตั้ง cron วันละครั้ง)"""
+        from app import db
+        from app.utils.partitions import ensure_partitions, is_partitioned
+        if not is_partitioned():
+            raise click.ClickException("timesheets is not partitioned (PostgreSQL only)")
+        created = ensure_partitions(months_ahead)
+        db.session.commit()
+        click.echo(f"✅ created {len(created)} partitions" + (f": {', '.join(created)}" if created else ""))
+
+    @app.cli.command("timesheet-partitions-archive")
+    @click.option("--before", required=True, type=click.DateTime(formats=["%Y-%m"]),
+                  help="archive ทุกเดือนที่จบก่อนเดือนนี้ (งวดที่ปิดแล้ว) เช่น 2026-07")
+    @click.option("--to", "target", type=click.Choice(["schema", "file"]), default="schema", show_default=True)
+    @click.option("--format", "fmt", type=click.Choice(["csv", "parquet"]), default="csv", show_default=True)
+    @click.option("--out-dir", default="archive", show_default=True)
+    def timesheet_partitions_archive(before, target, fmt, out_dir):
+        """detach partition ของงวดที่ปิดแล้ว → schema timesheets_archive หรือไฟล์ csv.gz/parquet"""
+        from app.utils.partitions import archive_partitions, is_partitioned
+        if not is_partitioned():
+            raise click.ClickException("timesheets is not partitioned (PostgreSQL only)")
+        for name, dest in archive_partitions(before.date(), target=target, out_dir=out_dir, fmt=fmt):
+            click.echo(f"{name} → {dest}")
+        click.echo(f"✅ done — ใช้ rollup-rebuild --since {before:%Y-%m}-01 ถ้าต้อง rebuild (ไม่ลบยอดของเดือนที่ archive)")
+
+    @app.cli.command("seed-admin")
+    @click.option("--email", default="admin@example.com", show_default=True)
+    @click.option("--username", default="admin", show_default=True)
+    @click.option("--password", envvar="ADMIN_PASSWORD", default="admin123",
+                  help="default admin123 หรือ env ADMIN_PASSWORD (ผู้ใช้ต้องเปลี่ยนตอน login ครั้งแรก)")
+    def seed_admin_cmd(email, username, password):
+        """สร้างผู้ใช้ Admin ถ้ายังไม่มี — รันครั้งเดียวตอน deploy แทนการ seed ทุกครั้งที่ start worker"""
+        from app.utils.seed import seed_admin
+        if seed_admin(email=email, username=username, password=password):
+            click.echo("✅ Admin seeded")
+        else:
+            click.echo("✅ Admin already exists, skip seeding")
+
+    @app.cli.command("startup-bench")
+    @click.option("--runs", default=5, show_default=True)
+    @click.option("--target", default="wsgi:app", show_default=True, help="module:attr ที่จะ import")
+    def startup_bench(runs, target):
+        """วัด cold start (import + create_app) ของ wsgi:app ใน process ใหม่ทุกครั้ง"""
+        import os
+        import statistics
+        import subprocess
+        import sys
+        module, attr = target.split(":")
+        code = ("import time; t = time.perf_counter(); "
+                f"import {module}; {module}.{attr}; print(time.perf_counter() - t)")
+        cwd = os.path.dirname(app.root_path)
+        times = []
+        for _ in range(runs):
+            out = subprocess.run([sys.executable, "-c", code], cwd=cwd, capture_output=True, text=True, check=True)
+            times.append(float(out.stdout.strip().splitlines()[-1]))
+        click.echo(f"{target}: min {min(times) * 1000:.0f} ms, median {statistics.median(times) * 1000:.0f} ms "
+                   f"({runs} cold starts)")
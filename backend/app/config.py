@@ -1,6 +1,126 @@
 import os
+from sqlalchemy.pool import NullPool
+from app.utils.dbpool import TimedQueuePool
+
+
+def _env_bool(name, default=False):
+    v = os.getenv(name)
+    return default if v is None or v == "" else v.strip().lower() in {"1", "true", "yes", "on"}
+
+
+def engine_options(url):
+    """
+    SQLALCHEMY_ENGINE_OPTIONS จาก env — ปรับ pool ให้พอดีกับจำนวน gunicorn workers/threads
+    connection สูงสุดต่อ worker = DB_POOL_SIZE + DB_MAX_OVERFLOW
+    DB_PGBOUNCER=1: ใช้ NullPool (PgBouncer pool ให้แล้ว — ไม่ซ้อน QueuePool), ไม่ส่ง startup options ที่
+                    PgBouncer ไม่รองรับ, ปิด prepared statement ของ psycopg3,
+                    statement_timeout ตั้งด้วย SET LOCAL ต่อ transaction (ดู create_app)
+    DB_POOL_CLASS=null/queue: บังคับชนิด pool (default: null ถ้า DB_PGBOUNCER ไม่งั้น queue)
+    """
+    url = url or ""
+    opts = {
+        "pool_pre_ping": _env_bool("DB_POOL_PRE_PING", True),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", 1800)),
+    }
+    if not url.startswith("postgres"):
+        return opts   # SQLite ฯลฯ ใช้ pool default ของ dialect
+
+    pool_class = os.getenv("DB_POOL_CLASS", "").lower() or ("null" if _env_bool("DB_PGBOUNCER") else "queue")
+    if pool_class == "null":
+        opts["poolclass"] = NullPool
+    else:
+        opts.update(
+            poolclass=TimedQueuePool,
+            pool_size=int(os.getenv("DB_POOL_SIZE", 5)),
+            max_overflow=int(os.getenv("DB_MAX_OVERFLOW", 5)),
+            pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", 10)),
+            pool_use_lifo=True,   # ให้ connection ส่วนเกินว่างแล้วถูก recycle ได้
+        )
+
+    connect_args = {"application_name": os.getenv("DB_APPLICATION_NAME", "crm-timesheet")}
+    timeout_ms = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 0))
+    if _env_bool("DB_PGBOUNCER"):
+        if "+psycopg:" in url or url.startswith("postgresql+psycopg://"):
+            connect_args["prepare_threshold"] = None
+    elif timeout_ms:
+        connect_args["options"] = f"-c statement_timeout={timeout_ms}"
+    opts["connect_args"] = connect_args
+    return opts
+
 
 class Config:
     SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret")
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(os.getenv("DATABASE_URL"))
+    DB_PGBOUNCER = _env_bool("DB_PGBOUNCER")
+    DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 0))
+
+    # read replica (คั่นด้วย ,): GET/HEAD อ่านจาก replica แบบ round-robin
+    # หลังผู้ใช้เขียนสำเร็จจะอ่านจาก primary ต่ออีก REPLICA_STICKY_SECONDS (ต่อ worker)
+    # client ส่ง header X-Consistency: strong เพื่อบังคับอ่านจาก primary ได้
+    SQLALCHEMY_REPLICA_URIS = [u.strip() for u in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if u.strip()]
+    REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", 5))
+    REPLICA_RETRY_AFTER = float(os.getenv("REPLICA_RETRY_AFTER", 30))
+
+    # timesheet import (CSV/NDJSON) — ไฟล์ผลลัพธ์/สถานะเก็บใน IMPORT_RESULT_DIR (default: tmp)
+    IMPORT_RESULT_DIR = os.getenv("IMPORT_RESULT_DIR")
+    IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", 1000))
+    IMPORT_MAX_BYTES = int(os.getenv("IMPORT_MAX_BYTES", 50 * 1024 * 1024))   # เกิน → 413
+    IMPORT_RESULT_TTL = int(os.getenv("IMPORT_RESULT_TTL", 7 * 86400))        # ไฟล์ผลลัพธ์เก่ากว่านี้ถูกลบ
+    IMPORT_STALE_SECONDS = int(os.getenv("IMPORT_STALE_SECONDS", 900))        # running ที่ไม่ขยับนานเกิน → failed
+    EXPORT_YIELD_PER = int(os.getenv("EXPORT_YIELD_PER", 2000))
+
+    # dashboard analytics: ชั่วโมงทำงานต่อสัปดาห์ที่ใช้คิด utilization
+    WEEKLY_CAPACITY_HOURS = float(os.getenv("WEEKLY_CAPACITY_HOURS", 40))
+
+    # ETag / conditional GET: version ต่อตาราง cache ต่อ worker HTTP_VERSION_CACHE_TTL วินาที
+    # (worker อื่นเห็นการเขียนช้าสุดเท่านี้) + response cache ตาม ETag (0 = ปิด)
+    HTTP_VERSION_CACHE_TTL = float(os.getenv("HTTP_VERSION_CACHE_TTL", 1))
+    HTTP_RESPONSE_CACHE_SIZE = int(os.getenv("HTTP_RESPONSE_CACHE_SIZE", 512))
+    HTTP_RESPONSE_CACHE_TTL = float(os.getenv("HTTP_RESPONSE_CACHE_TTL", 30))
+    HTTP_RESPONSE_CACHE_MAX_BYTES = int(os.getenv("HTTP_RESPONSE_CACHE_MAX_BYTES", 256 * 1024))
+
+    # บีบอัด response (gzip / br ถ้าติดตั้ง brotli) เมื่อ body ยาวตั้งแต่ COMPRESS_MIN_SIZE ไบต์
+    COMPRESS_ENABLED = _env_bool("COMPRESS_ENABLED", True)
+    COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", 1024))
+    COMPRESS_GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", 6))
+    COMPRESS_BR_QUALITY = int(os.getenv("COMPRESS_BR_QUALITY", 4))
+
+    # นับ SQL ต่อ request (Server-Timing + log "app.sql"), statement ที่ช้ากว่า SLOW_QUERY_MS
+    # QUERY_BUDGET: จำนวน SQL สูงสุดต่อ request (0 = ไม่จำกัด) — STRICT ให้ raise แทน log (ใช้ตอนทดสอบ)
+    QUERY_STATS_ENABLED = _env_bool("QUERY_STATS_ENABLED", True)
+    SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 200))
+    QUERY_BUDGET = int(os.getenv("QUERY_BUDGET", 0))
+    QUERY_BUDGET_STRICT = _env_bool("QUERY_BUDGET_STRICT", False)
+
+    # /metrics (ต้องมี prometheus_client) — หลาย worker ตั้ง env PROMETHEUS_MULTIPROC_DIR ด้วย
+    METRICS_ENABLED = _env_bool("METRICS_ENABLED", True)
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN")   # ถ้าตั้ง ต้องส่ง Authorization: Bearer <token>
+
+    # auth cache (ต่อ worker): token ที่ verify แล้ว และสถานะ active/role ของผู้ใช้
+    JWT_CACHE_SIZE = int(os.getenv("JWT_CACHE_SIZE", 4096))
+    JWT_CACHE_TTL = int(os.getenv("JWT_CACHE_TTL", 300))
+    USER_STATE_CACHE_SIZE = int(os.getenv("USER_STATE_CACHE_SIZE", 4096))
+    USER_STATE_CACHE_TTL = int(os.getenv("USER_STATE_CACHE_TTL", 30))
+
+    # bcrypt: cost + process pool แยกสำหรับ hash (0 workers = ทำใน process เดิม)
+    BCRYPT_LOG_ROUNDS = int(os.getenv("BCRYPT_LOG_ROUNDS", 12))
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+    PASSWORD_HASH_QUEUE = int(os.getenv("PASSWORD_HASH_QUEUE", 32))
+    PASSWORD_HASH_TIMEOUT = float(os.getenv("PASSWORD_HASH_TIMEOUT", 10))
+    PASSWORD_HASH_MP_CONTEXT = os.getenv("PASSWORD_HASH_MP_CONTEXT")   # spawn / forkserver (ว่าง = forkserver ถ้ามี)
+
+    # login throttling (sliding window ต่อ email / ต่อ IP) + cache email ที่ไม่มีในระบบ
+    LOGIN_RATE_LIMIT_WINDOW = int(os.getenv("LOGIN_RATE_LIMIT_WINDOW", 300))
+    LOGIN_RATE_LIMIT_PER_EMAIL = int(os.getenv("LOGIN_RATE_LIMIT_PER_EMAIL", 10))
+    LOGIN_RATE_LIMIT_PER_IP = int(os.getenv("LOGIN_RATE_LIMIT_PER_IP", 50))
+    LOGIN_UNKNOWN_CACHE_TTL = int(os.getenv("LOGIN_UNKNOWN_CACHE_TTL", 60))
+    # จำนวน reverse proxy ที่เชื่อ X-Forwarded-For/-Proto (ProxyFix) — Render มี proxy 1 ชั้น (env RENDER ถูกตั้งให้เอง)
+    # ห้ามตั้งเกินจำนวน proxy จริง ไม่งั้น client ปลอม X-Forwarded-For เพื่อหลบ rate limit ต่อ IP ได้
+    TRUSTED_PROXY_COUNT = int(os.getenv("TRUSTED_PROXY_COUNT", 1 if os.getenv("RENDER") else 0))
+    LOGIN_RATE_LIMIT_BACKEND = None   # ตั้งเป็น object ที่มี hit()/reset() เพื่อแชร์ข้าม worker ได้
+
+    # access token อายุสั้น + refresh token (rotate) — ดู /api/auth/refresh
+    JWT_ACCESS_TTL = int(os.getenv("JWT_ACCESS_TTL", 15 * 60))
+    JWT_REFRESH_TTL = int(os.getenv("JWT_REFRESH_TTL", 14 * 24 * 60 * 60))
@@ -1,3 +1,4 @@
+from datetime import date
 from app import db
 from sqlalchemy import func
 
@@ -12,6 +13,11 @@ class User(db.Model):
     is_temp_password = db.Column(db.Boolean, default=True)
     is_active = db.Column(db.Boolean, default=True)
 
+    # login ค้นด้วย lower(email) — index ปกติบน email ใช้ไม่ได้
+    __table_args__ = (
+        db.Index("ix_users_email_lower", func.lower(email)),
+    )
+
     
 
 class Task(db.Model):
@@ -29,6 +35,13 @@ class Task(db.Model):
     created_at  = db.Column(db.DateTime, server_default=func.now(), nullable=False)
     updated_at  = db.Column(db.DateTime, onupdate=func.now())
 
+    # filter ที่ใช้บ่อยใน list_tasks + sort created_at (id เป็น tie-breaker ของ keyset)
+    __table_args__ = (
+        db.Index("ix_tasks_status_created_id", status, created_at, id),
+        db.Index("ix_tasks_assignee_created_id", assignee_id, created_at, id),
+        db.Index("ix_tasks_priority_created_id", priority, created_at, id),
+    )
+
     
     def to_dict(self, assignee_name=None):
         return {
@@ -49,12 +62,72 @@ class Task(db.Model):
 # app/models.py
 class Timesheet(db.Model):
     __tablename__ = "timesheets"
+    # PostgreSQL: partition รายเดือนตาม work_date (PK จริงคือ (id, work_date)) — ORM ใช้ id อย่างเดียวได้เพราะ id มาจาก sequence
     id        = db.Column(db.Integer, primary_key=True)
     user_id   = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
     task_id   = db.Column(db.Integer, db.ForeignKey("tasks.id"), nullable=True)
-    work_date = db.Column(db.Date, nullable=True)       # ✅ เพิ่ม
+    work_date = db.Column(db.Date, nullable=False, default=date.today)   # partition key
     start_time= db.Column(db.Time, nullable=True)       # ✅ เพิ่ม
     end_time  = db.Column(db.Time, nullable=True)       # ✅ เพิ่ม
     hours     = db.Column(db.Float, nullable=False)
     notes     = db.Column(db.Text)
     created_at= db.Column(db.DateTime, server_default=func.now())
+
+    # index ตามลำดับของ get_timesheets (work_date DESC, start_time ASC, id DESC) สำหรับ keyset pagination
+    __table_args__ = (
+        db.Index("ix_timesheets_user_date_start_id", user_id, work_date.desc(), start_time, id.desc()),
+        # ?task_id= ของ get_timesheets/export: filter + ORDER BY เดียวกันโดยไม่ต้อง sort
+        db.Index("ix_timesheets_user_task_date_start_id", user_id, task_id, work_date.desc(), start_time, id.desc()),
+        # FK check ตอนลบ task และ filter task_id ข้ามผู้ใช้ (Admin/HR)
+        db.Index("ix_timesheets_task_id_work_date", task_id, work_date),
+    )
+
+
+class TimesheetRollup(db.Model):
+    """ชั่วโมงรวมต่อ (user, task, วัน) — อัปเดตแบบ incremental จาก app/utils/rollup.py"""
+    __tablename__ = "timesheet_daily_rollups"
+    user_id   = db.Column(db.Integer, primary_key=True)
+    task_id   = db.Column(db.Integer, primary_key=True, default=0)   # 0 = ไม่ผูก task
+    work_date = db.Column(db.Date, primary_key=True)
+    iso_year  = db.Column(db.SmallInteger, nullable=False)
+    iso_week  = db.Column(db.SmallInteger, nullable=False)
+    hours     = db.Column(db.Float, nullable=False, default=0)
+    entries   = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index("ix_ts_rollups_user_week", user_id, iso_year, iso_week),
+        db.Index("ix_ts_rollups_work_date", work_date),
+    )
+
+
+class TaskStatusCount(db.Model):
+    """จำนวน task ต่อ (assignee, status) — assignee_id = 0 คือยอดรวมทั้งระบบ (ดู app/utils/task_counters.py)"""
+    __tablename__ = "task_status_counts"
+    assignee_id = db.Column(db.Integer, primary_key=True)
+    status      = db.Column(db.String(20), primary_key=True)
+    count       = db.Column(db.Integer, nullable=False, default=0)
+
+
+class RefreshToken(db.Model):
+    """refresh token ที่ออกไปแล้ว (เก็บแค่ jti) — rotate ทุกครั้งที่ใช้, revoked_at != NULL คือใช้ไม่ได้"""
+    __tablename__ = "refresh_tokens"
+    jti        = db.Column(db.String(32), primary_key=True)
+    user_id    = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    revoked_at = db.Column(db.DateTime, nullable=True)
+
+class TableVersion(db.Model):
+    """เลขเวอร์ชันต่อตาราง — เพิ่มทุก transaction ที่เขียน tasks/timesheets/users ใช้ทำ ETag ของ GET"""
+    __tablename__ = "table_versions"
+    name    = db.Column(db.String(32), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+
+
+# เลข task_code (TS-0001 ...) — PostgreSQL ใช้ sequence, DB อื่นใช้แถวใน task_code_counters (ดู app/utils/task_codes.py)
+TASK_CODE_SEQ = db.Sequence("task_code_seq", metadata=db.metadata)
+
+class TaskCodeCounter(db.Model):
+    """ตัวนับ task_code สำหรับ DB ที่ไม่มี sequence (SQLite ตอนทดสอบ)"""
+    __tablename__ = "task_code_counters"
+    name  = db.Column(db.String(32), primary_key=True)
+    value = db.Column(db.BigInteger, nullable=False, default=0)
@@ -0,0 +1,16 @@
+from importlib import import_module
+
+# (module, blueprint, url_prefix) — import ตอน register_blueprints เท่านั้น
+BLUEPRINTS = [
+    ("app.routes.auth", "auth_bp", "/api/auth"),
+    ("app.routes.task", "task_bp", "/api/tasks"),
+    ("app.routes.timesheet", "timesheet_bp", "/api/timesheet"),
+    ("app.routes.users", "users_bp", "/api/users"),
+    ("app.routes.dashboard", "dashboard_bp", "/api/dashboard"),
+    ("app.routes.system", "system_bp", "/api/system"),
+]
+
+
+def register_blueprints(app):
+    for module, name, prefix in BLUEPRINTS:
+        app.register_blueprint(getattr(import_module(module), name), url_prefix=prefix)
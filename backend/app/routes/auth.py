@@ -1,8 +1,11 @@
 from flask import Blueprint, request, jsonify, g
-from app import db, bcrypt
+from app import db
 from app.models import User
 from sqlalchemy import func
-from app.utils.authz import jwt_required, require_roles
+from app.utils.authz import jwt_required, require_roles, authenticate, invalidate_user, get_user_state
+from app.utils import refresh_tokens
+from app.utils.hashing import hash_password, check_password, needs_rehash
+from app.utils import ratelimit
 import jwt, datetime
 
 
@@ -16,7 +19,7 @@ def utcnow():
     return datetime.datetime.now(datetime.timezone.utc)
 
 def token_ttl_seconds():
-    return int(current_app.config.get("JWT_ACCESS_TTL", 2 * 60 * 60))
+    return int(current_app.config.get("JWT_ACCESS_TTL", 15 * 60))
 
 @auth_bp.post("/register")
 def register():
@@ -44,7 +47,7 @@ def register():
         return jsonify({"error": "email already exists"}), 409
 
     try:
-        hashed_pw = bcrypt.generate_password_hash(password).decode("utf-8")
+        hashed_pw = hash_password(password)
         user = User(username=username, email=email, role=role, password_hash=hashed_pw)
         db.session.add(user)
         db.session.commit()
@@ -52,6 +55,7 @@ def register():
         db.session.rollback()
         return jsonify({"error": "username or email already exists"}), 409
 
+    ratelimit.forget_unknown(email)
     return jsonify({"message": "User registered"}), 201
 
 
@@ -69,48 +73,112 @@ def login():
     if not email or not password:
         return jsonify({"error": "email and password are required"}), 400
 
-    # ค้นหาแบบ case-insensitive
+    # จำกัดจำนวนครั้งที่ล้มเหลวต่อ email และต่อ IP (sliding window) — IP จริงผ่าน ProxyFix (TRUSTED_PROXY_COUNT)
+    ip = request.remote_addr or "unknown"
+    if not ratelimit.login_allowed(email, ip):
+        resp = jsonify({"error": "Too many login attempts, please try again later"})
+        resp.headers["Retry-After"] = str(int(current_app.config.get("LOGIN_RATE_LIMIT_WINDOW", 300)))
+        return resp, 429
+
+    # email ที่เพิ่งค้นไม่เจอ → ตอบทันที ไม่แตะ DB/bcrypt
+    if ratelimit.is_known_unknown(email):
+        ratelimit.login_failed(email, ip)
+        return jsonify({"error": "Invalid credentials"}), 401
+
+    # ค้นหาแบบ case-insensitive (ใช้ index ix_users_email_lower)
     user = User.query.filter(func.lower(User.email) == email).first()
-    if not user or not bcrypt.check_password_hash(user.password_hash, password):
+    if not user:
+        ratelimit.remember_unknown(email)
+        ratelimit.login_failed(email, ip)
+        return jsonify({"error": "Invalid credentials"}), 401
+    if not check_password(user.password_hash, password):
+        ratelimit.login_failed(email, ip)
         return jsonify({"error": "Invalid credentials"}), 401
+    ratelimit.login_succeeded(email)
+
+    # BCRYPT_LOG_ROUNDS เปลี่ยน → hash ใหม่ด้วย cost ปัจจุบัน (รู้รหัสผ่านเฉพาะตอน login)
+    if needs_rehash(user.password_hash):
+        user.password_hash = hash_password(password)
+        db.session.commit()
+
+    return jsonify(_issue_tokens(user)), 200
 
+
+def _access_token(user):
     now = utcnow()
     payload = {
         "id": user.id,
         "username": user.username,
         "email": user.email,
         "role": user.role,
+        "typ": "access",
         "iat": int(now.timestamp()),
         "exp": int((now + datetime.timedelta(seconds=token_ttl_seconds())).timestamp()),
         "iss": ISSUER,
     }
-    token = jwt.encode(payload, current_app.config["SECRET_KEY"], algorithm="HS256")
-    return jsonify({
-        "token": token,
+    return jwt.encode(payload, current_app.config["SECRET_KEY"], algorithm="HS256")
+
+
+def _issue_tokens(user):
+    """access token อายุสั้น + refresh token (rotate ทุกครั้งที่ใช้) — commit jti ของ refresh token"""
+    refresh_token = refresh_tokens.issue(user.id, ISSUER)
+    db.session.commit()
+    return {
+        "token": _access_token(user),
         "token_type": "Bearer",
         "expires_in": token_ttl_seconds(),
+        "refresh_token": refresh_token,
+        "refresh_expires_in": refresh_tokens.refresh_ttl_seconds(),
         "user": {"id": user.id, "username": user.username, "email": user.email, "role": user.role}
-    }), 200
+    }
+
+
+@auth_bp.post("/refresh")
+def refresh():
+    data = request.get_json(silent=True) or {}
+    token = data.get("refresh_token") or ""
+    if not token:
+        return jsonify({"error": "refresh_token is required"}), 400
+    try:
+        user_id = refresh_tokens.rotate(token, ISSUER)
+    except refresh_tokens.RefreshError as ex:
+        return jsonify({"error": str(ex)}), 401
+
+    state = get_user_state(user_id)
+    user = db.session.get(User, user_id) if state and state[0] else None
+    if not user:
+        db.session.rollback()
+        return jsonify({"error": "Account disabled"}), 401
+    return jsonify(_issue_tokens(user)), 200
+
+
+@auth_bp.post("/logout")
+def logout():
+    data = request.get_json(silent=True) or {}
+    token = data.get("refresh_token") or ""
+    if token:
+        try:
+            refresh_tokens.revoke(token, ISSUER)
+            db.session.commit()
+        except refresh_tokens.RefreshError:
+            pass
+    return jsonify({"message": "logged out"}), 200
+
+
+@auth_bp.post("/logout-all")
+@jwt_required
+def logout_all():
+    n = refresh_tokens.revoke_all(g.user["id"])
+    db.session.commit()
+    return jsonify({"message": "logged out from all sessions", "revoked": n}), 200
 
 
 @auth_bp.get("/me")
 def me():
-    auth = request.headers.get("Authorization", "")
-    if not auth.startswith("Bearer "):
-        return jsonify({"error": "Unauthorized"}), 401
-
-    token = auth.split(" ", 1)[1].strip()
-    try:
-        payload = jwt.decode(
-            token,
-            current_app.config["SECRET_KEY"],
-            algorithms=["HS256"],
-            options={"require": ["exp", "iat", "iss"]},
-            issuer=ISSUER,
-        )
-    except jwt.ExpiredSignatureError:
-        return jsonify({"error": "Token expired"}), 401
-    except jwt.InvalidTokenError:
+    payload, err = authenticate()
+    if err:
+        return err
+    if payload.get("iss") != ISSUER or "iat" not in payload:
         return jsonify({"error": "Invalid token"}), 401
 
     return jsonify({"user": payload}), 200
@@ -128,14 +196,14 @@ def change_password():
 
     user = User.query.get(g.user["id"])
 
-    if not bcrypt.check_password_hash(
-        user.password_hash, old_password
-    ):
+    if not check_password(user.password_hash, old_password):
         return jsonify({"error": "old password incorrect"}), 400
 
-    user.password_hash = bcrypt.generate_password_hash(new_password).decode()
+    user.password_hash = hash_password(new_password)
     user.is_temp_password = False
+    refresh_tokens.revoke_all(user.id)
     db.session.commit()
+    invalidate_user(user.id)
 
     return jsonify({"message": "password changed"})
 
@@ -149,7 +217,7 @@ def init_admin():
         username="admin",
         email="admin@example.com",
         role="Admin",
-        password_hash=bcrypt.generate_password_hash("admin123").decode("utf-8")
+        password_hash=hash_password("admin123")
     )
 
     db.session.add(admin)
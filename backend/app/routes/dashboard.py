@@ -1,6 +1,9 @@
-from flask import Blueprint, request, jsonify, g
-from sqlalchemy import text
+from flask import Blueprint, request, jsonify, g, current_app
+from sqlalchemy import text, func, select, tuple_
+from datetime import date, timedelta
 from app import db
+from app.models import Task, User, TimesheetRollup
+from app.utils.authz import require_roles
 
 # ถ้ามีตัวตรวจ token ใช้ของคุณเองได้เลย เช่น @auth_required
 # เปลี่ยนตามโปรเจกต์คุณ:
@@ -24,23 +27,17 @@ def get_summary():
     user_id = getattr(getattr(g, "current_user", None), "id", None)
     user_role = getattr(getattr(g, "current_user", None), "role", "User")
 
-    if scope != "all" or user_role == "User":
-        sql = text("""
-            SELECT
-              SUM(CASE WHEN status = 'In Progress' THEN 1 ELSE 0 END)::int AS in_progress,
-              SUM(CASE WHEN status = 'Done'        THEN 1 ELSE 0 END)::int AS done
-            FROM tasks
-            WHERE assignee_id = :uid
-        """)
-        row = db.session.execute(sql, {"uid": user_id}).first()
-    else:
-        sql = text("""
-            SELECT
-              SUM(CASE WHEN status = 'In Progress' THEN 1 ELSE 0 END)::int AS in_progress,
-              SUM(CASE WHEN status = 'Done'        THEN 1 ELSE 0 END)::int AS done
-            FROM tasks
-        """)
-        row = db.session.execute(sql).first()
+    # อ่านจาก task_status_counts (อัปเดตพร้อมทุกการเปลี่ยนสถานะ) แทนการ SUM ทั้งตาราง tasks
+    # scope=all ใช้แถว assignee_id = 0 (ยอดรวมทั้งระบบ)
+    uid = user_id if (scope != "all" or user_role == "User") else 0
+    sql = text("""
+        SELECT
+          SUM(CASE WHEN status = 'In Progress' THEN count ELSE 0 END) AS in_progress,
+          SUM(CASE WHEN status = 'Done'        THEN count ELSE 0 END) AS done
+        FROM task_status_counts
+        WHERE assignee_id = :uid AND status IN ('In Progress', 'Done')
+    """)
+    row = db.session.execute(sql, {"uid": uid}).first()
 
     data = {
         "tasks": {
@@ -49,3 +46,103 @@ def get_summary():
         }
     }
     return jsonify({"data": data})
+
+
+# ---------- analytics ----------
+# ชุดการ group ของ analytics (ชื่อ → คอลัมน์) ใช้ทั้ง GROUPING SETS (PostgreSQL) และ fallback แยก query
+R = TimesheetRollup
+ANALYTICS_SETS = {
+    "by_user":      [R.user_id, User.username],
+    "by_task":      [R.task_id, Task.task_code, Task.title],
+    "by_priority":  [Task.priority],
+    "by_week":      [R.iso_year, R.iso_week],
+    "by_user_week": [R.user_id, User.username, R.iso_year, R.iso_week],
+}
+
+def _analytics_base(d_from, d_to, only_user):
+    q = (select()
+         .select_from(R)
+         .join(User, User.id == R.user_id)
+         .outerjoin(Task, Task.id == R.task_id)
+         .where(R.work_date >= d_from, R.work_date <= d_to))
+    if only_user:
+        q = q.where(R.user_id == only_user)
+    return q
+
+def _analytics_rows(d_from, d_to, only_user):
+    """คืน dict ชื่อชุด → list ของ (ค่าคอลัมน์..., hours, entries)"""
+    hours, entries = func.sum(R.hours), func.sum(R.entries)
+    out = {name: [] for name in ANALYTICS_SETS}
+
+    if db.session.get_bind().dialect.name == "postgresql":
+        # ผ่านเดียวด้วย GROUPING SETS; ใช้ GROUPING() แยกว่าแถวมาจากชุดไหน
+        cols, idx = [], {}
+        for group in ANALYTICS_SETS.values():
+            for c in group:
+                if id(c) not in idx:
+                    idx[id(c)] = len(cols); cols.append(c)
+        flags = [func.grouping(c) for c in cols]
+        q = (_analytics_base(d_from, d_to, only_user)
+             .add_columns(*cols, *flags, hours, entries)
+             .group_by(func.grouping_sets(*[tuple_(*g) for g in ANALYTICS_SETS.values()])))
+        n = len(cols)
+        for row in db.session.execute(q):
+            present = {i for i in range(n) if row[n + i] == 0}
+            for name, group in ANALYTICS_SETS.items():
+                if {idx[id(c)] for c in group} == present:
+                    out[name].append(tuple(row[idx[id(c)]] for c in group) + tuple(row[-2:]))
+                    break
+        return out
+
+    for name, group in ANALYTICS_SETS.items():
+        q = _analytics_base(d_from, d_to, only_user).add_columns(*group, hours, entries).group_by(*group)
+        out[name] = [tuple(r) for r in db.session.execute(q)]
+    return out
+
+@dashboard_bp.get("/analytics")
+@require_roles("Admin", "HR", "User")
+def get_analytics():
+    """
+    ชั่วโมงต่อ user / task / priority / ISO week + utilization เทียบ capacity ต่อสัปดาห์ + จำนวนงานเลยกำหนด
+    ?from=&to= (YYYY-MM-DD, default 28 วันล่าสุด), user_id (Admin/HR), capacity (ชม./สัปดาห์)
+    อ่านจาก timesheet_daily_rollups — User ทั่วไปเห็นเฉพาะของตัวเอง
+    """
+    try:
+        d_to = date.fromisoformat(request.args["to"]) if request.args.get("to") else date.today()
+        d_from = date.fromisoformat(request.args["from"]) if request.args.get("from") else d_to - timedelta(days=27)
+    except ValueError:
+        return jsonify({"error": "from/to must be YYYY-MM-DD"}), 400
+    if d_from > d_to:
+        return jsonify({"error": "from must be before to"}), 400
+
+    capacity = request.args.get("capacity", type=float) or float(current_app.config.get("WEEKLY_CAPACITY_HOURS", 40))
+    role = (g.user.get("role") or "").lower()
+    only_user = request.args.get("user_id", type=int) if role in {"admin", "hr"} else g.user.get("id")
+
+    rows = _analytics_rows(d_from, d_to, only_user)
+    r2 = lambda h: round(float(h or 0), 2)
+
+    overdue_q = (db.session.query(func.count(Task.id))
+                 .filter(Task.due_date < date.today(), Task.status.notin_(["Complete", "Cancelled", "Closed"])))
+    if only_user:
+        overdue_q = overdue_q.filter(Task.assignee_id == only_user)
+
+    data = {
+        "range": {"from": d_from.isoformat(), "to": d_to.isoformat()},
+        "weekly_capacity_hours": capacity,
+        "total_hours": r2(sum(r[-2] or 0 for r in rows["by_user"])),
+        "by_user": sorted(({"user_id": u, "username": n, "hours": r2(h), "entries": int(e or 0)}
+                           for u, n, h, e in rows["by_user"]), key=lambda x: -x["hours"]),
+        "by_task": sorted(({"task_id": t or None, "task_code": c, "title": ti, "hours": r2(h), "entries": int(e or 0)}
+                           for t, c, ti, h, e in rows["by_task"]), key=lambda x: -x["hours"]),
+        "by_priority": sorted(({"priority": p, "hours": r2(h)} for p, h, e in rows["by_priority"]),
+                              key=lambda x: -x["hours"]),
+        "by_week": sorted(({"iso_year": y, "iso_week": w, "hours": r2(h)} for y, w, h, e in rows["by_week"]),
+                          key=lambda x: (x["iso_year"], x["iso_week"])),
+        "utilization": sorted(({"user_id": u, "username": n, "iso_year": y, "iso_week": w, "hours": r2(h),
+                                "utilization": round(float(h or 0) / capacity, 3) if capacity else None}
+                               for u, n, y, w, h, e in rows["by_user_week"]),
+                              key=lambda x: (x["iso_year"], x["iso_week"], x["user_id"])),
+        "overdue_tasks": overdue_q.scalar() or 0,
+    }
+    return jsonify({"data": data}), 200
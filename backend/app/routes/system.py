@@ -0,0 +1,17 @@
+from flask import Blueprint, jsonify, current_app
+from app import db
+from app.utils.authz import require_roles
+from app.utils.dbpool import pool_status
+
+system_bp = Blueprint("system", __name__)
+# create_app: app.register_blueprint(system_bp, url_prefix="/api/system")
+
+
+@system_bp.get("/pool")
+@require_roles("Admin")
+def get_pool_status():
+    """สถานะ connection pool ของ worker ที่ตอบ request นี้ (แต่ละ gunicorn worker มี pool ของตัวเอง)"""
+    replicas = current_app.extensions["replicas"]
+    return jsonify({"data": pool_status(db.engine), "replicas": [
+        dict(r, pool=pool_status(e)) for r, e in zip(replicas.status(), replicas.engines)
+    ]}), 200
@@ -1,8 +1,14 @@
 from flask import Blueprint, request, jsonify
-from sqlalchemy import or_, desc, asc
-from datetime import date
+from datetime import date, datetime
 from app import db
 from app.models import Task, User
+from app.utils.pagination import encode_cursor, decode_cursor, keyset_key, keyset_order, keyset_after, parse_bool, parse_fields
+from app.utils.search import apply_task_search
+from app.utils.httpcache import conditional_get
+from app.utils.json_provider import rows_to_dicts
+from app.utils.task_codes import next_task_code
+from app.utils.querystats import query_budget
+from sqlalchemy.exc import IntegrityError
 
 try:
     from flask_jwt_extended import jwt_required, get_jwt_identity
@@ -15,12 +21,65 @@ except Exception:
 task_bp = Blueprint("tasks", __name__)
 
 ALLOWED_STATUSES = {"Open", "In Progress", "Complete", "Cancelled"}
+TASK_CODE_ATTEMPTS = 5
+
+# คอลัมน์ที่ใช้ sort แบบ keyset ได้ + ตัวแปลงค่าจาก cursor (tie-breaker คือ Task.id เสมอ)
+KEYSET_SORTS = {
+    "created_at": datetime.fromisoformat,
+    "updated_at": datetime.fromisoformat,
+    "due_date": date.fromisoformat,
+    "priority": str,
+    "status": str,
+    "title": str,
+    "task_code": str,
+    "id": int,
+}
+
+# คอลัมน์ของ list/get (key ใน JSON → column) — select เป็น tuple ไม่สร้าง ORM instance ต่อแถว
+TASK_FIELDS = {
+    "id": Task.id,
+    "task_code": Task.task_code,
+    "title": Task.title,
+    "assignee_id": Task.assignee_id,
+    "assignee_name": User.username.label("assignee_name"),
+    "due_date": Task.due_date,
+    "priority": Task.priority,
+    "status": Task.status,
+    "details": Task.details,
+    "created_by": Task.created_by,
+    "created_at": Task.created_at,
+    "updated_at": Task.updated_at,
+}
+
+def _task_rows(keys=None):
+    cols = [TASK_FIELDS[k] for k in keys] if keys else TASK_FIELDS.values()
+    return (db.session.query(*cols)
+            .select_from(Task).join(User, User.id == Task.assignee_id))
+
+def insert_task(t, task_code=None):
+    """
+    add + flush Task พร้อม task_code (ไม่ commit) → None หรือ (error, status)
+    task_code จาก sequence/ตัวนับ (ไม่ scan MAX) — ถ้าชนกับ code ที่ผู้ใช้ตั้งเองไว้ก่อน ขอเลขใหม่ใน savepoint
+    """
+    for _ in range(TASK_CODE_ATTEMPTS):
+        t.task_code = task_code or next_task_code()
+        try:
+            with db.session.begin_nested():
+                db.session.add(t)
+        except IntegrityError:
+            if task_code:
+                return f"task_code {task_code} already exists", 409
+            continue
+        return None
+    return "could not allocate task_code", 503
 
 def _parse_date(s: str):
     return date.fromisoformat(s) if s else None
 
 @task_bp.route("/", methods=["GET"])
 @jwt_required(optional=True)
+@conditional_get("tasks", "users")
+@query_budget(4)   # version ของ ETag + count + หน้า (+ สำรอง 1)
 def list_tasks():
     search      = request.args.get("search", "").strip()
     priority    = request.args.get("priority")
@@ -30,11 +89,24 @@ def list_tasks():
     page_size   = min(int(request.args.get("page_size", 20)), 100)
     sort        = request.args.get("sort", "-created_at")
 
-    q = db.session.query(Task, User.username.label("assignee_name")).join(User, User.id == Task.assignee_id)
+    # ?fields=id,title,status → select เฉพาะคอลัมน์ที่ขอ (ตัด details ที่เป็น Text ยาวออกได้)
+    try:
+        keys = parse_fields(request.args.get("fields"), TASK_FIELDS) or list(TASK_FIELDS)
+    except ValueError as e:
+        return jsonify({"error": f"unknown fields: {e}"}), 400
 
+    # cursor ต้องใช้ค่าคอลัมน์ sort ของแถวสุดท้าย — select เพิ่มท้าย tuple (zip ใน rows_to_dicts ตัดทิ้งเอง)
+    sort_field = sort.lstrip("-"); is_desc = sort.startswith("-")
+    if not hasattr(Task, sort_field):
+        sort_field, is_desc = "created_at", True
+    col = getattr(Task, sort_field)
+    q = _task_rows(keys)
+    if sort_field not in keys:
+        q = q.add_columns(col)
+
+    rank = None
     if search:
-        s = f"%{search}%"
-        q = q.filter(or_(Task.title.ilike(s), Task.details.ilike(s), Task.task_code.ilike(s), User.username.ilike(s)))
+        q, rank = apply_task_search(q, search)
     if priority:
         q = q.filter(Task.priority == priority)
     if status:
@@ -42,17 +114,50 @@ def list_tasks():
     if assignee_id:  # ← เพิ่ม
         q = q.filter(Task.assignee_id == int(assignee_id))
 
-    sort_field = sort.lstrip("-"); is_desc = sort.startswith("-")
-    if hasattr(Task, sort_field):
-        col = getattr(Task, sort_field)
-        q = q.order_by(desc(col) if is_desc else asc(col))
+    # ค้นหาบน PostgreSQL: default เรียงตามความเกี่ยวข้อง (หรือส่ง sort=relevance) — keyset ด้วย (rank, id)
+    relevance = rank is not None and (sort == "relevance" or "sort" not in request.args)
+    if relevance:
+        sort, sort_field = "relevance", "rank"
+        q = q.add_columns(rank.label("rank"))
+        order = [(rank, True), (Task.id, True)]
+        cursor_type = float
     else:
-        q = q.order_by(Task.created_at.desc())
-
-    total = q.count()
+        dialect = db.session.get_bind().dialect.name
+        order = [keyset_key(col, is_desc, dialect)]
+        if sort_field != "id":
+            order.append((Task.id, is_desc))
+        cursor_type = KEYSET_SORTS.get(sort_field)
+
+    # โหมด keyset: ?cursor= (ว่างได้สำหรับหน้าแรก) → next_cursor; total นับเฉพาะเมื่อ with_total=true
+    if "cursor" in request.args:
+        if cursor_type is None:
+            return jsonify({"error": f"cursor paging supports sort by {sorted(KEYSET_SORTS)}"}), 400
+        cursor = request.args.get("cursor") or ""
+        page_q = q
+        if cursor:
+            try:
+                last = decode_cursor(cursor, [str, cursor_type, int])
+            except ValueError:
+                return jsonify({"error": "invalid cursor"}), 400
+            if last[0] != sort:
+                return jsonify({"error": "cursor does not match sort"}), 400
+            page_q = q.filter(keyset_after(order, last[1:len(order) + 1]))
+        rows = page_q.order_by(*keyset_order(order)).limit(page_size + 1).all()
+        items, has_more = rows[:page_size], len(rows) > page_size
+        next_cursor = None
+        if has_more:
+            t_last = items[-1]
+            next_cursor = encode_cursor([sort, getattr(t_last, sort_field), t_last.id])
+        resp = {"data": rows_to_dicts(keys, items),
+                "page_size": page_size, "next_cursor": next_cursor}
+        if parse_bool(request.args.get("with_total"), default=False):
+            resp["total"] = q.order_by(None).count()
+        return jsonify(resp), 200
+
+    q = q.order_by(*keyset_order(order))
+    total = q.order_by(None).count() if parse_bool(request.args.get("with_total"), default=True) else None
     items = q.offset((page - 1) * page_size).limit(page_size).all()
-    data = [t.to_dict(assignee_name=name) for (t, name) in items]
-    return jsonify({"data": data, "page": page, "page_size": page_size, "total": total}), 200
+    return jsonify({"data": rows_to_dicts(keys, items), "page": page, "page_size": page_size, "total": total}), 200
 
 @task_bp.route("/", methods=["POST"])
 @jwt_required()
@@ -84,13 +189,10 @@ def create_task():
         created_by=created_by,
     )
 
-    if not data.get("task_code"):
-        next_num = (db.session.query(db.func.coalesce(db.func.max(Task.id), 0)).scalar() or 0) + 1
-        t.task_code = f"TS-{next_num:04d}"
-    else:
-        t.task_code = data["task_code"]
-
-    db.session.add(t); db.session.commit()
+    err = insert_task(t, data.get("task_code"))
+    if err:
+        return jsonify({"error": err[0]}), err[1]
+    db.session.commit()
     return jsonify(t.to_dict(assignee_name=u.username)), 201
 
 @task_bp.route("/<int:task_id>", methods=["PUT", "PATCH"])
@@ -119,9 +221,10 @@ def update_task(task_id):
 
 @task_bp.route("/<int:task_id>", methods=["GET"])
 @jwt_required()
+@conditional_get("tasks", "users")
 def get_task(task_id):
-    t, name = db.session.query(Task, User.username).join(User, User.id == Task.assignee_id).filter(Task.id == task_id).first_or_404()
-    return jsonify(t.to_dict(assignee_name=name)), 200
+    row = _task_rows().filter(Task.id == task_id).first_or_404()
+    return jsonify(dict(zip(TASK_FIELDS, row))), 200
 
 @task_bp.route("/<int:task_id>", methods=["DELETE"])
 @jwt_required()
@@ -1,9 +1,19 @@
-from flask import Blueprint, request, jsonify, g
+from flask import Blueprint, request, jsonify, g, current_app, send_file, Response, stream_with_context
 from app import db
-from app.models import Timesheet, Task
+from app.models import Timesheet, Task, TimesheetRollup
 from app.utils.authz import require_roles
+from app.utils.pagination import encode_cursor, decode_cursor, keyset_order, keyset_after, parse_bool, parse_fields
+from app.utils import imports, exports
+from app.utils.rollup import RollupDeltas
+from app.utils.task_status import pending_transitions, transition_tasks
+from app.utils.httpcache import bump, conditional_get
+from app.utils.json_provider import rows_to_dicts
+from app.utils.metrics import count_timesheet_rows
+from app.utils.querystats import query_budget
 from datetime import datetime, date, time, timedelta
-from sqlalchemy import text
+from functools import lru_cache
+import os
+from sqlalchemy import insert
 
 timesheet_bp = Blueprint("timesheet", __name__)
 # ใน create_app: app.register_blueprint(timesheet_bp, url_prefix="/api/timesheet")
@@ -40,20 +50,82 @@ def ts_to_dict(t: Timesheet):
         "created_at": t.created_at.isoformat() if getattr(t, "created_at", None) else None,
     }
 
+# คอลัมน์ของ get_timesheets (key เหมือน ts_to_dict) — select เป็น tuple แล้วให้ JSON provider แปลง date/time
+TS_FIELDS = {
+    "id": Timesheet.id,
+    "user_id": Timesheet.user_id,
+    "task_id": Timesheet.task_id,
+    "work_date": Timesheet.work_date,
+    "start_time": Timesheet.start_time,
+    "end_time": Timesheet.end_time,
+    "hours": Timesheet.hours,
+    "notes": Timesheet.notes,
+    "created_at": Timesheet.created_at,
+}
+
+# ลำดับของรายการ timesheet (work_date DESC, start_time ASC, id DESC) — ตรงกับ ix_timesheets_user_date_start_id
+TS_ORDER_KEYS = [(Timesheet.work_date, True), (Timesheet.start_time, False), (Timesheet.id, True)]
+
 def _update_tasks_to_in_progress(task_ids):
-    ids = list({int(i) for i in (task_ids or [])})
-    if not ids: return
-    db.session.execute(
-        text("UPDATE tasks SET status = 'In Progress' WHERE id = ANY(:ids) AND status = 'Open'"),
-        {"ids": ids}
-    )
-    db.session.commit()
+    """Open -> In Progress — เข้าคิวของ transaction นี้ แล้ว apply รวมครั้งเดียวตอน commit"""
+    pending_transitions().add(task_ids, "In Progress", only_from="Open")
+
+# ---------- bulk parsing (cache ไว้ เพราะค่าวัน/เวลาซ้ำกันมากในไฟล์ import) ----------
+@lru_cache(maxsize=4096)
+def parse_time_flex(s: str):
+    if not s: raise ValueError("time is required")
+    s = s.strip()
+    for fmt in ("%H:%M", "%I:%M %p", "%H:%M:%S"):
+        try: return datetime.strptime(s, fmt).time()
+        except ValueError:
+            pass
+    raise ValueError("time must be HH:MM or hh:mm AM/PM")
+
+@lru_cache(maxsize=4096)
+def parse_work_date(s: str):
+    return datetime.strptime(s, "%Y-%m-%d").date()
+
+def compute_hours(d, s, ed):
+    start_dt = datetime.combine(d, s)
+    end_dt   = datetime.combine(d, ed)
+    if end_dt <= start_dt:
+        end_dt += timedelta(days=1)
+    secs = (end_dt - start_dt).total_seconds()
+    if secs < 5*60:  raise ValueError("duration too short (<5min)")
+    if secs > 16*3600: raise ValueError("duration too long (>16h)")
+    return round(secs/3600.0, 2)
+
+def entry_to_row(e, uid):
+    """ตรวจ 1 แถวของ bulk/import แล้วคืน dict สำหรับ insert(Timesheet) — raise ถ้าไม่ถูกต้อง"""
+    tid = int(e["task_id"])
+    d = s = ed = None
+    if all(k in e and e[k] for k in ("work_date","start_time","end_time")):
+        d, s, ed = parse_work_date(e["work_date"]), parse_time_flex(e["start_time"]), parse_time_flex(e["end_time"])
+        hours = compute_hours(d, s, ed)
+    elif "hours" in e:
+        hours = float(e["hours"])
+        if hours <= 0: raise ValueError("hours must be > 0")
+    else:
+        raise ValueError("missing hours or (work_date,start_time,end_time)")
+    return {
+        "user_id": uid, "task_id": tid, "hours": hours,
+        "work_date": d or date.today(), "start_time": s, "end_time": ed,
+        "notes": (e.get("note") or e.get("notes") or "").strip(),
+    }
+
+def insert_timesheet_rows(rows):
+    """insert หลายแถวใน statement เดียว (executemany / insertmanyvalues) + rollup + ขยับสถานะ task — ไม่ commit"""
+    if not rows: return
+    db.session.execute(insert(Timesheet), rows)
+    bump("timesheets")
+    deltas = RollupDeltas()
+    for r in rows: deltas.add_row(r)
+    deltas.apply()
+    _update_tasks_to_in_progress(r["task_id"] for r in rows)
 
 # ---------- routes ----------
-@timesheet_bp.get("/")
-@require_roles("Admin", "HR", "User")
-def get_timesheets():
-    # filter: task_id, user_id(Admin/HR), from, to, paging
+def _filtered_timesheets():
+    """filter ร่วมของ get_timesheets/export: task_id, user_id(Admin/HR), from, to → (query, error_response)"""
     q = Timesheet.query
     role = g.user.get("role"); user_id = g.user.get("id")
 
@@ -70,19 +142,130 @@ def get_timesheets():
     d_from = parse_date_ymd(request.args.get("from"))
     d_to   = parse_date_ymd(request.args.get("to"))
     if request.args.get("from") and not d_from:
-        return jsonify({"error":"from must be YYYY-MM-DD"}), 400
+        return None, (jsonify({"error":"from must be YYYY-MM-DD"}), 400)
     if request.args.get("to") and not d_to:
-        return jsonify({"error":"to must be YYYY-MM-DD"}), 400
+        return None, (jsonify({"error":"to must be YYYY-MM-DD"}), 400)
     if d_from: q = q.filter(Timesheet.work_date >= d_from)
     if d_to:   q = q.filter(Timesheet.work_date <= d_to)
+    return q, None
+
+@timesheet_bp.get("/")
+@require_roles("Admin", "HR", "User")
+@conditional_get("timesheets")
+@query_budget(5)   # สถานะผู้ใช้ + version ของ ETag + count + หน้า (+ สำรอง 1)
+def get_timesheets():
+    # filter: task_id, user_id(Admin/HR), from, to, paging
+    q, err = _filtered_timesheets()
+    if err: return err
 
-    page = request.args.get("page", 1, type=int)
     size = min(max(request.args.get("page_size", 20, type=int),1),100)
+    keys = TS_ORDER_KEYS
+    # ?fields=work_date,hours → select เฉพาะคอลัมน์ที่ขอ; คอลัมน์ของ cursor ต่อท้าย tuple ถ้าไม่ได้ขอ
+    try:
+        fields = parse_fields(request.args.get("fields"), TS_FIELDS) or list(TS_FIELDS)
+    except ValueError as e:
+        return jsonify({"error": f"unknown fields: {e}"}), 400
+    extra = [c for c, _ in keys if c.key not in fields]
+    rows_q = q.with_entities(*[TS_FIELDS[f] for f in fields], *extra)
+
+    # โหมด keyset: ส่ง ?cursor= (ว่างได้สำหรับหน้าแรก) แล้วใช้ next_cursor ต่อไปเรื่อย ๆ
+    # ใช้ index ix_timesheets_user_date_start_id ไม่ต้อง OFFSET และไม่นับ total ถ้าไม่ขอ
+    if "cursor" in request.args:
+        cursor = request.args.get("cursor") or ""
+        if cursor:
+            try:
+                last = decode_cursor(cursor, [date.fromisoformat, time.fromisoformat, int])
+            except ValueError:
+                return jsonify({"error":"invalid cursor"}), 400
+            page_q = rows_q.filter(keyset_after(keys, last))
+        else:
+            page_q = rows_q
+        rows = page_q.order_by(*keyset_order(keys)).limit(size + 1).all()
+        items, has_more = rows[:size], len(rows) > size
+        last_row = items[-1] if items else None
+        resp = {
+            "items": rows_to_dicts(fields, items),
+            "page_size": size,
+            "next_cursor": encode_cursor([last_row.work_date, last_row.start_time, last_row.id]) if has_more else None,
+        }
+        if parse_bool(request.args.get("with_total"), default=False):
+            resp["total"] = q.count()
+        return jsonify(resp), 200
 
-    total = q.count()
-    items = (q.order_by(Timesheet.work_date.desc(), Timesheet.start_time.asc(), Timesheet.id.desc())
-               .offset((page-1)*size).limit(size).all())
-    return jsonify({"items":[ts_to_dict(t) for t in items], "page":page, "page_size":size, "total":total}), 200
+    page = request.args.get("page", 1, type=int)
+    total = q.count() if parse_bool(request.args.get("with_total"), default=True) else None
+    items = (rows_q.order_by(*keyset_order(keys))
+                   .offset((page-1)*size).limit(size).all())
+    return jsonify({"items":rows_to_dicts(fields, items), "page":page, "page_size":size, "total":total}), 200
+
+@timesheet_bp.get("/summary")
+@require_roles("Admin", "HR", "User")
+def timesheet_summary():
+    """
+    ชั่วโมงรวมจาก timesheet_daily_rollups (O(จำนวนวัน) แทน O(จำนวน entry))
+    ?group=day|week (default day), from/to, user_id (Admin/HR), task_id
+    """
+    group = (request.args.get("group") or "day").lower()
+    if group not in {"day", "week"}:
+        return jsonify({"error":"group must be day or week"}), 400
+    R = TimesheetRollup
+    q = db.session.query(R)
+    role = g.user.get("role"); user_id = g.user.get("id")
+    param_user = request.args.get("user_id", type=int)
+    q = q.filter(R.user_id == (param_user if role in {"Admin","HR"} and param_user else user_id))
+
+    task_id = request.args.get("task_id", type=int)
+    if task_id: q = q.filter(R.task_id == task_id)
+    d_from = parse_date_ymd(request.args.get("from"))
+    d_to   = parse_date_ymd(request.args.get("to"))
+    if request.args.get("from") and not d_from:
+        return jsonify({"error":"from must be YYYY-MM-DD"}), 400
+    if request.args.get("to") and not d_to:
+        return jsonify({"error":"to must be YYYY-MM-DD"}), 400
+    if d_from: q = q.filter(R.work_date >= d_from)
+    if d_to:   q = q.filter(R.work_date <= d_to)
+
+    if group == "day":
+        rows = (q.with_entities(R.work_date, db.func.sum(R.hours), db.func.sum(R.entries))
+                 .group_by(R.work_date).order_by(R.work_date).all())
+        items = [{"work_date": d.isoformat(), "hours": round(h or 0, 2), "entries": int(n or 0)} for d, h, n in rows]
+    else:
+        rows = (q.with_entities(R.iso_year, R.iso_week, db.func.sum(R.hours), db.func.sum(R.entries))
+                 .group_by(R.iso_year, R.iso_week).order_by(R.iso_year, R.iso_week).all())
+        items = [{"iso_year": y, "iso_week": w, "hours": round(h or 0, 2), "entries": int(n or 0)} for y, w, h, n in rows]
+    return jsonify({"group": group, "items": items, "total_hours": round(sum(i["hours"] for i in items), 2)}), 200
+
+EXPORT_COLUMNS = [Timesheet.id, Timesheet.user_id, Timesheet.task_id, Timesheet.work_date,
+                  Timesheet.start_time, Timesheet.end_time, Timesheet.hours, Timesheet.notes, Timesheet.created_at]
+
+@timesheet_bp.get("/export")
+@require_roles("Admin", "HR", "User")
+def export_timesheets():
+    """
+    export ตาม filter เดียวกับ get_timesheets (?format=csv|ndjson|xlsx)
+    ดึงแบบ yield_per (server-side cursor บน PostgreSQL) แล้ว stream เป็น chunk — memory คงที่ไม่ขึ้นกับจำนวนแถว
+    """
+    fmt = (request.args.get("format") or "csv").lower()
+    if fmt not in exports.FORMATS:
+        return jsonify({"error": f"format must be one of {sorted(exports.FORMATS)}"}), 400
+    if fmt == "xlsx" and exports.Workbook is None:
+        return jsonify({"error": "xlsx export requires openpyxl"}), 501
+
+    q, err = _filtered_timesheets()
+    if err: return err
+
+    chunk = int(current_app.config.get("EXPORT_YIELD_PER", 2000))
+    header = [c.key for c in EXPORT_COLUMNS]
+    rows = q.with_entities(*EXPORT_COLUMNS).order_by(*keyset_order(TS_ORDER_KEYS)).yield_per(chunk)
+    filename = f"timesheets-{date.today().isoformat()}.{fmt}"
+
+    if fmt == "xlsx":
+        return send_file(exports.xlsx_file(header, rows), mimetype=exports.FORMATS[fmt],
+                         as_attachment=True, download_name=filename)
+
+    gen = exports.csv_chunks if fmt == "csv" else exports.ndjson_chunks
+    return Response(stream_with_context(gen(header, rows, chunk)), mimetype=exports.FORMATS[fmt],
+                    headers={"Content-Disposition": f'attachment; filename="{filename}"'})
 
 # app/routes/timesheet.py (เฉพาะสอง endpoint นี้)
 
@@ -96,71 +279,136 @@ def bulk_create_timesheets():
     if not isinstance(entries, list) or not entries:
         return jsonify({"error": "entries (list) is required"}), 400
 
-    from datetime import datetime, timedelta
-
-    def parse_time_flex(s: str):
-        if not s: raise ValueError("time is required")
-        s = s.strip()
-        for fmt in ("%H:%M", "%I:%M %p", "%H:%M:%S"):
-            try: return datetime.strptime(s, fmt).time()
-            except ValueError:
-                pass
-        raise ValueError("time must be HH:MM or hh:mm AM/PM")
-
-    def compute_hours(d_str, s_str, e_str):
-        d  = datetime.strptime(d_str, "%Y-%m-%d").date()
-        s  = parse_time_flex(s_str)
-        ed = parse_time_flex(e_str)
-        start_dt = datetime.combine(d, s)
-        end_dt   = datetime.combine(d, ed)
-        if end_dt <= start_dt:
-            end_dt += timedelta(days=1)
-        secs = (end_dt - start_dt).total_seconds()
-        if secs < 5*60:  raise ValueError("duration too short (<5min)")
-        if secs > 16*3600: raise ValueError("duration too long (>16h)")
-        return round(secs/3600.0, 2)
-
     uid = g.user["id"]
-    created, touched, errors = [], [], []
+    rows, errors = [], []
 
     for i, e in enumerate(entries, 1):
         try:
-            tid = int(e["task_id"])
-            hours = None
-
-            if all(k in e and e[k] for k in ("work_date","start_time","end_time")):
-                hours = compute_hours(e["work_date"], e["start_time"], e["end_time"])
-            elif "hours" in e:
-                hours = float(e["hours"])
-                if hours <= 0: raise ValueError("hours must be > 0")
-            else:
-                raise ValueError("missing hours or (work_date,start_time,end_time)")
-
-            ts = Timesheet(
-                user_id=uid, task_id=tid, hours=hours,
-                notes=(e.get("note") or e.get("notes") or "").strip()
-            )
-            db.session.add(ts)
-            created.append(ts)
-            touched.append(tid)
+            rows.append(entry_to_row(e, uid))
         except Exception as ex:
             errors.append(f"row {i}: {ex}")
 
-    # ถ้ามีสักแถวที่ valid ก็ commit (กัน 500)
-    if created:
-        db.session.commit()
-        # อัปเดต Open -> In Progress
-        from sqlalchemy import text
-        db.session.execute(
-            text("UPDATE tasks SET status='In Progress' WHERE status='Open' AND id = ANY(:ids)"),
-            {"ids": list(set(touched))}
-        )
+    # ถ้ามีสักแถวที่ valid ก็ insert ทั้งหมด + อัปเดต Open -> In Progress แล้ว commit ครั้งเดียว
+    if rows:
+        insert_timesheet_rows(rows)
         db.session.commit()
+    count_timesheet_rows("bulk", len(rows), len(errors))
 
-    if errors and not created:
+    if errors and not rows:
         return jsonify({"error": "; ".join(errors)}), 400
 
-    return jsonify({"saved": len(created), "errors": errors}), 201
+    return jsonify({"saved": len(rows), "errors": errors}), 201
+
+
+# ---------- streaming import (CSV / NDJSON) ----------
+# header ของ CSV ต้องมีครบสักชุด (เหมือน entry_to_row: hours หรือ work_date+start_time+end_time)
+IMPORT_COLUMNS = [("task_id", "hours"), ("task_id", "work_date", "start_time", "end_time")]
+
+def _import_format():
+    fmt = (request.args.get("format") or "").lower()
+    if fmt in imports.FORMATS: return fmt
+    upload = request.files.get("file") if request.mimetype == "multipart/form-data" else None
+    name = (upload.filename or "").lower() if upload else ""
+    mimetype = upload.mimetype if upload else request.mimetype
+    if name.endswith(".csv") or mimetype == "text/csv": return "csv"
+    if name.endswith((".ndjson", ".jsonl")) or mimetype in {"application/x-ndjson", "application/jsonl"}: return "ndjson"
+    return None
+
+def _import_batch(uid, batch):
+    """ตรวจ + insert 1 batch แล้ว commit — task_id ที่ไม่มีอยู่จริงรายงานเป็น error ของแถว (ไม่ให้ทั้ง batch ล้ม)"""
+    parsed, errors = [], []
+    for n, rec in batch:
+        try:
+            if isinstance(rec, Exception): raise rec
+            parsed.append((n, entry_to_row(rec, uid)))
+        except Exception as ex:
+            errors.append((n, str(ex)))
+
+    rows = []
+    if parsed:
+        ids = {r["task_id"] for _, r in parsed}
+        known = {tid for (tid,) in db.session.query(Task.id).filter(Task.id.in_(ids))}
+        for n, r in parsed:
+            if r["task_id"] in known: rows.append(r)
+            else: errors.append((n, f"task_id {r['task_id']} not found"))
+    insert_timesheet_rows(rows)
+    db.session.commit()
+    count_timesheet_rows("import", len(rows), len(errors))
+    return len(rows), errors
+
+@timesheet_bp.post("/import")
+@require_roles("Admin", "HR", "User")
+def import_timesheets():
+    """
+    นำเข้า timesheet จากไฟล์ CSV/NDJSON (raw body หรือ multipart field "file")
+    ไฟล์ถูก spool ลงดิสก์แล้วประมวลผลทีละ batch (IMPORT_BATCH_SIZE) ใน background thread → 202 + import_id
+    ส่ง ?wait=1 เพื่อรอจนเสร็จใน request เดียว
+    """
+    # จำกัดขนาดก่อนแตะ body (รวม request.files ใน _import_format) — werkzeug ตอบ 413 เองถ้า Content-Length/multipart เกิน
+    max_bytes = int(current_app.config.get("IMPORT_MAX_BYTES", 0)) or None
+    request.max_content_length = max_bytes
+
+    fmt = _import_format()
+    if not fmt:
+        return jsonify({"error": "format must be csv or ndjson (?format= or file extension/Content-Type)"}), 415
+
+    imports.purge_results()
+    upload = request.files.get("file") if request.mimetype == "multipart/form-data" else None
+    import_id = imports.new_import_id()
+    try:
+        path = imports.spool_upload(upload.stream if upload else request.stream, import_id, max_bytes)
+    except imports.UploadTooLarge as ex:
+        return jsonify({"error": str(ex)}), 413
+
+    # ตั้งแต่นี้ไฟล์ spool เป็นของ run_import (ลบเมื่อจบ) — ก่อนส่งต่อต้องลบเองถ้าล้ม
+    try:
+        missing = imports.missing_columns(path, fmt, IMPORT_COLUMNS)
+        if missing:
+            imports.discard(path)
+            return jsonify({"error": f"missing columns: {', '.join(missing)}"}), 400
+
+        uid = g.user["id"]
+        batch_size = int(current_app.config.get("IMPORT_BATCH_SIZE", 1000))
+        args = (import_id, path, fmt, uid, lambda batch: _import_batch(uid, batch), batch_size)
+
+        if parse_bool(request.args.get("wait")):
+            status = imports.run_import(*args)
+            return jsonify(status), 200 if status["state"] == "done" else 500
+
+        imports.write_status(import_id, {"import_id": import_id, "user_id": uid, "format": fmt, "state": "queued",
+                                         "processed": 0, "saved": 0, "errors": 0})
+        imports.start_in_background(current_app._get_current_object(), imports.run_import, *args)
+    except Exception:
+        imports.discard(path)
+        raise
+    return jsonify({"import_id": import_id, "state": "queued",
+                    "status_url": f"{request.script_root}/api/timesheet/import/{import_id}",
+                    "errors_url": f"{request.script_root}/api/timesheet/import/{import_id}/errors"}), 202
+
+def _get_import_status(import_id):
+    if not imports.valid_import_id(import_id): return None
+    status = imports.read_status(import_id)
+    if not status: return None
+    if g.user.get("role") not in {"Admin","HR"} and status.get("user_id") != g.user.get("id"):
+        return None
+    return status
+
+@timesheet_bp.get("/import/<import_id>")
+@require_roles("Admin", "HR", "User")
+def import_status(import_id):
+    status = _get_import_status(import_id)
+    if not status: return jsonify({"error": "Import not found"}), 404
+    return jsonify(status), 200
+
+@timesheet_bp.get("/import/<import_id>/errors")
+@require_roles("Admin", "HR", "User")
+def import_errors(import_id):
+    status = _get_import_status(import_id)
+    if not status: return jsonify({"error": "Import not found"}), 404
+    path = imports.errors_path(import_id)
+    if status.get("state") in {"queued", "running"} or not os.path.exists(path):
+        return jsonify({"error": "Import still running", "state": status.get("state")}), 409
+    return send_file(path, mimetype="text/csv", as_attachment=True, download_name=f"import-{import_id}-errors.csv")
 
 
 @timesheet_bp.post("/")
@@ -176,8 +424,8 @@ def create_timesheet():
 
     # รูปแบบยืดหยุ่นเหมือน bulk
     hours = None
+    d = s = ed = None
     if all(k in data and data[k] for k in ("work_date","start_time","end_time")):
-        from datetime import datetime
         try:
             d  = datetime.strptime(data["work_date"], "%Y-%m-%d").date()
             s  = datetime.strptime(data["start_time"], "%H:%M").time()
@@ -197,15 +445,12 @@ def create_timesheet():
     else:
         return jsonify({"error":"hours or (work_date+start_time+end_time) is required"}), 400
 
-    ts = Timesheet(user_id=user_id, task_id=task_id, hours=hours, notes=(data.get("notes") or "").strip())
-    db.session.add(ts); db.session.commit()
-
-    # อัปเดตสถานะ Task
-    from sqlalchemy import text
-    db.session.execute(
-        text("UPDATE tasks SET status='In Progress' WHERE status='Open' AND id=:tid"),
-        {"tid": int(task_id)}
-    )
+    ts = Timesheet(user_id=user_id, task_id=task_id, hours=hours, notes=(data.get("notes") or "").strip(),
+                   work_date=d or date.today(), start_time=s, end_time=ed)
+    db.session.add(ts)
+    deltas = RollupDeltas(); deltas.add_timesheet(ts); deltas.apply()
+    # Open -> In Progress ใน transaction เดียวกับการบันทึก timesheet (commit ครั้งเดียว)
+    _update_tasks_to_in_progress([task_id])
     db.session.commit()
 
     return jsonify(ts_to_dict(ts)), 201
@@ -222,6 +467,9 @@ def update_timesheet(ts_id):
     data, err_resp, err_status = ensure_json()
     if err_resp: return err_resp, err_status
 
+    deltas = RollupDeltas()
+    deltas.add_timesheet(ts, -1)   # ค่าเดิมก่อนแก้
+
     if "notes" in data: ts.notes = (data.get("notes") or data.get("note") or "").strip()
     if "task_id" in data:
         try: ts.task_id = int(data["task_id"])
@@ -242,6 +490,8 @@ def update_timesheet(ts_id):
         if val <= 0: return jsonify({"error":"hours must be > 0"}), 400
         ts.hours = val
 
+    deltas.add_timesheet(ts, +1)
+    deltas.apply()
     db.session.commit()
     return jsonify(ts_to_dict(ts)), 200
 
@@ -252,28 +502,68 @@ def delete_timesheet(ts_id):
     role = g.user.get("role"); requester_id = g.user.get("id")
     if role not in {"Admin","HR"} and ts.user_id != requester_id:
         return jsonify({"error":"Forbidden"}), 403
-    db.session.delete(ts); db.session.commit()
+    deltas = RollupDeltas(); deltas.add_timesheet(ts, -1)
+    db.session.delete(ts); deltas.apply()
+    db.session.commit()
     return "", 204
 
 # ====== Task status helpers/endpoint (สำหรับปุ่มปิดงาน) ======
 
+TASK_STATUSES = {"Open", "In Progress", "Complete", "Closed"}
+
+def _set_tasks_status(task_ids, new_status: str):
+    """เปลี่ยนสถานะหลาย Task ใน UPDATE เดียว + commit ครั้งเดียว → (set ของ id ที่พบ, error)"""
+    if new_status not in TASK_STATUSES:
+        return set(), f"Invalid status '{new_status}'"
+
+    # เปลี่ยนสถานะ + task_status_counts ใน transaction เดียว
+    found = transition_tasks(task_ids, new_status)
+    db.session.commit()
+    return found, None
+
 def _set_task_status(task_id: int, new_status: str):
     """อัปเดตสถานะ Task แบบปลอดภัยและ commit ในที่เดียว"""
-    allowed = {"Open", "In Progress", "Complete", "Closed"}
-    if new_status not in allowed:
-        return False, f"Invalid status '{new_status}'"
-
-    # ใช้ text() ป้องกัน SQL injection และทำงานเร็ว
-    res = db.session.execute(
-        text("UPDATE tasks SET status = :st WHERE id = :tid"),
-        {"st": new_status, "tid": int(task_id)}
-    )
-    db.session.commit()
-    # res.rowcount อาจเป็น 0 ถ้าไม่พบ task_id
-    if getattr(res, "rowcount", 0) == 0:
+    found, err = _set_tasks_status([task_id], new_status)
+    if err:
+        return False, err
+    if not found:
         return False, "Task not found"
     return True, None
 
+def _batch_set_status(new_status: str):
+    """body: {"task_ids": [1, 2, 3]} → {"updated": [...], "not_found": [...]}"""
+    data, err_resp, err_status = ensure_json()
+    if err_resp: return err_resp, err_status
+    raw = data.get("task_ids") or data.get("ids")
+    if not isinstance(raw, list) or not raw:
+        return jsonify({"error": "task_ids (list) is required"}), 400
+    try:
+        ids = {int(i) for i in raw}
+    except (TypeError, ValueError):
+        return jsonify({"error": "task_ids must be integers"}), 400
+    if len(ids) > 1000:
+        return jsonify({"error": "at most 1000 task_ids per request"}), 400
+
+    found, err = _set_tasks_status(ids, new_status)
+    if err:
+        return jsonify({"error": err}), 400
+    return jsonify({"ok": True, "status": new_status,
+                    "updated": sorted(found), "not_found": sorted(ids - found)}), 200
+
+
+@timesheet_bp.post("/tasks/complete")
+@require_roles("Admin", "HR")
+def mark_tasks_complete():
+    """ปิดงานหลายตัวพร้อมกัน (UPDATE เดียว, commit เดียว) — เฉพาะ Admin/HR (User ปิดงานทีละตัวที่ /tasks/<id>/complete)"""
+    return _batch_set_status("Complete")
+
+
+@timesheet_bp.post("/tasks/reopen")
+@require_roles("Admin", "HR")
+def reopen_tasks():
+    """เปิดงานใหม่หลายตัวพร้อมกัน — เฉพาะ Admin/HR"""
+    return _batch_set_status("Open")
+
 
 @timesheet_bp.post("/tasks/<int:task_id>/complete")
 @require_roles("Admin", "HR", "User")
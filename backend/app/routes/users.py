@@ -1,8 +1,11 @@
 # app/routes/users.py
 from flask import Blueprint, request, jsonify
-from app.models import User
-from app import db, bcrypt
-from app.utils.authz import require_roles, jwt_required
+from app.models import User, RefreshToken
+from app import db
+from app.utils.authz import require_roles, jwt_required, invalidate_user
+from app.utils.hashing import hash_password
+from app.utils.httpcache import conditional_get
+from app.utils import ratelimit, refresh_tokens
 import random, string
 
 users_bp = Blueprint("users", __name__)
@@ -35,12 +38,13 @@ def create_user():
         username=data["username"],
         email=data["email"],
         role=data.get("role", "User"),
-        password_hash=bcrypt.generate_password_hash(password).decode(),
+        password_hash=hash_password(password),
         is_temp_password=True
     )
 
     db.session.add(user)
     db.session.commit()
+    ratelimit.forget_unknown(user.email)
 
     return jsonify({
         "message": "User created",
@@ -55,9 +59,11 @@ def reset_password(user_id):
     user = User.query.get_or_404(user_id)
     new_password = "welcome123"
 
-    user.password_hash = bcrypt.generate_password_hash(new_password).decode()
+    user.password_hash = hash_password(new_password)
     user.is_temp_password = True
+    refresh_tokens.revoke_all(user.id)
     db.session.commit()
+    invalidate_user(user.id)
 
     return jsonify({"new_password": new_password})
 
@@ -68,7 +74,9 @@ def reset_password(user_id):
 def disable_user(user_id):
     user = User.query.get_or_404(user_id)
     user.is_active = False
+    refresh_tokens.revoke_all(user.id)
     db.session.commit()
+    invalidate_user(user.id)
     return jsonify({"message": "disabled"})
 
 @users_bp.patch("/<int:user_id>/enable")
@@ -78,6 +86,7 @@ def enable_user(user_id):
     user = User.query.get_or_404(user_id)
     user.is_active = True
     db.session.commit()
+    invalidate_user(user.id)
     return jsonify({"message": "enabled"})
 
 # DELETE user
@@ -86,12 +95,15 @@ def enable_user(user_id):
 @require_roles("admin")
 def delete_user(user_id):
     user = User.query.get_or_404(user_id)
+    RefreshToken.query.filter_by(user_id=user.id).delete()
     db.session.delete(user)
     db.session.commit()
+    invalidate_user(user.id)
     return jsonify({"message": "deleted"})
 
 @users_bp.get("/assignable")
 @jwt_required
+@conditional_get("users")
 def assignable_users():
     users = User.query.filter_by(is_active=True).all()
     return jsonify([
@@ -1,6 +1,95 @@
 from functools import wraps
 from flask import request, jsonify, current_app, g
-import jwt
+import calendar, datetime, jwt
+from app.utils.cache import TTLCache
+
+
+def _caches():
+    """cache ต่อ app (ต่อ worker): token ที่ verify แล้ว + สถานะ active/role ของผู้ใช้"""
+    caches = current_app.extensions.get("authz_caches")
+    if caches is None:
+        cfg = current_app.config
+        caches = current_app.extensions["authz_caches"] = {
+            "tokens": TTLCache(cfg.get("JWT_CACHE_SIZE", 4096), cfg.get("JWT_CACHE_TTL", 300)),
+            "users": TTLCache(cfg.get("USER_STATE_CACHE_SIZE", 4096), cfg.get("USER_STATE_CACHE_TTL", 30)),
+        }
+    return caches
+
+
+def verify_token(token):
+    """
+    jwt.decode (HS256, ต้องมี exp) พร้อม cache ตาม signature ของ token
+    token เดิมที่เคย verify แล้วจะไม่ต้องคำนวณ HMAC/parse ซ้ำจนกว่าจะหมด TTL หรือหมดอายุ
+    raise jwt.ExpiredSignatureError / jwt.InvalidTokenError เหมือน jwt.decode
+    """
+    cache = _caches()["tokens"]
+    sig = token.rsplit(".", 1)[-1]
+    hit = cache.get(sig)
+    now = calendar.timegm(datetime.datetime.now(datetime.timezone.utc).utctimetuple())
+    if hit is not None and hit[0] == token:
+        if hit[1]["exp"] <= now:
+            cache.pop(sig)
+            raise jwt.ExpiredSignatureError("Signature has expired")
+        return hit[1]
+
+    payload = jwt.decode(
+        token,
+        current_app.config["SECRET_KEY"],
+        algorithms=["HS256"],
+        options={"require": ["exp"]}
+    )
+    cache.set(sig, (token, payload), ttl=payload["exp"] - now)
+    return payload
+
+
+def get_user_state(user_id):
+    """(is_active, role) ของผู้ใช้ — cache สั้น ๆ ต่อ worker; None ถ้าไม่พบผู้ใช้"""
+    from app.models import User
+    cache = _caches()["users"]
+    state = cache.get(user_id)
+    if state is None:
+        row = User.query.with_entities(User.is_active, User.role).filter(User.id == user_id).first()
+        state = (row.is_active is not False, row.role) if row else False
+        cache.set(user_id, state)
+    return state or None
+
+
+def invalidate_user(user_id):
+    """เรียกหลัง disable/enable/delete/เปลี่ยนรหัสผ่าน เพื่อให้มีผลทันทีใน worker นี้ (worker อื่นภายใน TTL)"""
+    _caches()["users"].pop(user_id)
+
+
+def authenticate():
+    """ตรวจ Authorization: Bearer <token> → (payload, None) หรือ (None, error response)"""
+    cached = getattr(request, "_authz_user", None)
+    if cached is not None:   # decorator ชั้นนอกตรวจไปแล้วใน request นี้
+        return cached, None
+
+    auth = request.headers.get("Authorization", "")
+    if not auth.startswith("Bearer "):
+        return None, (jsonify({"error": "Unauthorized"}), 401)
+
+    token = auth.split(" ", 1)[1].strip()
+    try:
+        payload = verify_token(token)
+    except jwt.ExpiredSignatureError:
+        return None, (jsonify({"error": "Token expired"}), 401)
+    except jwt.InvalidTokenError:
+        return None, (jsonify({"error": "Invalid token"}), 401)
+    if payload.get("typ") == "refresh":   # refresh token ใช้เรียก API ไม่ได้
+        return None, (jsonify({"error": "Invalid token"}), 401)
+
+    state = get_user_state(payload.get("id"))
+    if not state:
+        return None, (jsonify({"error": "Unauthorized"}), 401)
+    is_active, role = state
+    if not is_active:
+        return None, (jsonify({"error": "Account disabled"}), 401)
+
+    # role ล่าสุดจาก DB (token อาจออกก่อนเปลี่ยน role)
+    user = dict(payload, role=role)
+    g.user = request._authz_user = user
+    return user, None
 
 
 def require_roles(*roles):
@@ -15,32 +104,18 @@ def require_roles(*roles):
             if request.method == "OPTIONS":
                 return "", 200
 
-            auth = request.headers.get("Authorization", "")
-            if not auth.startswith("Bearer "):
-                return jsonify({"error": "Unauthorized"}), 401
-
-            token = auth.split(" ", 1)[1].strip()
-            try:
-                payload = jwt.decode(
-                    token,
-                    current_app.config["SECRET_KEY"],
-                    algorithms=["HS256"],
-                    options={"require": ["exp"]}
-                )
-            except jwt.ExpiredSignatureError:
-                return jsonify({"error": "Token expired"}), 401
-            except jwt.InvalidTokenError:
-                return jsonify({"error": "Invalid token"}), 401
+            payload, err = authenticate()
+            if err:
+                return err
 
             # ✅ FIX ROLE CHECK (case-insensitive)
             if roles:
-                user_role = payload.get("role", "").lower()
+                user_role = (payload.get("role") or "").lower()
                 allowed_roles = [r.lower() for r in roles]
 
                 if user_role not in allowed_roles:
                     return jsonify({"error": "Forbidden"}), 403
 
-            g.user = payload
             return fn(*args, **kwargs)
         return inner
     return wrap
@@ -55,23 +130,9 @@ def jwt_required(fn):
         if request.method == "OPTIONS":
             return "", 200
 
-        auth = request.headers.get("Authorization", "")
-        if not auth.startswith("Bearer "):
-            return jsonify({"error": "Unauthorized"}), 401
-
-        token = auth.split(" ", 1)[1].strip()
-        try:
-            payload = jwt.decode(
-                token,
-                current_app.config["SECRET_KEY"],
-                algorithms=["HS256"],
-                options={"require": ["exp"]}
-            )
-        except jwt.ExpiredSignatureError:
-            return jsonify({"error": "Token expired"}), 401
-        except jwt.InvalidTokenError:
-            return jsonify({"error": "Invalid token"}), 401
-
-        g.user = payload
+        payload, err = authenticate()
+        if err:
+            return err
+
         return fn(*args, **kwargs)
     return inner
@@ -0,0 +1,51 @@
+import gzip
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # brotli เป็น optional — ไม่มีก็ใช้ gzip
+    brotli = None
+
+COMPRESSIBLE = {"application/json", "text/csv", "application/x-ndjson", "text/plain", "text/html"}
+
+
+def _accepts(encoding):
+    return request.accept_encodings[encoding] > 0
+
+
+def init_compression(app):
+    """
+    บีบอัด response (br ถ้ามี brotli และ client รับได้, ไม่งั้น gzip) เมื่อ body ยาวเกิน COMPRESS_MIN_SIZE
+    ข้าม response แบบ stream/send_file (export) และ response ที่มี Content-Encoding อยู่แล้ว
+    ETag ถูกเปลี่ยนเป็น weak (W/"...") เพราะ byte ที่ส่งไม่เท่ากับตัวที่ใช้คิด ETag
+    """
+    cfg = app.config
+    if not cfg.get("COMPRESS_ENABLED", True):
+        return
+    min_size = int(cfg.get("COMPRESS_MIN_SIZE", 1024))
+    gzip_level = int(cfg.get("COMPRESS_GZIP_LEVEL", 6))
+    br_quality = int(cfg.get("COMPRESS_BR_QUALITY", 4))
+
+    @app.after_request
+    def _compress(resp):
+        if (resp.direct_passthrough or resp.is_streamed or resp.status_code < 200
+                or resp.status_code in (204, 304) or "Content-Encoding" in resp.headers
+                or resp.mimetype not in COMPRESSIBLE):
+            return resp
+        resp.vary.add("Accept-Encoding")
+        if (resp.content_length or 0) < min_size:
+            return resp
+
+        if brotli is not None and _accepts("br"):
+            body, encoding = brotli.compress(resp.get_data(), quality=br_quality), "br"
+        elif _accepts("gzip"):
+            body, encoding = gzip.compress(resp.get_data(), compresslevel=gzip_level), "gzip"
+        else:
+            return resp
+
+        resp.set_data(body)
+        resp.headers["Content-Encoding"] = encoding
+        etag, weak = resp.get_etag()
+        if etag and not weak:
+            resp.set_etag(etag, weak=True)
+        return resp
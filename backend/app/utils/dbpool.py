@@ -0,0 +1,115 @@
+import os
+import threading
+import time
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool, Pool
+
+
+class _PoolStats:
+    """สถิติ connection pool ต่อ worker process (รวมทุก engine)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.pid = os.getpid()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidated = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.wait_samples = []     # ส่งต่อให้ /metrics (histogram) แล้วล้าง
+
+    def _fork_check(self):
+        if self.pid != os.getpid():   # หลัง gunicorn fork เริ่มนับใหม่
+            self.reset()
+
+    def add(self, name, n=1):
+        with self._lock:
+            self._fork_check()
+            setattr(self, name, getattr(self, name) + n)
+
+    def add_wait(self, seconds):
+        with self._lock:
+            self._fork_check()
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+            if len(self.wait_samples) < 10_000:
+                self.wait_samples.append(seconds)
+
+    def drain_wait_samples(self):
+        with self._lock:
+            samples, self.wait_samples = self.wait_samples, []
+            return samples
+
+    def snapshot(self):
+        with self._lock:
+            self._fork_check()
+            return {
+                "pid": self.pid, "connects": self.connects, "checkouts": self.checkouts,
+                "checkins": self.checkins, "invalidated": self.invalidated, "timeouts": self.timeouts,
+                "checkout_wait_seconds_total": round(self.wait_seconds_total, 6),
+                "checkout_wait_seconds_max": round(self.wait_seconds_max, 6),
+            }
+
+
+pool_stats = _PoolStats()
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool ที่จับเวลารอ connection (รวมกรณี pool เต็มต้องรอ) และนับ timeout"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            pool_stats.add("timeouts")
+            raise
+        finally:
+            pool_stats.add_wait(time.perf_counter() - start)
+
+
+@event.listens_for(Pool, "connect")
+def _on_connect(dbapi_conn, record):
+    pool_stats.add("connects")
+
+
+@event.listens_for(Pool, "checkout")
+def _on_checkout(dbapi_conn, record, proxy):
+    pool_stats.add("checkouts")
+
+
+@event.listens_for(Pool, "checkin")
+def _on_checkin(dbapi_conn, record):
+    pool_stats.add("checkins")
+
+
+@event.listens_for(Pool, "invalidate")
+def _on_invalidate(dbapi_conn, record, exc):
+    pool_stats.add("invalidated")
+
+
+def pool_status(engine):
+    """สถานะปัจจุบันของ pool ของ engine นี้ + สถิติสะสมของ worker"""
+    pool = engine.pool
+    status = {"class": pool.__class__.__name__}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        fn = getattr(pool, name, None)
+        if callable(fn):
+            status[name] = fn()
+    status.update(pool_stats.snapshot())
+    return status
+
+
+def install_statement_timeout(engine, timeout_ms):
+    """
+    โหมด PgBouncer (transaction pooling) ส่ง startup option -c statement_timeout ไม่ได้
+    จึงตั้งด้วย SET LOCAL ตอนเริ่มทุก transaction แทน
+    """
+    @event.listens_for(engine, "begin")
+    def _set_timeout(conn):
+        conn.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout_ms)}")
@@ -0,0 +1,63 @@
+import csv
+import io
+import json
+import tempfile
+
+try:
+    from openpyxl import Workbook
+except ImportError:  # xlsx เป็น optional
+    Workbook = None
+
+FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+def _cell(v):
+    return v.isoformat() if hasattr(v, "isoformat") else v
+
+
+def csv_chunks(header, rows, rows_per_chunk=1000):
+    """yield ข้อความ CSV ทีละก้อน (header ก่อน) — ใช้กับ Response(stream_with_context(...))"""
+    buf = io.StringIO()
+    w = csv.writer(buf)
+    w.writerow(header)
+    n = 0
+    for row in rows:
+        w.writerow([_cell(v) for v in row])
+        n += 1
+        if n % rows_per_chunk == 0:
+            yield buf.getvalue()
+            buf.seek(0); buf.truncate()
+    yield buf.getvalue()
+
+
+def ndjson_chunks(header, rows, rows_per_chunk=1000):
+    lines = []
+    for row in rows:
+        lines.append(json.dumps({k: _cell(v) for k, v in zip(header, row)}, ensure_ascii=False))
+        if len(lines) >= rows_per_chunk:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def xlsx_file(header, rows, sheet_title="timesheets"):
+    """
+    เขียน xlsx แบบ write-only (ไม่เก็บทั้ง sheet ใน memory) ลง temp file แล้วคืน file object ที่ seek(0) แล้ว
+    xlsx เป็น zip จึง stream ทีละก้อนระหว่างเขียนไม่ได้ — ต้องเขียนให้เสร็จก่อนส่ง
+    """
+    if Workbook is None:
+        raise RuntimeError("xlsx export requires openpyxl")
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(sheet_title)
+    ws.append(header)
+    for row in rows:
+        ws.append(list(row))
+    f = tempfile.TemporaryFile()
+    wb.save(f)
+    f.seek(0)
+    return f
@@ -0,0 +1,139 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+import bcrypt as _bcrypt
+from flask import current_app, jsonify
+from app.utils.metrics import observe_hash
+
+
+class HashingBusy(Exception):
+    """คิว hash เต็ม/รอนานเกิน — ตอบ 429 ให้ client ลองใหม่"""
+
+
+# ---- งานที่รันใน process ลูก (ต้องเป็นฟังก์ชันระดับ module เพื่อ pickle ได้) ----
+def _hash(password: bytes, rounds: int) -> str:
+    return _bcrypt.hashpw(password, _bcrypt.gensalt(rounds)).decode("utf-8")
+
+
+def _check(pw_hash: bytes, password: bytes) -> bool:
+    try:
+        return _bcrypt.checkpw(password, pw_hash)
+    except ValueError:   # hash เสีย/ไม่ใช่ bcrypt
+        return False
+
+
+def default_mp_context():
+    """forkserver ถ้า platform รองรับ (Linux) ไม่งั้น spawn — ไม่ใช้ fork ใน worker ที่มีหลาย thread"""
+    return "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+def _to_bytes(s):
+    return s.encode("utf-8") if isinstance(s, str) else s
+
+
+class PasswordHasher:
+    """
+    bcrypt ผ่าน process pool แยก ไม่ให้งาน CPU หนักกิน worker ของ gunicorn
+    - workers = 0 → รันใน process เดิม (dev/test)
+    - รับงานพร้อมกันได้ไม่เกิน workers + queue_size ต่อ worker process; เกินนั้น raise HashingBusy
+    - pool สร้างแบบ lazy และสร้างใหม่ถ้า pid เปลี่ยน (หลัง gunicorn fork)
+    - process ลูกสร้างด้วย forkserver/spawn — fork จาก worker ที่มีหลาย thread อาจติด lock ที่ถูกถือค้างไว้
+    """
+
+    def __init__(self, workers=2, queue_size=32, rounds=12, timeout=10.0, mp_context=None):
+        self.workers = workers
+        self.rounds = rounds
+        self.timeout = timeout
+        self.mp_context = mp_context or default_mp_context()
+        self._slots = threading.BoundedSemaphore(max(1, workers + queue_size))
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pid = None
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None or self._pid != os.getpid():
+                self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context(self.mp_context))
+                self._pid = os.getpid()
+            return self._pool
+
+    def _run(self, fn, *args):
+        if self.workers <= 0:
+            return fn(*args)
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy()
+        try:
+            future = self._executor().submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # คืน slot เมื่องานจบจริง — timeout ฝั่งผู้รอไม่ได้หยุดงานใน process ลูก
+        future.add_done_callback(lambda _f: self._slots.release())
+        try:
+            return future.result(self.timeout)
+        except FutureTimeout:
+            raise HashingBusy()
+
+    def _timed(self, op, fn, *args):
+        started = time.perf_counter()
+        try:
+            return self._run(fn, *args)
+        finally:
+            observe_hash(op, time.perf_counter() - started)
+
+    def hash(self, password) -> str:
+        return self._timed("hash", _hash, _to_bytes(password), self.rounds)
+
+    def check(self, pw_hash, password) -> bool:
+        if not pw_hash or not password:
+            return False
+        return self._timed("check", _check, _to_bytes(pw_hash), _to_bytes(password))
+
+    def needs_rehash(self, pw_hash) -> bool:
+        """cost ใน hash ($2b$<cost>$...) ไม่ตรงกับ BCRYPT_LOG_ROUNDS ปัจจุบัน"""
+        try:
+            return int(pw_hash.split("$")[2]) != self.rounds
+        except (AttributeError, IndexError, ValueError):
+            return True
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None and self._pid == os.getpid():
+                self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+def init_hashing(app):
+    cfg = app.config
+    app.extensions["password_hasher"] = PasswordHasher(
+        workers=int(cfg.get("PASSWORD_HASH_WORKERS", 2)),
+        queue_size=int(cfg.get("PASSWORD_HASH_QUEUE", 32)),
+        rounds=int(cfg.get("BCRYPT_LOG_ROUNDS", 12)),
+        timeout=float(cfg.get("PASSWORD_HASH_TIMEOUT", 10)),
+        mp_context=cfg.get("PASSWORD_HASH_MP_CONTEXT") or None,
+    )
+
+    @app.errorhandler(HashingBusy)
+    def _hashing_busy(_e):
+        resp = jsonify({"error": "Server busy, please retry"})
+        resp.headers["Retry-After"] = "1"
+        return resp, 429
+
+
+def get_hasher() -> PasswordHasher:
+    return current_app.extensions["password_hasher"]
+
+
+def hash_password(password) -> str:
+    return get_hasher().hash(password)
+
+
+def check_password(pw_hash, password) -> bool:
+    return get_hasher().check(pw_hash, password)
+
+
+def needs_rehash(pw_hash) -> bool:
+    return get_hasher().needs_rehash(pw_hash)
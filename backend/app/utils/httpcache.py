@@ -0,0 +1,119 @@
+import hashlib
+from functools import wraps
+from flask import current_app, g, has_app_context, make_response, request
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+from app import db
+from app.models import Task, Timesheet, User, TableVersion
+from app.utils.cache import TTLCache
+from app.utils.replicas import client_key
+
+# model ที่การเขียนผ่าน ORM ทำให้ version ของตารางขยับอัตโนมัติ
+TRACKED = {Task: "tasks", Timesheet: "timesheets", User: "users"}
+
+
+def _caches():
+    caches = current_app.extensions.get("http_cache")
+    if caches is None:
+        cfg = current_app.config
+        caches = current_app.extensions["http_cache"] = {
+            # version ที่อ่านล่าสุด (ต่อ worker) — ช่วงนี้ตอบ 304 ได้โดยไม่แตะ DB
+            "versions": TTLCache(64, float(cfg.get("HTTP_VERSION_CACHE_TTL", 1))),
+            "responses": TTLCache(int(cfg.get("HTTP_RESPONSE_CACHE_SIZE", 512)),
+                                  float(cfg.get("HTTP_RESPONSE_CACHE_TTL", 30))),
+        }
+    return caches
+
+
+def bump(*tables, session=None):
+    """
+    เพิ่ม version ของตาราง (ครั้งเดียวต่อ transaction) — เรียกเองหลัง UPDATE/INSERT แบบ Core
+    การเขียนผ่าน ORM ของ TRACKED ถูกจับใน before_flush ให้แล้ว
+    """
+    session = session or db.session
+    done = session.info.setdefault("table_versions_bumped", set())
+    names = sorted(set(tables) - done)
+    if not names:
+        return
+    done.update(names)
+    tv = TableVersion.__table__
+    res = session.execute(update(tv).where(tv.c.name.in_(names)).values(version=tv.c.version + 1))
+    if res.rowcount != len(names):   # ยังไม่มีแถว (เช่น DB ที่สร้างด้วย create_all)
+        have = set(session.execute(select(tv.c.name).where(tv.c.name.in_(names))).scalars())
+        missing = [{"name": n, "version": 1} for n in names if n not in have]
+        if missing:
+            session.execute(tv.insert(), missing)
+
+
+@event.listens_for(Session, "before_flush")
+def _bump_on_flush(session, flush_context, instances):
+    tables = {TRACKED[type(o)] for o in session.new | session.deleted if type(o) in TRACKED}
+    tables |= {TRACKED[type(o)] for o in session.dirty
+               if type(o) in TRACKED and session.is_modified(o, include_collections=False)}
+    if tables:
+        bump(*tables, session=session)
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session):
+    bumped = session.info.pop("table_versions_bumped", None)
+    if bumped and has_app_context() and "http_cache" in current_app.extensions:
+        _caches()["versions"].clear()   # worker นี้เห็น version ใหม่ทันที
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session):
+    session.info.pop("table_versions_bumped", None)
+
+
+def current_versions(tables):
+    cache = _caches()["versions"]
+    key = tuple(sorted(tables))
+    versions = cache.get(key)
+    if versions is None:
+        tv = TableVersion.__table__
+        found = dict(db.session.execute(select(tv.c.name, tv.c.version).where(tv.c.name.in_(key))).all())
+        versions = tuple(found.get(t, 0) for t in key)
+        cache.set(key, versions)
+    return versions
+
+
+def conditional_get(*tables):
+    """
+    ETag (strong) จาก version ของ tables + ผู้ใช้/role + path และ query string
+    If-None-Match ตรง → 304 โดยไม่เรียก handler; ไม่ตรงแต่มีใน response cache → ส่ง body เดิม
+    วางไว้ใต้ decorator ตรวจสิทธิ์ เพื่อให้ g.user พร้อมแล้ว
+    """
+    def wrap(fn):
+        @wraps(fn)
+        def inner(*args, **kwargs):
+            if request.method != "GET":
+                return fn(*args, **kwargs)
+
+            user = getattr(g, "user", None) or {}
+            raw = "|".join([client_key(), str(user.get("role", "")), request.full_path,
+                            repr(current_versions(tables))])
+            etag = hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+            if request.if_none_match.contains_weak(etag):   # weak: response ที่บีบอัดได้ W/"..."
+                resp = make_response("", 304)
+            else:
+                cached = _caches()["responses"].get(etag)
+                if cached is not None:
+                    body, mimetype = cached
+                    resp = make_response(body, 200)
+                    resp.mimetype = mimetype
+                else:
+                    resp = make_response(fn(*args, **kwargs))
+                    if resp.status_code != 200:
+                        return resp
+                    body = resp.get_data()
+                    if len(body) <= int(current_app.config.get("HTTP_RESPONSE_CACHE_MAX_BYTES", 256 * 1024)):
+                        _caches()["responses"].set(etag, (body, resp.mimetype))
+
+            resp.set_etag(etag)
+            resp.headers["Cache-Control"] = "private, no-cache"
+            resp.vary.add("Authorization")
+            return resp
+        return inner
+    return wrap
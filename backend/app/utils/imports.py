@@ -0,0 +1,207 @@
+import csv
+import io
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from itertools import islice
+from flask import current_app
+
+_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+FORMATS = {"csv", "ndjson"}
+
+
+def import_dir():
+    d = current_app.config.get("IMPORT_RESULT_DIR") or os.path.join(tempfile.gettempdir(), "timesheet-imports")
+    os.makedirs(d, exist_ok=True)
+    return d
+
+
+def new_import_id():
+    return uuid.uuid4().hex
+
+
+def valid_import_id(import_id):
+    return bool(_ID_RE.match(import_id or ""))
+
+
+def _path(import_id, suffix):
+    return os.path.join(import_dir(), f"{import_id}{suffix}")
+
+
+def errors_path(import_id):
+    return _path(import_id, ".errors.csv")
+
+
+class UploadTooLarge(Exception):
+    """ไฟล์ที่อัปโหลดใหญ่เกิน IMPORT_MAX_BYTES"""
+
+
+def discard(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def spool_upload(src, import_id, max_bytes=None, chunk_size=64 * 1024):
+    """
+    คัดลอก stream ของ request ลงไฟล์ทีละ chunk (ไม่โหลดทั้งไฟล์เข้า memory)
+    เกิน max_bytes → UploadTooLarge; ล้มกลางทาง → ลบไฟล์ที่เขียนไปแล้วทิ้ง
+    """
+    path = _path(import_id, ".upload")
+    size = 0
+    try:
+        with open(path, "wb") as out:
+            while True:
+                chunk = src.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if max_bytes and size > max_bytes:
+                    raise UploadTooLarge(f"upload exceeds {max_bytes} bytes")
+                out.write(chunk)
+    except BaseException:
+        discard(path)
+        raise
+    return path
+
+
+def missing_columns(path, fmt, required):
+    """
+    ตรวจ header ของ CSV ก่อนเริ่ม import — required คือรายการชุดคอลัมน์ที่ใช้แทนกันได้
+    คืน None ถ้าครบสักชุด ไม่งั้นคืนชุดแรกที่ยังขาด (NDJSON ไม่มี header → ตรวจทีละแถวตามปกติ)
+    """
+    if fmt != "csv":
+        return None
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        header = {h.strip() for h in next(csv.reader(f), [])}
+    gaps = [sorted(set(cols) - header) for cols in required]
+    return None if any(not g for g in gaps) else gaps[0]
+
+
+def iter_records(fh, fmt):
+    """
+    อ่านไฟล์ (binary) ทีละบรรทัด → yield (row_no, record)
+    record เป็น dict หรือ ValueError ถ้าบรรทัดนั้น parse ไม่ได้ (ให้ผู้เรียกรายงานเป็น error ของแถว)
+    """
+    text = io.TextIOWrapper(fh, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        for n, rec in enumerate(reader, 1):
+            yield n, rec
+        return
+
+    n = 0
+    for line in text:
+        line = line.strip()
+        if not line:
+            continue
+        n += 1
+        try:
+            rec = json.loads(line)
+        except ValueError:
+            yield n, ValueError("invalid JSON")
+            continue
+        yield n, rec if isinstance(rec, dict) else ValueError("row must be a JSON object")
+
+
+def batched(it, size):
+    it = iter(it)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def write_status(import_id, status):
+    tmp = _path(import_id, ".json.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(status, f)
+    os.replace(tmp, _path(import_id, ".json"))
+
+
+def read_status(import_id):
+    """
+    สถานะของ import — งาน queued/running ที่ไฟล์สถานะไม่ขยับเกิน IMPORT_STALE_SECONDS ถือว่า failed
+    (thread เป็น daemon: worker ถูก recycle กลางงานแล้วจะไม่มีใครเขียนสถานะจบให้)
+    """
+    path = _path(import_id, ".json")
+    try:
+        with open(path, encoding="utf-8") as f:
+            status = json.load(f)
+        idle = time.time() - os.path.getmtime(path)
+    except FileNotFoundError:
+        return None
+    stale_after = float(current_app.config.get("IMPORT_STALE_SECONDS", 900))
+    if status.get("state") in {"queued", "running"} and idle > stale_after:
+        status.update(state="failed", message=f"import stopped without finishing (no progress for {int(idle)}s)",
+                      finished_at=status.get("finished_at") or time.time())
+        write_status(import_id, status)
+        discard(_path(import_id, ".upload"))
+    return status
+
+
+def purge_results(max_age=None):
+    """ลบไฟล์สถานะ/error/upload ที่เก่ากว่า max_age วินาที (default IMPORT_RESULT_TTL) → จำนวนไฟล์ที่ลบ"""
+    max_age = float(current_app.config.get("IMPORT_RESULT_TTL", 7 * 86400) if max_age is None else max_age)
+    cutoff = time.time() - max_age
+    removed = 0
+    with os.scandir(import_dir()) as it:
+        for entry in it:
+            try:
+                if entry.is_file() and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+                    removed += 1
+            except OSError:
+                pass
+    return removed
+
+
+def run_import(import_id, upload_path, fmt, user_id, process_batch, batch_size=1000):
+    """
+    pipeline: ไฟล์ → iter_records → batched → process_batch(batch) -> (saved, [(row_no, error), ...])
+    process_batch ต้อง commit เองทีละ batch; สถานะ/ความคืบหน้าเขียนลงไฟล์ .json หลังแต่ละ batch
+    แถวที่ error สะสมลง .errors.csv ให้ดาวน์โหลดได้
+    """
+    status = {
+        "import_id": import_id, "user_id": user_id, "format": fmt, "state": "running",
+        "processed": 0, "saved": 0, "errors": 0,
+        "started_at": time.time(), "finished_at": None, "message": None,
+    }
+    write_status(import_id, status)
+    try:
+        with open(upload_path, "rb") as fh, open(errors_path(import_id), "w", newline="", encoding="utf-8") as ef:
+            w = csv.writer(ef)
+            w.writerow(["row", "error"])
+            for batch in batched(iter_records(fh, fmt), batch_size):
+                saved, errs = process_batch(batch)
+                w.writerows(sorted(errs))
+                ef.flush()
+                status["processed"] += len(batch)
+                status["saved"] += saved
+                status["errors"] += len(errs)
+                write_status(import_id, status)
+        status["state"] = "done"
+    except Exception as ex:
+        status["state"] = "failed"
+        status["message"] = str(ex)
+    finally:
+        status["finished_at"] = time.time()
+        write_status(import_id, status)
+        discard(upload_path)
+    return status
+
+
+def start_in_background(app, fn, *args):
+    """รัน fn ใน thread แยกพร้อม app context ของตัวเอง (session ของ Flask-SQLAlchemy แยกกันต่อ context)"""
+    def target():
+        with app.app_context():
+            fn(*args)
+    t = threading.Thread(target=target, name="timesheet-import", daemon=True)
+    t.start()
+    return t
@@ -0,0 +1,93 @@
+import os
+import time
+from flask import Response, current_app, g, request
+
+try:
+    from prometheus_client import (CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, REGISTRY,
+                                   generate_latest, multiprocess)
+except ImportError:  # prometheus_client เป็น optional — ไม่มีก็ไม่เก็บ metrics และ /metrics ตอบ 503
+    Counter = Histogram = None
+
+# หลาย gunicorn worker: ตั้ง env PROMETHEUS_MULTIPROC_DIR (โฟลเดอร์ว่างที่ทุก worker เขียนได้) ก่อน start
+# แต่ละ worker เขียนค่าลงไฟล์ของตัวเอง แล้ว /metrics รวมจากทุกไฟล์ — worker ไหนตอบ scrape ก็ได้ผลเดียวกัน
+
+LATENCY_BUCKETS = (.005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30)
+
+if Histogram is not None:
+    REQUEST_LATENCY = Histogram("http_request_duration_seconds", "Request latency",
+                                ["blueprint", "route", "method"], buckets=LATENCY_BUCKETS)
+    REQUESTS = Counter("http_requests_total", "Requests by status", ["blueprint", "route", "method", "status"])
+    POOL_WAIT = Histogram("db_pool_checkout_wait_seconds", "Connection pool checkout wait",
+                          buckets=(.001, .005, .01, .05, .1, .5, 1, 5, 30))
+    HASH_TIME = Histogram("password_hash_seconds", "bcrypt hash/check time (รวมเวลารอคิวใน pool)", ["op"],
+                          buckets=(.05, .1, .25, .5, 1, 2, 5, 10))
+    TIMESHEET_ROWS = Counter("timesheet_rows_total", "Timesheet rows from bulk/import", ["source", "result"])
+
+
+def observe_hash(op, seconds):
+    if Histogram is not None:
+        HASH_TIME.labels(op).observe(seconds)
+
+
+def count_timesheet_rows(source, saved, errors=0):
+    """rate(timesheet_rows_total{result="saved"}) = throughput ของ bulk/import"""
+    if Counter is None:
+        return
+    if saved:
+        TIMESHEET_ROWS.labels(source, "saved").inc(saved)
+    if errors:
+        TIMESHEET_ROWS.labels(source, "error").inc(errors)
+
+
+def mark_worker_dead(pid):
+    """
+    เรียกจาก gunicorn hook child_exit (gunicorn.conf.py) — ลบไฟล์ gauge ของ worker ที่ตายแล้วในโหมด multiprocess
+    ไม่งั้นค่าของ worker เก่าค้างอยู่ใน /metrics ตลอด
+    """
+    if Histogram is not None and os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(pid)
+
+
+def _registry():
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def init_metrics(app):
+    """
+    /metrics (Prometheus text format) + latency/จำนวน request ต่อ route ที่ลงทะเบียน (url rule ไม่ใช่ path จริง)
+    METRICS_TOKEN: ถ้าตั้งไว้ ต้องส่ง Authorization: Bearer <token>
+    """
+    if not app.config.get("METRICS_ENABLED", True):
+        return
+
+    @app.before_request
+    def _start_timer():
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    def _record(resp):
+        started = g.pop("metrics_started", None)
+        if Histogram is None or started is None or request.endpoint == "metrics":
+            return resp
+        rule = request.url_rule.rule if request.url_rule else "unmatched"
+        bp = request.blueprint or ""
+        REQUEST_LATENCY.labels(bp, rule, request.method).observe(time.perf_counter() - started)
+        REQUESTS.labels(bp, rule, request.method, str(resp.status_code)).inc()
+        # เวลารอ connection ที่ worker นี้สะสมไว้ (app/utils/dbpool.py)
+        from app.utils.dbpool import pool_stats
+        for s in pool_stats.drain_wait_samples():
+            POOL_WAIT.observe(s)
+        return resp
+
+    @app.get("/metrics", endpoint="metrics")
+    def metrics():
+        token = current_app.config.get("METRICS_TOKEN")
+        if token and request.headers.get("Authorization") != f"Bearer {token}":
+            return Response("unauthorized\n", 401, mimetype="text/plain")
+        if Histogram is None:
+            return Response("prometheus_client is not installed\n", 503, mimetype="text/plain")
+        return Response(generate_latest(_registry()), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,104 @@
+import base64
+import json
+from sqlalchemy import and_, or_, false, func, literal, DateTime
+
+
+def encode_cursor(values):
+    """แปลงค่าคีย์ของแถวสุดท้าย (date/time/int/...) เป็น token แบบ opaque"""
+    raw = [v.isoformat() if hasattr(v, "isoformat") else v for v in values]
+    data = json.dumps(raw, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token, parsers):
+    """
+    ถอด token กลับเป็น list ของค่า โดยใช้ parsers ตามลำดับคอลัมน์
+    (เช่น date.fromisoformat, time.fromisoformat, int) — ค่า None ผ่านได้เลย
+    raise ValueError ถ้า token ไม่ถูกต้อง
+    """
+    try:
+        pad = "=" * (-len(token) % 4)
+        raw = json.loads(base64.urlsafe_b64decode(token + pad))
+    except Exception:
+        raise ValueError("invalid cursor")
+    if not isinstance(raw, list) or len(raw) != len(parsers):
+        raise ValueError("invalid cursor")
+    try:
+        return [None if v is None else p(v) for p, v in zip(parsers, raw)]
+    except (TypeError, ValueError):
+        raise ValueError("invalid cursor")
+
+
+SQLITE_DATETIME_FMT = "%Y-%m-%d %H:%M:%f"
+
+
+def keyset_key(col, is_desc, dialect_name):
+    """
+    คืน key สำหรับ keyset_order/keyset_after: (expr, is_desc) หรือ (expr, is_desc, แปลงค่า cursor)
+    SQLite เก็บ DateTime จาก server_default เป็น 'YYYY-MM-DD HH:MM:SS' แต่ bind ค่า datetime เป็น
+    '...HH:MM:SS.000000' — เทียบแบบ string แล้วไม่มีวันเลยแถวเดิม จึงแปลงด้วย strftime ทั้งสองฝั่ง
+    """
+    if dialect_name == "sqlite" and isinstance(col.type, DateTime):
+        return (func.strftime(SQLITE_DATETIME_FMT, col), is_desc,
+                lambda v: func.strftime(SQLITE_DATETIME_FMT, literal(v, col.type)))
+    return (col, is_desc)
+
+
+def keyset_order(keys):
+    """
+    keys = [(column, is_desc), ...] (หรือจาก keyset_key)
+    ล็อกตำแหน่ง NULL ให้ตรงกับ PostgreSQL (ASC → NULLS LAST, DESC → NULLS FIRST)
+    เพื่อให้ keyset_after ใช้ได้ทั้ง PostgreSQL และ SQLite
+    """
+    return [k[0].desc().nulls_first() if k[1] else k[0].asc().nulls_last() for k in keys]
+
+
+def _value(key, v):
+    return key[2](v) if len(key) > 2 and v is not None else v
+
+
+def _eq(col, v):
+    return col.is_(None) if v is None else col == v
+
+
+def _after(col, is_desc, v):
+    if is_desc:
+        return col.is_not(None) if v is None else col < v
+    # ASC: NULL อยู่ท้ายสุด
+    return None if v is None else or_(col > v, col.is_(None))
+
+
+def keyset_after(keys, values):
+    """
+    เงื่อนไข WHERE สำหรับแถวที่อยู่ "หลัง" values ตามลำดับ keyset_order(keys)
+    รองรับทิศทางผสม (เช่น work_date DESC, start_time ASC, id DESC)
+    """
+    clauses = []
+    for i, key in enumerate(keys):
+        after = _after(key[0], key[1], _value(key, values[i]))
+        if after is None:
+            continue
+        prefix = [_eq(k[0], _value(k, values[j])) for j, k in enumerate(keys[:i])]
+        clauses.append(and_(*prefix, after))
+    return or_(*clauses) if clauses else false()
+
+
+def parse_bool(s, default=False):
+    if s is None or s == "":
+        return default
+    return str(s).strip().lower() in {"1", "true", "yes", "on"}
+
+
+def parse_fields(s, allowed, always=("id",)):
+    """
+    ?fields=a,b,c → list ของ key ตามลำดับใน allowed (None = ไม่ได้ส่งมา → ทุก field)
+    raise ValueError ถ้ามี field ที่ไม่รู้จัก
+    """
+    if s is None or not s.strip():
+        return None
+    wanted = {f.strip() for f in s.split(",") if f.strip()}
+    unknown = wanted - set(allowed)
+    if unknown:
+        raise ValueError(", ".join(sorted(unknown)))
+    wanted.update(always)
+    return [k for k in allowed if k in wanted]
@@ -0,0 +1,140 @@
+import gzip
+import os
+import re
+from datetime import date
+from app import db
+from app.utils.exports import csv_chunks
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # parquet เป็น optional — ไม่มีก็ใช้ csv.gz
+    pa = pq = None
+
+PARENT = "timesheets"
+ARCHIVE_SCHEMA = "timesheets_archive"
+COLUMNS = ["id", "user_id", "task_id", "work_date", "start_time", "end_time", "hours", "notes", "created_at"]
+_NAME_RE = re.compile(r"^timesheets_y(\d{4})m(\d{2})$")
+
+
+def month_start(d: date) -> date:
+    return d.replace(day=1)
+
+
+def add_months(d: date, n: int) -> date:
+    y, m = divmod(d.year * 12 + d.month - 1 + n, 12)
+    return date(y, m + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT}_y{month.year:04d}m{month.month:02d}"
+
+
+def is_partitioned(session=None):
+    session = session or db.session
+    if session.get_bind().dialect.name != "postgresql":
+        return False
+    return bool(session.execute(db.text(
+        "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = :t AND c.relnamespace = 'public'::regnamespace"), {"t": PARENT}).scalar())
+
+
+def list_partitions(session=None):
+    """[(ชื่อ partition, เดือนเริ่ม)] เรียงตามเดือน — ไม่รวม default partition"""
+    session = session or db.session
+    names = session.execute(db.text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = 'public.timesheets'::regclass")).scalars()
+    out = []
+    for n in names:
+        m = _NAME_RE.match(n)
+        if m:
+            out.append((n, date(int(m.group(1)), int(m.group(2)), 1)))
+    return sorted(out, key=lambda p: p[1])
+
+
+def ensure_partitions(months_ahead=3, start=None, session=None):
+    """
+    สร้าง partition รายเดือนตั้งแต่ start (default เดือนนี้) ไปอีก months_ahead เดือนถ้ายังไม่มี (ไม่ commit)
+    แถวที่ตกช่วงไม่มี partition ไปอยู่ใน timesheets_default — ถ้า default มีแถวของเดือนนั้นอยู่แล้ว
+    จะย้ายออกมาก่อน (PostgreSQL ไม่ยอมสร้าง partition ที่ชนกับแถวใน default)
+    """
+    session = session or db.session
+    first = month_start(start or date.today())
+    created = []
+    for i in range(months_ahead + 1):
+        lo = add_months(first, i); hi = add_months(lo, 1); name = partition_name(lo)
+        exists = session.execute(db.text("SELECT to_regclass(:n)"), {"n": f"public.{name}"}).scalar()
+        if exists:
+            continue
+        params = {"lo": lo, "hi": hi}
+        session.execute(db.text(f"CREATE TABLE {name} (LIKE {PARENT} INCLUDING DEFAULTS)"))
+        session.execute(db.text(
+            f"WITH moved AS (DELETE FROM {PARENT}_default WHERE work_date >= :lo AND work_date < :hi RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved"), params)
+        session.execute(db.text(
+            f"ALTER TABLE {PARENT} ATTACH PARTITION {name} FOR VALUES FROM ('{lo}') TO ('{hi}')"))
+        created.append(name)
+    return created
+
+
+def _write_file(name, rows, out_dir, fmt, batch_size=50000):
+    """เขียน rows (iterator) เป็น csv.gz หรือ parquet ทีละ batch — ไม่โหลดทั้ง partition เข้า memory"""
+    os.makedirs(out_dir, exist_ok=True)
+    if fmt == "parquet":
+        if pq is None:
+            raise RuntimeError("parquet archive requires pyarrow")
+        path = os.path.join(out_dir, f"{name}.parquet")
+        writer = None
+        for batch in _batches(rows, batch_size):
+            table = pa.table({c: list(v) for c, v in zip(COLUMNS, zip(*batch))})
+            writer = writer or pq.ParquetWriter(path, table.schema, compression="zstd")
+            writer.write_table(table)
+        if writer is not None:
+            writer.close()
+        return path
+    path = os.path.join(out_dir, f"{name}.csv.gz")
+    with gzip.open(path, "wt", newline="", encoding="utf-8") as f:
+        for chunk in csv_chunks(COLUMNS, rows):
+            f.write(chunk)
+    return path
+
+
+def _batches(rows, n):
+    batch = []
+    for r in rows:
+        batch.append(r)
+        if len(batch) >= n:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def archive_partitions(before: date, target="schema", out_dir="archive", fmt="csv", session=None):
+    """
+    detach partition ที่ปิดงวดแล้ว (เดือนที่จบก่อน before) ออกจาก timesheets แล้ว
+    - target="schema": ย้ายไป schema timesheets_archive (ยัง query ได้โดยตรง, ไม่อยู่ใน plan ของ timesheets)
+    - target="file": เขียนเป็น csv.gz / parquet ใน out_dir แล้ว drop ตาราง
+    ยอดใน timesheet_daily_rollups ของเดือนที่ archive ยังอยู่ — รายงานสรุปไม่เปลี่ยน
+    commit ทีละ partition; คืน list ของ (partition, ปลายทาง)
+    """
+    session = session or db.session
+    cutoff = month_start(before)
+    done = []
+    for name, month in list_partitions(session):
+        if add_months(month, 1) > cutoff:
+            continue
+        session.execute(db.text(f"ALTER TABLE {PARENT} DETACH PARTITION {name}"))
+        if target == "file":
+            rows = session.execute(db.text(f"SELECT {', '.join(COLUMNS)} FROM {name} ORDER BY id"),
+                                   execution_options={"stream_results": True, "yield_per": 5000})
+            dest = _write_file(name, rows, out_dir, fmt)
+            session.execute(db.text(f"DROP TABLE {name}"))
+        else:
+            session.execute(db.text(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}"))
+            session.execute(db.text(f"ALTER TABLE {name} SET SCHEMA {ARCHIVE_SCHEMA}"))
+            dest = f"{ARCHIVE_SCHEMA}.{name}"
+        session.commit()
+        done.append((name, dest))
+    return done
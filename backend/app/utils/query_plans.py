@@ -0,0 +1,105 @@
+import json
+from flask import current_app
+from sqlalchemy import event, select
+from app import db
+from app.models import Task, Timesheet, User
+
+# ตารางใหญ่ที่ห้าม Seq Scan ใน hot path (partition ของ timesheets ขึ้นต้นด้วย timesheets_)
+WATCHED = ("tasks", "timesheets", "timesheet_daily_rollups")
+
+# endpoint จริงที่ตรวจ — SQL ที่ตรวจคือ statement ที่ endpoint ส่งจริง (จับจาก engine event) ไม่ใช่ SQL ที่เขียนลอกไว้
+# {user_id} {task_id} {day} {term} เติมจาก sample_params()
+# (คำค้นสั้นกว่า MIN_TRGM_TERM ไม่อยู่ในรายการ — substring บน title/task_code ใช้ index ไม่ได้โดยตั้งใจ)
+HOT_REQUESTS = {
+    "get_timesheets (user)": "/api/timesheet/?cursor=&user_id={user_id}",
+    "get_timesheets (user + task)": "/api/timesheet/?cursor=&user_id={user_id}&task_id={task_id}",
+    "get_timesheets (user + date range)": "/api/timesheet/?cursor=&user_id={user_id}&from={day}&to={day}",
+    "list_tasks (status)": "/api/tasks/?cursor=&status=Open",
+    "list_tasks (priority)": "/api/tasks/?cursor=&priority=High",
+    "list_tasks (assignee)": "/api/tasks/?cursor=&assignee_id={user_id}",
+    "list_tasks (search)": "/api/tasks/?search={term}&cursor=",
+    "dashboard analytics": "/api/dashboard/analytics?user_id={user_id}&from={day}&to={day}",
+}
+
+
+def fk_check_statements(params):
+    """query ที่ PostgreSQL ใช้ตรวจ FK ตอนลบ task/user (สร้างจาก ORM แล้ว compile)"""
+    return {
+        "delete task (FK check)": select(Timesheet.id).where(Timesheet.task_id == params["task_id"]).limit(1),
+        "delete user (FK check)": select(Timesheet.id).where(Timesheet.user_id == params["user_id"]).limit(1),
+    }
+
+
+def sample_params():
+    """ค่าพารามิเตอร์จากข้อมูลจริง (แถวแรกของ timesheets ที่ผูก task) — None ถ้าไม่มีข้อมูล"""
+    row = db.session.execute(
+        select(Timesheet.user_id, Timesheet.task_id, Timesheet.work_date, Task.title)
+        .join(Task, Task.id == Timesheet.task_id).limit(1)
+    ).first()
+    if row is None:
+        return None
+    return {"user_id": row.user_id, "task_id": row.task_id, "day": row.work_date.isoformat(),
+            "term": row.title}
+
+
+def capture_statements(client, path, headers):
+    """เรียก endpoint ผ่าน test client แล้วคืน [(statement, parameters)] ของ SELECT ที่ส่งไป DB"""
+    captured = []
+
+    def _grab(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            captured.append((statement, parameters))
+
+    engine = db.engine
+    event.listen(engine, "before_cursor_execute", _grab)
+    try:
+        resp = client.get(path, headers=headers)
+    finally:
+        event.remove(engine, "before_cursor_execute", _grab)
+    if resp.status_code >= 400:
+        raise AssertionError(f"{path} → {resp.status_code}: {resp.get_data(as_text=True)[:200]}")
+    return captured
+
+
+def _plan_nodes(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from _plan_nodes(child)
+
+
+def _watched(relation):
+    return relation is not None and (relation in WATCHED or relation.startswith("timesheets_"))
+
+
+def seq_scans(statement, parameters=None):
+    """EXPLAIN (FORMAT JSON) บน PostgreSQL → ตารางใน WATCHED ที่ถูก Seq Scan (ว่าง = ใช้ index)"""
+    if not isinstance(statement, str):
+        statement = str(statement.compile(dialect=db.engine.dialect, compile_kwargs={"literal_binds": True}))
+    with db.engine.connect() as conn:
+        raw = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters or {}).scalar()
+    plan = (json.loads(raw) if isinstance(raw, str) else raw)[0]["Plan"]
+    return sorted({n.get("Relation Name") for n in _plan_nodes(plan)
+                   if n["Node Type"] == "Seq Scan" and _watched(n.get("Relation Name"))})
+
+
+def admin_headers():
+    from app.routes.auth import _access_token
+    admin = User.query.filter_by(role="Admin").first()
+    if admin is None:
+        raise RuntimeError("no Admin user — run `flask seed-admin` first")
+    return {"Authorization": f"Bearer {_access_token(admin)}"}
+
+
+def check_hot_queries(params):
+    """{ชื่อ: [ตารางที่ Seq Scan]} ของทุก hot query (ว่างทุกตัว = ผ่าน)"""
+    client = current_app.test_client()
+    headers = admin_headers()
+    result = {}
+    for name, path in HOT_REQUESTS.items():
+        scans = set()
+        for statement, parameters in capture_statements(client, path.format(**params), headers):
+            scans.update(seq_scans(statement, parameters))
+        result[name] = sorted(scans)
+    for name, stmt in fk_check_statements(params).items():
+        result[name] = seq_scans(stmt)
+    return result
@@ -0,0 +1,108 @@
+import json
+import logging
+import time
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+log = logging.getLogger("app.sql")
+
+
+class QueryBudgetExceeded(Exception):
+    """endpoint ใช้ SQL เกิน budget (เปิด QUERY_BUDGET_STRICT ตอนทดสอบเพื่อจับ N+1)"""
+
+
+class RequestQueryStats:
+    __slots__ = ("count", "seconds", "slow", "started")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.slow = []
+        self.started = time.perf_counter()
+
+
+def _stats():
+    return g.get("query_stats") if has_request_context() else None
+
+
+# ฟังที่ class Engine → ครอบทั้ง primary และ replica engine
+@event.listens_for(Engine, "before_cursor_execute")
+def _before(conn, cursor, statement, parameters, context, executemany):
+    if _stats() is not None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after(conn, cursor, statement, parameters, context, executemany):
+    stats = _stats()
+    starts = conn.info.get("query_start")
+    if stats is None or not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    stats.count += 1
+    stats.seconds += elapsed
+    if elapsed * 1000 >= current_app.config.get("SLOW_QUERY_MS", 200):
+        stats.slow.append((elapsed, statement))
+
+
+@event.listens_for(Engine, "handle_error")
+def _on_error(ctx):
+    # statement ล้ม → after_cursor_execute ไม่ถูกเรียก; ทิ้งเวลาเริ่มไว้จะทำให้ query ถัดไปบน connection นี้จับเวลาผิด
+    starts = ctx.connection.info.get("query_start") if ctx.connection is not None else None
+    if starts:
+        starts.pop()
+
+
+def query_budget(n):
+    """จำนวน SQL สูงสุดของ endpoint นี้ (แทน QUERY_BUDGET ของทั้ง app)"""
+    def wrap(fn):
+        fn.query_budget = n   # decorator อื่นที่ใช้ functools.wraps คัดลอก attribute นี้ต่อให้
+        return fn
+    return wrap
+
+
+def _budget():
+    view = current_app.view_functions.get(request.endpoint) if request.endpoint else None
+    n = getattr(view, "query_budget", None)
+    return n if n is not None else int(current_app.config.get("QUERY_BUDGET", 0))
+
+
+def init_query_stats(app):
+    """
+    นับ SQL ต่อ request + เวลา DB รวม → header Server-Timing (db;dur=..) และ log JSON ของ logger "app.sql"
+    statement ที่ช้ากว่า SLOW_QUERY_MS ถูก log แยก; เกิน budget (QUERY_BUDGET หรือ @query_budget) → log
+    warning หรือ raise QueryBudgetExceeded ถ้า QUERY_BUDGET_STRICT (ใช้ใน test)
+    """
+    cfg = app.config
+    if not cfg.get("QUERY_STATS_ENABLED", True):
+        return
+
+    @app.before_request
+    def _start():
+        g.query_stats = RequestQueryStats()
+
+    @app.after_request
+    def _finish(resp):
+        stats = g.pop("query_stats", None)
+        if stats is None:
+            return resp
+        total_ms = (time.perf_counter() - stats.started) * 1000
+        db_ms = stats.seconds * 1000
+        resp.headers.add("Server-Timing", f'db;dur={db_ms:.1f};desc="{stats.count} queries"')
+        resp.headers.add("Server-Timing", f"app;dur={total_ms:.1f}")
+
+        record = {"method": request.method, "endpoint": request.endpoint, "status": resp.status_code,
+                  "queries": stats.count, "db_ms": round(db_ms, 1), "total_ms": round(total_ms, 1)}
+        log.info(json.dumps(record))
+        for elapsed, statement in stats.slow:
+            log.warning(json.dumps({"slow_query_ms": round(elapsed * 1000, 1),
+                                    "endpoint": request.endpoint, "statement": statement}))
+
+        budget = _budget()
+        if budget and stats.count > budget:
+            msg = f"{request.endpoint}: {stats.count} queries > budget {budget}"
+            if cfg.get("QUERY_BUDGET_STRICT"):
+                raise QueryBudgetExceeded(msg)
+            log.warning(json.dumps({"query_budget_exceeded": msg}))
+        return resp
@@ -0,0 +1,131 @@
+import threading
+import time
+from collections import deque
+from flask import current_app
+from app.utils.cache import TTLCache
+
+
+class LocalBackend:
+    """
+    sliding-window log ในหน่วยความจำของ worker — ใช้เป็นค่า default และตอนทดสอบ
+    backend อื่น (เช่น Redis) ต้องมีเมธอด hit(key, window, now) -> จำนวนครั้งใน window รวมครั้งนี้,
+    count(key, window, now) -> จำนวนครั้งใน window (ไม่นับเพิ่ม) และ reset(key)
+    """
+
+    def __init__(self, max_keys=100_000):
+        self.max_keys = max_keys
+        self._hits = {}
+        self._lock = threading.Lock()
+
+    def hit(self, key, window, now):
+        with self._lock:
+            q = self._hits.get(key)
+            if q is None:
+                if len(self._hits) >= self.max_keys:
+                    self._evict(now, window)
+                q = self._hits[key] = deque()
+            while q and q[0] <= now - window:
+                q.popleft()
+            q.append(now)
+            return len(q)
+
+    def count(self, key, window, now):
+        with self._lock:
+            q = self._hits.get(key)
+            return sum(1 for t in q if t > now - window) if q else 0
+
+    def reset(self, key):
+        with self._lock:
+            self._hits.pop(key, None)
+
+    def _evict(self, now, window):
+        for k in [k for k, q in self._hits.items() if not q or q[-1] <= now - window]:
+            del self._hits[k]
+        if len(self._hits) >= self.max_keys:   # ยังเต็ม: ทิ้งครึ่งที่เก่าสุด
+            for k in sorted(self._hits, key=lambda k: self._hits[k][-1])[: self.max_keys // 2]:
+                del self._hits[k]
+
+
+class SlidingWindowLimiter:
+    def __init__(self, backend, limit, window):
+        self.backend, self.limit, self.window = backend, limit, window
+
+    def hit(self, key):
+        """นับครั้งนี้ → True ถ้ายังไม่เกิน limit"""
+        if self.limit <= 0:
+            return True
+        return self.backend.hit(key, self.window, time.monotonic()) <= self.limit
+
+    def allowed(self, key):
+        """ยังไม่ถึง limit (ไม่นับเพิ่ม)"""
+        if self.limit <= 0:
+            return True
+        return self.backend.count(key, self.window, time.monotonic()) < self.limit
+
+    def reset(self, key):
+        self.backend.reset(key)
+
+
+def _state():
+    st = current_app.extensions.get("login_guard")
+    if st is None:
+        cfg = current_app.config
+        backend = cfg.get("LOGIN_RATE_LIMIT_BACKEND") or LocalBackend()
+        window = float(cfg.get("LOGIN_RATE_LIMIT_WINDOW", 300))
+        st = current_app.extensions["login_guard"] = {
+            "email": SlidingWindowLimiter(backend, int(cfg.get("LOGIN_RATE_LIMIT_PER_EMAIL", 10)), window),
+            "ip": SlidingWindowLimiter(backend, int(cfg.get("LOGIN_RATE_LIMIT_PER_IP", 50)), window),
+            "unknown": TTLCache(int(cfg.get("LOGIN_UNKNOWN_CACHE_SIZE", 10_000)),
+                                float(cfg.get("LOGIN_UNKNOWN_CACHE_TTL", 60))),
+        }
+    return st
+
+
+def login_allowed(email, ip):
+    """
+    login ที่ล้มเหลวต่อ email และต่อ IP ยังไม่ถึง limit — ไม่นับครั้งนี้ (นับเฉพาะที่ล้มเหลวใน login_failed)
+    login สำเร็จไม่กิน quota ของ IP: ผู้ใช้หลายคนหลัง NAT/proxy เดียวกันไม่โดน 429 เพราะกันเอง
+    """
+    st = _state()
+    return st["ip"].allowed(f"ip:{ip}") and st["email"].allowed(f"email:{email}")
+
+
+def login_failed(email, ip):
+    st = _state()
+    st["ip"].hit(f"ip:{ip}")
+    st["email"].hit(f"email:{email}")
+
+
+def login_succeeded(email):
+    _state()["email"].reset(f"email:{email}")
+
+
+def _users_version():
+    # version ของตาราง users (table_versions) — ทุก worker เห็นการเขียนภายใน HTTP_VERSION_CACHE_TTL
+    from app.utils.httpcache import current_versions
+    return current_versions(("users",))
+
+
+def is_known_unknown(email):
+    """
+    email นี้เพิ่งถูกค้นแล้วไม่พบ (negative cache) — ตอบ 401 ได้ทันทีโดยไม่แตะ DB/bcrypt
+    cache เป็นของแต่ละ worker จึงเก็บ version ของตาราง users ไว้ด้วย: มีการเขียน users หลังจากนั้น
+    (เช่นสร้างผู้ใช้ใน worker อื่น) → ไม่เชื่อ cache แล้วค้น DB ใหม่
+    """
+    cache = _state()["unknown"]
+    seen = cache.get(email)
+    if seen is None:
+        return False
+    if seen != _users_version():
+        cache.pop(email)
+        return False
+    return True
+
+
+def remember_unknown(email):
+    _state()["unknown"].set(email, _users_version())
+
+
+def forget_unknown(email):
+    """เรียกเมื่อมีการสร้างผู้ใช้ใหม่ด้วย email นี้ (มีผลทันทีใน worker นี้ — worker อื่นดู is_known_unknown)"""
+    _state()["unknown"].pop((email or "").strip().lower())
@@ -0,0 +1,146 @@
+import datetime
+import uuid
+import jwt
+from flask import current_app, has_app_context
+from sqlalchemy import event, update, delete, or_
+from sqlalchemy.orm import Session
+from app import db
+from app.models import RefreshToken
+from app.utils.cache import TTLCache
+
+
+class RefreshError(Exception):
+    pass
+
+
+def _utcnow():
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+
+
+def refresh_ttl_seconds():
+    return int(current_app.config.get("JWT_REFRESH_TTL", 14 * 24 * 60 * 60))
+
+
+def _revoked_cache():
+    """jti → "rotated" (ใช้ไปแล้ว) / "revoked" — ตอบปฏิเสธได้โดยไม่ต้องถาม DB (ต่อ worker)"""
+    cache = current_app.extensions.get("revoked_refresh_jtis")
+    if cache is None:
+        cache = current_app.extensions["revoked_refresh_jtis"] = TTLCache(
+            int(current_app.config.get("REVOKED_JTI_CACHE_SIZE", 50_000)), refresh_ttl_seconds())
+    return cache
+
+
+def _mark(jti, state):
+    """จด jti ไว้ใส่ cache หลัง commit — ถ้า transaction rollback แถวใน DB ยังใช้ได้ cache ต้องไม่บอกว่าใช้แล้ว"""
+    db.session.info.setdefault("refresh_jtis", {})[jti] = state
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session):
+    marked = session.info.pop("refresh_jtis", None)
+    if marked and has_app_context():
+        cache = _revoked_cache()
+        for jti, state in marked.items():
+            cache.set(jti, state)
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session):
+    session.info.pop("refresh_jtis", None)
+
+
+def issue(user_id, issuer):
+    """สร้าง refresh token ใหม่ (บันทึก jti ลงตาราง — ไม่ commit)"""
+    now = _utcnow()
+    exp = now + datetime.timedelta(seconds=refresh_ttl_seconds())
+    jti = uuid.uuid4().hex
+    db.session.add(RefreshToken(jti=jti, user_id=user_id, expires_at=exp))
+    payload = {
+        "id": user_id, "jti": jti, "typ": "refresh", "iss": issuer,
+        "iat": int(now.replace(tzinfo=datetime.timezone.utc).timestamp()),
+        "exp": int(exp.replace(tzinfo=datetime.timezone.utc).timestamp()),
+    }
+    return jwt.encode(payload, current_app.config["SECRET_KEY"], algorithm="HS256")
+
+
+def _decode(token, issuer):
+    try:
+        payload = jwt.decode(token, current_app.config["SECRET_KEY"], algorithms=["HS256"],
+                             options={"require": ["exp", "jti"]}, issuer=issuer)
+    except jwt.ExpiredSignatureError:
+        raise RefreshError("Refresh token expired")
+    except jwt.InvalidTokenError:
+        raise RefreshError("Invalid refresh token")
+    if payload.get("typ") != "refresh":
+        raise RefreshError("Invalid refresh token")
+    return payload
+
+
+def rotate(token, issuer):
+    """
+    ใช้ refresh token (ครั้งเดียว) → คืน user_id แล้วผู้เรียกออก token คู่ใหม่ (ไม่ commit)
+    ถ้า token ถูกใช้ไปแล้ว/ถูก revoke = อาจถูกขโมย → revoke ทุก token ของผู้ใช้นั้น
+    """
+    payload = _decode(token, issuer)
+    jti, user_id = payload["jti"], payload["id"]
+    state = _revoked_cache().get(jti)
+    if state == "revoked":   # ถูก revoke แล้ว (logout/ปิดบัญชี) — ปฏิเสธได้เลยไม่ต้องถาม DB
+        raise RefreshError("Refresh token revoked")
+    if state == "rotated":   # token ที่ใช้ไปแล้วถูกนำมาใช้ซ้ำ
+        revoke_all(user_id)
+        db.session.commit()
+        raise RefreshError("Refresh token revoked")
+
+    res = db.session.execute(
+        update(RefreshToken)
+        .where(RefreshToken.jti == jti, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=_utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    _mark(jti, "rotated")
+    if res.rowcount != 1:
+        revoke_all(user_id)
+        db.session.commit()
+        raise RefreshError("Refresh token revoked")
+    return user_id
+
+
+def revoke(token, issuer):
+    payload = _decode(token, issuer)
+    db.session.execute(
+        update(RefreshToken)
+        .where(RefreshToken.jti == payload["jti"], RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=_utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    _mark(payload["jti"], "revoked")
+
+
+def revoke_all(user_id):
+    """revoke refresh token ทั้งหมดของผู้ใช้ (logout ทุกเครื่อง / ปิดบัญชี / เปลี่ยนรหัสผ่าน) — ไม่ commit"""
+    jtis = [j for (j,) in db.session.query(RefreshToken.jti)
+            .filter(RefreshToken.user_id == user_id, RefreshToken.revoked_at.is_(None))]
+    if not jtis:
+        return 0
+    db.session.execute(
+        update(RefreshToken)
+        .where(RefreshToken.jti.in_(jtis))
+        .values(revoked_at=_utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    for j in jtis:
+        _mark(j, "revoked")
+    return len(jtis)
+
+
+def purge_expired(revoked_grace_seconds=24 * 60 * 60):
+    """ลบแถวที่หมดอายุแล้ว หรือถูก revoke นานเกิน grace (เก็บไว้สักพักเพื่อจับการ reuse)"""
+    now = _utcnow()
+    res = db.session.execute(
+        delete(RefreshToken).where(or_(
+            RefreshToken.expires_at < now,
+            RefreshToken.revoked_at < now - datetime.timedelta(seconds=revoked_grace_seconds),
+        ))
+    )
+    db.session.commit()
+    return res.rowcount
@@ -0,0 +1,122 @@
+import itertools
+import threading
+import time
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event
+from sqlalchemy.sql import Select
+from app.utils.cache import TTLCache
+
+READ_METHODS = {"GET", "HEAD"}
+
+
+class ReplicaSet:
+    """
+    engine ของ read replica (ต่อ worker) + เลือกแบบ round-robin ข้ามตัวที่เพิ่ง error
+    replica ที่ connect ไม่ได้/หลุดจะถูกพักไว้ retry_after วินาที แล้วค่อยลองใหม่
+    """
+
+    def __init__(self, urls, engine_options=None, retry_after=30.0):
+        self.engines = [create_engine(u, **(engine_options(u) if engine_options else {})) for u in urls]
+        self.retry_after = retry_after
+        self._down_until = {}
+        self._rr = itertools.count()
+        self._lock = threading.Lock()
+        for e in self.engines:
+            event.listen(e, "handle_error", self._on_error)
+
+    def _on_error(self, ctx):
+        if ctx.is_disconnect or ctx.connection is None:   # หลุด หรือ connect ไม่ได้
+            self.mark_down(ctx.engine)
+
+    def mark_down(self, engine):
+        with self._lock:
+            self._down_until[engine] = time.monotonic() + self.retry_after
+
+    def pick(self):
+        """replica ตัวถัดไปที่ยังไม่ถูกพัก — None ถ้าไม่มี (ใช้ primary แทน)"""
+        if not self.engines:
+            return None
+        now = time.monotonic()
+        start = next(self._rr)
+        for i in range(len(self.engines)):
+            e = self.engines[(start + i) % len(self.engines)]
+            if self._down_until.get(e, 0) <= now:
+                return e
+        return None
+
+    def status(self):
+        now = time.monotonic()
+        return [
+            {"url": e.url.render_as_string(hide_password=True),
+             "up": self._down_until.get(e, 0) <= now}
+            for e in self.engines
+        ]
+
+
+def init_replicas(app):
+    from app.config import engine_options
+    cfg = app.config
+    app.extensions["replicas"] = ReplicaSet(
+        cfg.get("SQLALCHEMY_REPLICA_URIS") or [],
+        engine_options=engine_options,
+        retry_after=float(cfg.get("REPLICA_RETRY_AFTER", 30)),
+    )
+    sticky = TTLCache(int(cfg.get("REPLICA_STICKY_SIZE", 10_000)), float(cfg.get("REPLICA_STICKY_SECONDS", 5)))
+    app.extensions["replica_sticky"] = sticky
+
+    @app.after_request
+    def _stick_after_write(resp):
+        # read-your-writes: หลังเขียนสำเร็จ client เดิมอ่านจาก primary ต่ออีก REPLICA_STICKY_SECONDS
+        if request.method not in READ_METHODS and request.method != "OPTIONS" and resp.status_code < 400:
+            sticky.set(client_key(), True)
+        return resp
+
+
+def client_key():
+    """ผู้ใช้จาก token (route ที่ไม่ได้ผ่าน authenticate ก็ยังได้) — ไม่มี token ใช้ IP แทน"""
+    user = getattr(g, "user", None)
+    if not user:
+        from app.utils.authz import verify_token
+        auth = request.headers.get("Authorization", "")
+        if auth.startswith("Bearer "):
+            try:
+                user = verify_token(auth.split(" ", 1)[1].strip())
+            except Exception:
+                user = None
+    return f"u:{user.get('id')}" if user else f"ip:{request.remote_addr}"
+
+
+def _wants_primary():
+    if request.method not in READ_METHODS:
+        return True
+    if request.headers.get("X-Consistency", "").lower() == "strong":
+        return True
+    return current_app.extensions["replica_sticky"].get(client_key()) is not None
+
+
+def replica_for_request():
+    """engine replica ที่ request นี้ใช้อ่าน (เลือกครั้งเดียวต่อ request) หรือ None = primary"""
+    if not has_request_context() or "replicas" not in current_app.extensions:
+        return None
+    if _wants_primary():
+        return None
+    engine = getattr(request, "_db_replica", False)
+    if engine is False:
+        engine = request._db_replica = current_app.extensions["replicas"].pick()
+    return engine
+
+
+class RoutingSession(Session):
+    """
+    session ของ db: SELECT ธรรมดาใน GET/HEAD ไป replica, ที่เหลือ (flush, UPDATE/DELETE,
+    SELECT ... FOR UPDATE, CLI/background thread) ไป primary ตามเดิม
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and isinstance(clause, Select)
+                and clause._for_update_arg is None):
+            engine = replica_for_request()
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
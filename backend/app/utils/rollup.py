@@ -0,0 +1,102 @@
+from collections import defaultdict
+from datetime import date
+from sqlalchemy import delete, func, select, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from app import db
+from app.models import Timesheet, TimesheetRollup
+
+
+def rollup_date(work_date, created_at=None):
+    """วันที่ใช้ใน rollup — แถวเก่าที่ไม่มี work_date ใช้วันที่สร้างแทน (ตรงกับ rebuild_rollups)"""
+    if work_date: return work_date
+    return created_at.date() if created_at else date.today()
+
+
+class RollupDeltas:
+    """สะสมการเปลี่ยนแปลงชั่วโมงต่อ key แล้ว apply() ครั้งเดียวก่อน commit"""
+
+    def __init__(self):
+        self._d = defaultdict(lambda: [0.0, 0])
+
+    def add(self, user_id, task_id, work_date, hours, sign=1, created_at=None):
+        key = (int(user_id), int(task_id or 0), rollup_date(work_date, created_at))
+        self._d[key][0] += sign * float(hours or 0)
+        self._d[key][1] += sign
+
+    def add_timesheet(self, ts, sign=1):
+        self.add(ts.user_id, ts.task_id, ts.work_date, ts.hours, sign, getattr(ts, "created_at", None))
+
+    def add_row(self, row, sign=1):
+        self.add(row["user_id"], row.get("task_id"), row.get("work_date"), row["hours"], sign)
+
+    def apply(self):
+        """upsert (hours += delta, entries += delta) ภายใน transaction ปัจจุบัน — ไม่ commit"""
+        items = [(k, v) for k, v in self._d.items() if v[1] != 0 or abs(v[0]) > 1e-9]
+        self._d.clear()
+        if not items: return
+        rows = [{
+            "user_id": u, "task_id": t, "work_date": d,
+            "iso_year": d.isocalendar()[0], "iso_week": d.isocalendar()[1],
+            "hours": h, "entries": n,
+        } for (u, t, d), (h, n) in items]
+        _upsert(rows)
+        # ลบแถวที่ไม่เหลือ entry แล้ว (เช่นหลังลบ/ย้ายวัน)
+        db.session.execute(
+            delete(TimesheetRollup)
+            .where(tuple_(TimesheetRollup.user_id, TimesheetRollup.task_id, TimesheetRollup.work_date)
+                   .in_([k for k, _ in items]), TimesheetRollup.entries <= 0)
+            .execution_options(synchronize_session=False)
+        )
+
+
+def _upsert(rows):
+    dialect = db.session.get_bind().dialect.name
+    table = TimesheetRollup.__table__
+    if dialect in ("postgresql", "sqlite"):
+        ins = (postgresql if dialect == "postgresql" else sqlite).insert(table)
+        stmt = ins.on_conflict_do_update(
+            index_elements=[table.c.user_id, table.c.task_id, table.c.work_date],
+            set_={"hours": table.c.hours + ins.excluded.hours, "entries": table.c.entries + ins.excluded.entries},
+        )
+        db.session.execute(stmt, rows)
+        return
+    for r in rows:   # DB อื่น: update แล้ว insert ถ้าไม่มีแถว
+        res = db.session.execute(
+            table.update()
+            .where(table.c.user_id == r["user_id"], table.c.task_id == r["task_id"], table.c.work_date == r["work_date"])
+            .values(hours=table.c.hours + r["hours"], entries=table.c.entries + r["entries"])
+        )
+        if res.rowcount == 0:
+            db.session.execute(table.insert(), r)
+
+
+def rebuild_rollups(batch_size=5000, since=None):
+    """
+    สร้าง rollup ใหม่ทั้งหมดจาก timesheets (ใช้ตอนติดตั้งครั้งแรกหรือเมื่อสงสัยว่าข้อมูลเพี้ยน)
+    since: สร้างใหม่เฉพาะตั้งแต่วันนั้น — ใช้หลัง archive partition เพื่อเก็บยอดของเดือนที่ archive ไปแล้ว
+    """
+    day = func.coalesce(Timesheet.work_date, func.date(Timesheet.created_at))
+    stmt = (select(Timesheet.user_id, func.coalesce(Timesheet.task_id, 0), day,
+                   func.sum(Timesheet.hours), func.count())
+            .group_by(Timesheet.user_id, func.coalesce(Timesheet.task_id, 0), day))
+
+    wipe = delete(TimesheetRollup)
+    if since is not None:
+        stmt = stmt.where(day >= since)
+        wipe = wipe.where(TimesheetRollup.work_date >= since)
+    db.session.execute(wipe)
+    total, batch = 0, []
+    for u, t, d, h, n in db.session.execute(stmt.execution_options(yield_per=batch_size)):
+        if isinstance(d, str): d = date.fromisoformat(d)   # SQLite คืน date() เป็น string
+        d = d or date.today()
+        iso = d.isocalendar()
+        batch.append({"user_id": u, "task_id": t, "work_date": d, "iso_year": iso[0], "iso_week": iso[1],
+                      "hours": float(h or 0), "entries": n})
+        if len(batch) >= batch_size:
+            db.session.execute(TimesheetRollup.__table__.insert(), batch)
+            total += len(batch); batch = []
+    if batch:
+        db.session.execute(TimesheetRollup.__table__.insert(), batch)
+        total += len(batch)
+    db.session.commit()
+    return total
@@ -0,0 +1,55 @@
+import re
+from sqlalchemy import select, union, or_, func, literal_column
+from app import db
+from app.models import Task, User
+
+# คอลัมน์ generated (tsvector) ที่สร้างใน migration — ไม่ได้ map ใน model เพราะ SQLite ไม่มี type นี้
+SEARCH_VECTOR = literal_column("tasks.search_vector")
+TS_CONFIG = "simple"   # ข้อมูลปนไทย/อังกฤษ ใช้ simple (ไม่ stem)
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# pg_trgm แตกคำเป็น trigram — คำค้นสั้นกว่านี้ ilike '%..%' ใช้ GIN index ไม่ได้ (กลายเป็น seq scan)
+MIN_TRGM_TERM = 3
+
+
+def is_postgres(session=None):
+    bind = (session or db.session).get_bind()
+    return bind.dialect.name == "postgresql"
+
+
+def prefix_tsquery(term: str):
+    """'abc de' → 'abc:* & de:*' (ตัดอักขระพิเศษทิ้ง กัน syntax error ของ to_tsquery)"""
+    tokens = _TOKEN_RE.findall(term.lower())
+    return " & ".join(f"{t}:*" for t in tokens) or None
+
+
+def apply_task_search(q, term: str):
+    """
+    กรอง query ของ list_tasks ด้วยคำค้น คืนค่า (q, rank_expr)
+    - PostgreSQL: แยกเป็น UNION ของ id จากฝั่ง tasks (pg_trgm GIN) และฝั่ง users.username
+      แทน OR ข้าม join ที่บังคับ seq scan; rank ด้วย ts_rank บน tasks.search_vector
+      คำค้นสั้นกว่า MIN_TRGM_TERM ใช้ trigram ไม่ได้: task_code/title/username ยังเป็น substring
+      (คอลัมน์สั้น — ?search=12 ต้องเจอ TS-0012) แต่ details (Text ยาว) ค้นแบบขึ้นต้นคำผ่าน
+      search_vector @@ '12:*' (GIN ของ tsvector) แทนการ scan ทั้งคอลัมน์ — ต่างจาก SQLite เฉพาะ details
+    - DB อื่น (SQLite ตอนทดสอบ): ilike แบบเดิม, rank เป็น None
+    """
+    s = f"%{term}%"
+    if not is_postgres():
+        return q.filter(or_(Task.title.ilike(s), Task.details.ilike(s),
+                            Task.task_code.ilike(s), User.username.ilike(s))), None
+
+    tsq = prefix_tsquery(term)
+    if len(term) < MIN_TRGM_TERM:
+        in_details = SEARCH_VECTOR.op("@@")(func.to_tsquery(TS_CONFIG, tsq)) if tsq else None
+    else:
+        in_details = Task.details.ilike(s)
+    ids = union(
+        select(Task.id).where(or_(Task.title.ilike(s), Task.task_code.ilike(s),
+                                  *([in_details] if in_details is not None else []))),
+        select(Task.id).join(User, User.id == Task.assignee_id).where(User.username.ilike(s)),
+    )
+    q = q.filter(Task.id.in_(ids))
+
+    rank = func.ts_rank(SEARCH_VECTOR, func.to_tsquery(TS_CONFIG, tsq)) if tsq else None
+    return q, rank
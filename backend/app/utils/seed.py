@@ -1,20 +1,78 @@
-from app import db, bcrypt
+from app import db
 from app.models import User
+from app.utils.hashing import hash_password
 
-def seed_admin():
-    existing = User.query.filter_by(email="admin@example.com").first()
+def seed_admin(email="admin@example.com", username="admin", password="admin123"):
+    """สร้างผู้ใช้ Admin ถ้ายังไม่มี (เรียกจาก `flask seed-admin` — ไม่ได้รันตอน start app) → True ถ้าสร้างใหม่"""
+    existing = User.query.filter_by(email=email).first()
     if existing:
-        print("✅ Admin already exists, skip seeding")
-        return
+        return False
 
     admin = User(
-        username="admin",
-        email="admin@example.com",
-        password_hash=bcrypt.generate_password_hash("admin123").decode("utf-8"),
+        username=username,
+        email=email,
+        password_hash=hash_password(password),
         role="Admin",
         is_temp_password=True
     )
 
     db.session.add(admin)
     db.session.commit()
-    print("✅ Admin seeded")
+    return True
+
+
+def seed_demo(users=200, tasks=100_000, timesheets=1_000_000, batch_size=10_000, days=730):
+    """
+    ข้อมูลจำลองขนาดใหญ่สำหรับวัด query plan / load test (insert แบบ Core ทีละ batch)
+    หลัง insert: สร้าง rollup + task_status_counts ใหม่ และ ANALYZE บน PostgreSQL
+    """
+    import datetime
+    from sqlalchemy import insert, select
+    from app.models import Task, Timesheet
+    from app.utils.partitions import ensure_partitions, is_partitioned
+    from app.utils.rollup import rebuild_rollups
+    from app.utils.task_counters import reconcile_task_counts
+
+    def _batches(rows):
+        batch = []
+        for r in rows:
+            batch.append(r)
+            if len(batch) >= batch_size:
+                yield batch; batch = []
+        if batch:
+            yield batch
+
+    start = (db.session.execute(select(db.func.count(User.id))).scalar() or 0) + 1
+    for batch in _batches({"username": f"seed_user_{i}", "email": f"seed_user_{i}@example.com",
+                           "password_hash": "!", "role": "User", "is_active": True, "is_temp_password": False}
+                          for i in range(start, start + users)):
+        db.session.execute(insert(User), batch)
+    user_ids = db.session.execute(select(User.id).where(User.username.like("seed_user_%"))).scalars().all()
+
+    priorities, statuses = ("Low", "Medium", "High"), ("Open", "In Progress", "Complete", "Cancelled")
+    t0 = (db.session.execute(select(db.func.count(Task.id))).scalar() or 0) + 1
+    for batch in _batches({"task_code": f"SEED-{i}", "title": f"Seed task {i}", "assignee_id": user_ids[i % len(user_ids)],
+                           "priority": priorities[i % 3], "status": statuses[i % 4], "details": f"seeded task {i}"}
+                          for i in range(t0, t0 + tasks)):
+        db.session.execute(insert(Task), batch)
+    task_ids = db.session.execute(select(Task.id).where(Task.task_code.like("SEED-%"))).scalars().all()
+
+    # DB ที่ผ่าน migration แบ่ง partition รายเดือน — สร้างให้ครอบช่วงข้อมูลก่อน ไม่ให้ทุกแถวตกไป timesheets_default
+    today = datetime.date.today()
+    if is_partitioned():
+        ensure_partitions(months_ahead=days // 28 + 4, start=today - datetime.timedelta(days=days))
+    for batch in _batches({"user_id": user_ids[i % len(user_ids)], "task_id": task_ids[(i * 7) % len(task_ids)],
+                           "work_date": today - datetime.timedelta(days=i % days),
+                           "start_time": datetime.time(8 + i % 8), "end_time": datetime.time(9 + i % 8),
+                           "hours": 1.0, "notes": ""}
+                          for i in range(timesheets)):
+        db.session.execute(insert(Timesheet), batch)
+    db.session.commit()
+
+    rebuild_rollups()
+    reconcile_task_counts(repair=True)
+    db.session.commit()
+    if db.session.get_bind().dialect.name == "postgresql":
+        with db.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.exec_driver_sql("ANALYZE")
+    return len(user_ids), len(task_ids), timesheets
@@ -0,0 +1,48 @@
+import re
+from sqlalchemy import select, update, func
+from sqlalchemy.dialects import sqlite
+from app import db
+from app.models import Task, TaskCodeCounter, TASK_CODE_SEQ
+
+CODE_FORMAT = "TS-{:04d}"
+_CODE_RE = re.compile(r"^TS-(\d+)$")
+COUNTER = "tasks"
+
+
+def format_code(n: int) -> str:
+    return CODE_FORMAT.format(n)
+
+
+def max_existing_number(session=None):
+    """เลขมากสุดที่ใช้ไปแล้ว (จาก id และ task_code รูปแบบ TS-n) — ใช้ตอนตั้งค่าเริ่มต้นของตัวนับเท่านั้น"""
+    session = session or db.session
+    top = session.execute(select(func.coalesce(func.max(Task.id), 0))).scalar() or 0
+    for code in session.execute(select(Task.task_code).where(Task.task_code.like("TS-%"))).scalars():
+        m = _CODE_RE.match(code or "")
+        if m:
+            top = max(top, int(m.group(1)))
+    return top
+
+
+def next_task_code(session=None):
+    """
+    task_code ถัดไปแบบไม่ชนกันเมื่อสร้างพร้อมกันหลาย worker และไม่ต้อง scan MAX(id)
+    - PostgreSQL: nextval('task_code_seq') — ไม่ผูกกับ transaction, ไม่มี lock ระหว่าง writer
+    - SQLite: UPDATE task_code_counters SET value = value + 1 RETURNING ใน transaction ปัจจุบัน
+      (migration สร้างแถวไว้แล้ว; DB จาก create_all สร้างครั้งแรกด้วย INSERT ... ON CONFLICT DO UPDATE)
+    เลขอาจข้ามได้ (rollback / sequence cache) แต่ไม่ซ้ำ
+    """
+    session = session or db.session
+    if session.get_bind().dialect.name == "postgresql":
+        return format_code(session.execute(select(TASK_CODE_SEQ.next_value())).scalar())
+
+    tc = TaskCodeCounter.__table__
+    bumped = (update(tc).where(tc.c.name == COUNTER).values(value=tc.c.value + 1).returning(tc.c.value))
+    value = session.execute(bumped).scalar()
+    if value is None:   # DB ที่สร้างด้วย create_all (ไม่ผ่าน migration) — สร้างแถวแบบ upsert กันสองคนสร้างพร้อมกัน
+        ins = sqlite.insert(tc).values(name=COUNTER, value=max_existing_number(session) + 1)
+        value = session.execute(
+            ins.on_conflict_do_update(index_elements=[tc.c.name], set_={"value": tc.c.value + 1})
+               .returning(tc.c.value)
+        ).scalar()
+    return format_code(value)
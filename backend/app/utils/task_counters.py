@@ -0,0 +1,120 @@
+from collections import defaultdict
+from sqlalchemy import event, func, select, delete, inspect
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app import db
+from app.models import Task, TaskStatusCount
+
+GLOBAL = 0   # assignee_id ของแถวยอดรวมทั้งระบบ
+
+
+class CounterDeltas:
+    """สะสม +/- ต่อ (assignee, status) แล้ว apply() ภายใน transaction เดียวกับการเปลี่ยนสถานะ"""
+
+    def __init__(self):
+        self._d = defaultdict(int)
+
+    def add(self, assignee_id, status, delta):
+        status = status or "Open"
+        self._d[(int(assignee_id), status)] += delta
+        self._d[(GLOBAL, status)] += delta
+
+    def add_row(self, assignee_id, status, delta):
+        """ปรับเฉพาะแถวเดียว (ไม่บวกเข้ายอดรวม) — ใช้ตอน reconcile"""
+        self._d[(int(assignee_id), status)] += delta
+
+    def move(self, assignee_id, old_status, new_status, new_assignee_id=None):
+        self.add(assignee_id, old_status, -1)
+        self.add(assignee_id if new_assignee_id is None else new_assignee_id, new_status, +1)
+
+    def apply(self, session=None):
+        session = session or db.session
+        rows = [{"assignee_id": a, "status": s, "count": n} for (a, s), n in self._d.items() if n]
+        self._d.clear()
+        if rows:
+            _upsert(session, rows)
+
+
+def _upsert(session, rows):
+    table = TaskStatusCount.__table__
+    dialect = session.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        ins = (postgresql if dialect == "postgresql" else sqlite).insert(table)
+        stmt = ins.on_conflict_do_update(
+            index_elements=[table.c.assignee_id, table.c.status],
+            set_={"count": table.c.count + ins.excluded["count"]},
+        )
+        session.execute(stmt, rows)
+        return
+    for r in rows:
+        res = session.execute(
+            table.update()
+            .where(table.c.assignee_id == r["assignee_id"], table.c.status == r["status"])
+            .values(count=table.c.count + r["count"])
+        )
+        if res.rowcount == 0:
+            session.execute(table.insert(), r)
+
+
+@event.listens_for(Session, "before_flush")
+def _track_task_changes(session, flush_context, instances):
+    """การเปลี่ยนแปลง Task ผ่าน ORM (create/update/delete/assign) → อัปเดต counter ใน flush เดียวกัน"""
+    deltas = CounterDeltas()
+    for obj in session.new:
+        if isinstance(obj, Task):
+            deltas.add(obj.assignee_id, obj.status, +1)
+    for obj in session.deleted:
+        if isinstance(obj, Task):
+            st = inspect(obj).attrs
+            deltas.add(st.assignee_id.loaded_value, st.status.loaded_value, -1)
+    for obj in session.dirty:
+        if not isinstance(obj, Task) or obj in session.deleted:
+            continue
+        st = inspect(obj).attrs
+        h_status, h_assignee = st.status.history, st.assignee_id.history
+        if not (h_status.has_changes() or h_assignee.has_changes()):
+            continue
+        old_status = h_status.deleted[0] if h_status.deleted else obj.status
+        old_assignee = h_assignee.deleted[0] if h_assignee.deleted else obj.assignee_id
+        deltas.move(old_assignee, old_status, obj.status, obj.assignee_id)
+    deltas.apply(session)
+
+
+def actual_counts():
+    rows = db.session.execute(
+        select(Task.assignee_id, Task.status, func.count()).group_by(Task.assignee_id, Task.status)
+    ).all()
+    counts = defaultdict(int)
+    for a, s, n in rows:
+        counts[(a, s)] += n
+        counts[(GLOBAL, s)] += n
+    return counts
+
+
+def reconcile_task_counts(repair=True):
+    """
+    เทียบ task_status_counts กับ COUNT จริงจาก tasks → คืน list ของ drift [(assignee_id, status, stored, actual)]
+    repair=True: เขียนค่าที่ถูกต้องทับแล้ว commit (ล็อกตาราง counter ไว้ระหว่างซ่อมบน PostgreSQL)
+    """
+    session = db.session
+    if session.get_bind().dialect.name == "postgresql":
+        session.execute(db.text("LOCK TABLE task_status_counts IN EXCLUSIVE MODE"))
+    stored = {(r.assignee_id, r.status): r.count for r in session.query(TaskStatusCount).all()}
+    actual = actual_counts()
+
+    drift = []
+    for key in set(stored) | set(actual):
+        s, a = stored.get(key, 0), actual.get(key, 0)
+        if s != a:
+            drift.append((key[0], key[1], s, a))
+
+    if repair and drift:
+        deltas = CounterDeltas()
+        for assignee_id, status, s, a in drift:
+            deltas.add_row(assignee_id, status, a - s)
+        deltas.apply(session)
+        session.execute(delete(TaskStatusCount).where(TaskStatusCount.count == 0))
+        session.commit()
+    else:
+        session.rollback()
+    return sorted(drift)
@@ -0,0 +1,88 @@
+from sqlalchemy import case, event, select, update
+from sqlalchemy.orm import Session
+from app import db
+from app.models import Task
+from app.utils.task_counters import CounterDeltas
+from app.utils.httpcache import bump
+
+
+class StatusTransitions:
+    """
+    unit of work ของการเปลี่ยนสถานะ task ต่อ transaction (ดู pending_transitions)
+    apply() รวมทุก transition ที่สะสมไว้เป็น SELECT ... FOR UPDATE ครั้งเดียว, UPDATE ... CASE ครั้งเดียว,
+    upsert task_status_counts ครั้งเดียว และ bump version ครั้งเดียว (ไม่ commit)
+    """
+
+    def __init__(self):
+        self._ops = []   # [(set ของ id, new_status, only_from)] ตามลำดับที่เพิ่ม
+
+    def add(self, task_ids, new_status, only_from=None):
+        ids = {int(i) for i in (task_ids or [])}
+        if ids:
+            self._ops.append((ids, new_status, only_from))
+
+    def __bool__(self):
+        return bool(self._ops)
+
+    def apply(self, session=None):
+        """คืน dict new_status → set ของ task id ที่ตรงเงื่อนไข (only_from=None → task ที่มีอยู่จริง)"""
+        session = session or db.session
+        ops, self._ops = self._ops, []
+        if not ops: return {}
+
+        all_ids = set().union(*(ids for ids, _, _ in ops))
+        rows = session.execute(
+            select(Task.id, Task.assignee_id, Task.status).where(Task.id.in_(all_ids)).with_for_update()
+        ).all()
+        current = {r.id: r.status for r in rows}
+        original, assignee = dict(current), {r.id: r.assignee_id for r in rows}
+
+        # เล่นตามลำดับใน memory — transition ถัดไปเห็นผลของตัวก่อนหน้าเหมือนรันทีละ statement
+        found = {}
+        for ids, new_status, only_from in ops:
+            hit = {i for i in ids if i in current and (only_from is None or current[i] == only_from)}
+            for i in hit:
+                current[i] = new_status
+            found.setdefault(new_status, set()).update(hit)
+
+        changed = {i: st for i, st in current.items() if st != original[i]}
+        if changed:
+            session.execute(
+                update(Task).where(Task.id.in_(changed))
+                            .values(status=case(changed, value=Task.id))
+                            .execution_options(synchronize_session=False)
+            )
+            deltas = CounterDeltas()
+            for i, st in changed.items():
+                deltas.move(assignee[i], original[i], st)
+            deltas.apply(session)
+            bump("tasks", session=session)
+        return found
+
+
+def pending_transitions(session=None):
+    """StatusTransitions ของ transaction ปัจจุบัน — apply อัตโนมัติก่อน commit (ใน transaction เดียวกัน)"""
+    session = session or db.session
+    return session.info.setdefault("task_transitions", StatusTransitions())
+
+
+def transition_tasks(task_ids, new_status, only_from=None):
+    """
+    เปลี่ยนสถานะ tasks ทันที (พร้อม transition อื่นที่ค้างอยู่ใน transaction นี้) + task_status_counts (ไม่ commit)
+    คืน set ของ task id ที่ตรงเงื่อนไข (only_from=None → task ที่มีอยู่จริง ใช้ตรวจ 404)
+    """
+    tr = pending_transitions()
+    tr.add(task_ids, new_status, only_from)
+    return tr.apply().get(new_status, set())
+
+
+@event.listens_for(Session, "before_commit")
+def _apply_pending(session):
+    tr = session.info.get("task_transitions")
+    if tr:
+        tr.apply(session)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_pending(session):
+    session.info.pop("task_transitions", None)
@@ -0,0 +1,8 @@
+# gunicorn อ่านไฟล์นี้อัตโนมัติเมื่อ start จากโฟลเดอร์ backend (gunicorn wsgi:app)
+# ค่า bind/workers/threads ยังส่งผ่าน command line หรือ env GUNICORN_CMD_ARGS ได้ตามเดิม
+
+
+def child_exit(server, worker):
+    # metrics แบบ multiprocess (PROMETHEUS_MULTIPROC_DIR) — ล้างไฟล์ของ worker ที่ออกไปแล้ว
+    from app.utils.metrics import mark_worker_dead
+    mark_worker_dead(worker.pid)
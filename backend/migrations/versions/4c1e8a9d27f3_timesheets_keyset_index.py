@@ -0,0 +1,30 @@
+"""timesheets keyset pagination index
+
+Revision ID: 4c1e8a9d27f3
+Revises: 0f53bbdcfe74
+Create Date: 2026-10-17 09:12:40.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4c1e8a9d27f3'
+down_revision = '0f53bbdcfe74'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # ทิศทางคอลัมน์ต้องตรงกับ ORDER BY ของ get_timesheets เพื่อให้ index scan ได้ทั้งลำดับ
+    op.create_index(
+        'ix_timesheets_user_date_start_id',
+        'timesheets',
+        ['user_id', sa.text('work_date DESC'), 'start_time', sa.text('id DESC')],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index('ix_timesheets_user_date_start_id', table_name='timesheets')
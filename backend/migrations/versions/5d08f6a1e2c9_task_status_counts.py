@@ -0,0 +1,39 @@
+"""task status counters
+
+Revision ID: 5d08f6a1e2c9
+Revises: e3b7c2f91a05
+Create Date: 2026-10-17 15:02:26.310448
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d08f6a1e2c9'
+down_revision = 'e3b7c2f91a05'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'task_status_counts',
+        sa.Column('assignee_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('assignee_id', 'status'),
+    )
+    # backfill: รายคน + ยอดรวม (assignee_id = 0)
+    op.execute("""
+        INSERT INTO task_status_counts (assignee_id, status, count)
+        SELECT assignee_id, status, COUNT(*) FROM tasks GROUP BY assignee_id, status
+    """)
+    op.execute("""
+        INSERT INTO task_status_counts (assignee_id, status, count)
+        SELECT 0, status, COUNT(*) FROM tasks GROUP BY status
+    """)
+
+
+def downgrade():
+    op.drop_table('task_status_counts')
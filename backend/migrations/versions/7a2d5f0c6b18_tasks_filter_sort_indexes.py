@@ -0,0 +1,27 @@
+"""tasks filter/sort composite indexes
+
+Revision ID: 7a2d5f0c6b18
+Revises: 4c1e8a9d27f3
+Create Date: 2026-10-17 10:03:11.452907
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '7a2d5f0c6b18'
+down_revision = '4c1e8a9d27f3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_tasks_status_created_id', 'tasks', ['status', 'created_at', 'id'], unique=False)
+    op.create_index('ix_tasks_assignee_created_id', 'tasks', ['assignee_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_tasks_priority_created_id', 'tasks', ['priority', 'created_at', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_tasks_priority_created_id', table_name='tasks')
+    op.drop_index('ix_tasks_assignee_created_id', table_name='tasks')
+    op.drop_index('ix_tasks_status_created_id', table_name='tasks')
@@ -0,0 +1,24 @@
+"""users lower(email) functional index
+
+Revision ID: a8f4d16b0e37
+Revises: 5d08f6a1e2c9
+Create Date: 2026-10-17 16:48:55.021734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a8f4d16b0e37'
+down_revision = '5d08f6a1e2c9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_users_email_lower', 'users', [sa.text('lower(email)')], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_users_email_lower', table_name='users')
@@ -0,0 +1,34 @@
+"""table versions for ETag
+
+Revision ID: b71e4d2a9c30
+Revises: f2a9c03e7b54
+Create Date: 2026-10-17 19:12:08.417552
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b71e4d2a9c30'
+down_revision = 'f2a9c03e7b54'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    table_versions = op.create_table(
+        'table_versions',
+        sa.Column('name', sa.String(length=32), nullable=False),
+        sa.Column('version', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('name'),
+    )
+    op.bulk_insert(table_versions, [
+        {'name': 'tasks', 'version': 1},
+        {'name': 'timesheets', 'version': 1},
+        {'name': 'users', 'version': 1},
+    ])
+
+
+def downgrade():
+    op.drop_table('table_versions')
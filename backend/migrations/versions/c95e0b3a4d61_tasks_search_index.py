@@ -0,0 +1,52 @@
+"""tasks full-text / trigram search
+
+Revision ID: c95e0b3a4d61
+Revises: 7a2d5f0c6b18
+Create Date: 2026-10-17 11:20:54.730611
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'c95e0b3a4d61'
+down_revision = '7a2d5f0c6b18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # เฉพาะ PostgreSQL — SQLite ใช้ ilike fallback ใน app/utils/search.py
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # tsvector แบบ generated column (PG12+) ไม่ต้องมี trigger ดูแลเอง
+    op.execute("""
+        ALTER TABLE tasks ADD COLUMN search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', coalesce(task_code, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(details, '')), 'B')
+        ) STORED
+    """)
+    op.execute("CREATE INDEX ix_tasks_search_vector ON tasks USING gin (search_vector)")
+
+    # ilike '%term%' ใช้ trigram index ได้
+    op.execute("CREATE INDEX ix_tasks_title_trgm ON tasks USING gin (title gin_trgm_ops)")
+    op.execute("CREATE INDEX ix_tasks_details_trgm ON tasks USING gin (details gin_trgm_ops)")
+    op.execute("CREATE INDEX ix_tasks_task_code_trgm ON tasks USING gin (task_code gin_trgm_ops)")
+    op.execute("CREATE INDEX ix_users_username_trgm ON users USING gin (username gin_trgm_ops)")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute("DROP INDEX IF EXISTS ix_users_username_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_tasks_task_code_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_tasks_details_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_tasks_title_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_tasks_search_vector")
+    op.execute("ALTER TABLE tasks DROP COLUMN IF EXISTS search_vector")
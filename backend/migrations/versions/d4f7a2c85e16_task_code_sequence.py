@@ -0,0 +1,48 @@
+"""task_code sequence / counter
+
+Revision ID: d4f7a2c85e16
+Revises: b71e4d2a9c30
+Create Date: 2026-10-17 20:41:37.905214
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4f7a2c85e16'
+down_revision = 'b71e4d2a9c30'
+branch_labels = None
+depends_on = None
+
+
+def _max_existing(bind):
+    # เลขมากสุดจาก id และ task_code รูปแบบ TS-n เพื่อไม่ให้เลขใหม่ชนของเดิม
+    top = bind.execute(sa.text("SELECT COALESCE(MAX(id), 0) FROM tasks")).scalar() or 0
+    for (code,) in bind.execute(sa.text("SELECT task_code FROM tasks WHERE task_code LIKE 'TS-%'")):
+        num = code[3:]
+        if num.isdigit():
+            top = max(top, int(num))
+    return top
+
+
+def upgrade():
+    bind = op.get_bind()
+    top = _max_existing(bind)
+
+    counters = op.create_table(
+        'task_code_counters',
+        sa.Column('name', sa.String(length=32), nullable=False),
+        sa.Column('value', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('name'),
+    )
+    op.bulk_insert(counters, [{'name': 'tasks', 'value': top}])
+
+    if bind.dialect.name == 'postgresql':
+        op.execute(f"CREATE SEQUENCE task_code_seq START WITH {top + 1}")
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("DROP SEQUENCE IF EXISTS task_code_seq")
+    op.drop_table('task_code_counters')
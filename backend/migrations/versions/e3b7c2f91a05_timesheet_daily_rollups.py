@@ -0,0 +1,53 @@
+"""timesheet daily rollups
+
+Revision ID: e3b7c2f91a05
+Revises: c95e0b3a4d61
+Create Date: 2026-10-17 13:41:07.902385
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3b7c2f91a05'
+down_revision = 'c95e0b3a4d61'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'timesheet_daily_rollups',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('task_id', sa.Integer(), nullable=False),
+        sa.Column('work_date', sa.Date(), nullable=False),
+        sa.Column('iso_year', sa.SmallInteger(), nullable=False),
+        sa.Column('iso_week', sa.SmallInteger(), nullable=False),
+        sa.Column('hours', sa.Float(), nullable=False),
+        sa.Column('entries', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('user_id', 'task_id', 'work_date'),
+    )
+    op.create_index('ix_ts_rollups_user_week', 'timesheet_daily_rollups', ['user_id', 'iso_year', 'iso_week'], unique=False)
+    op.create_index('ix_ts_rollups_work_date', 'timesheet_daily_rollups', ['work_date'], unique=False)
+
+    # backfill จากข้อมูลเดิม (DB อื่นให้รัน `flask rollup-rebuild` แทน)
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("""
+            INSERT INTO timesheet_daily_rollups (user_id, task_id, work_date, iso_year, iso_week, hours, entries)
+            SELECT user_id, task_id, d,
+                   EXTRACT(isoyear FROM d)::smallint, EXTRACT(week FROM d)::smallint,
+                   SUM(hours), COUNT(*)
+            FROM (
+                SELECT user_id, COALESCE(task_id, 0) AS task_id,
+                       COALESCE(work_date, created_at::date, CURRENT_DATE) AS d, hours
+                FROM timesheets
+            ) t
+            GROUP BY user_id, task_id, d
+        """)
+
+
+def downgrade():
+    op.drop_index('ix_ts_rollups_work_date', table_name='timesheet_daily_rollups')
+    op.drop_index('ix_ts_rollups_user_week', table_name='timesheet_daily_rollups')
+    op.drop_table('timesheet_daily_rollups')
@@ -0,0 +1,33 @@
+"""timesheets foreign-key / filter indexes
+
+Revision ID: e8c1b5f40a27
+Revises: d4f7a2c85e16
+Create Date: 2026-10-17 21:05:52.611390
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8c1b5f40a27'
+down_revision = 'd4f7a2c85e16'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # user_id / work_date ถูกครอบด้วย ix_timesheets_user_date_start_id แล้ว (คอลัมน์นำ)
+    # task_id ยังไม่มี index เลย — ลบ task ต้อง seq scan timesheets เพื่อตรวจ FK
+    op.create_index(
+        'ix_timesheets_user_task_date_start_id',
+        'timesheets',
+        ['user_id', 'task_id', sa.text('work_date DESC'), 'start_time', sa.text('id DESC')],
+        unique=False,
+    )
+    op.create_index('ix_timesheets_task_id_work_date', 'timesheets', ['task_id', 'work_date'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_timesheets_task_id_work_date', table_name='timesheets')
+    op.drop_index('ix_timesheets_user_task_date_start_id', table_name='timesheets')
@@ -0,0 +1,120 @@
+"""timesheets monthly range partitioning
+
+Revision ID: f6a3d9e27b40
+Revises: e8c1b5f40a27
+Create Date: 2026-10-17 21:48:13.270945
+
+"""
+from datetime import date
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f6a3d9e27b40'
+down_revision = 'e8c1b5f40a27'
+branch_labels = None
+depends_on = None
+
+COLUMNS = "id, user_id, task_id, work_date, start_time, end_time, hours, notes, created_at"
+MONTHS_AHEAD = 3
+MONTHS_BACK = 36
+
+
+def _add_months(d, n):
+    y, m = divmod(d.year * 12 + d.month - 1 + n, 12)
+    return date(y, m + 1, 1)
+
+
+def _create_indexes():
+    op.create_index(
+        'ix_timesheets_user_date_start_id', 'timesheets',
+        ['user_id', sa.text('work_date DESC'), 'start_time', sa.text('id DESC')], unique=False,
+    )
+    op.create_index(
+        'ix_timesheets_user_task_date_start_id', 'timesheets',
+        ['user_id', 'task_id', sa.text('work_date DESC'), 'start_time', sa.text('id DESC')], unique=False,
+    )
+    op.create_index('ix_timesheets_task_id_work_date', 'timesheets', ['task_id', 'work_date'], unique=False)
+
+
+def upgrade():
+    # แถวเก่าที่ไม่มี work_date ใช้วันที่สร้าง (ตรงกับ rollup_date ใน app/utils/rollup.py)
+    # SQLite: CAST(... AS DATE) ได้แค่ตัวเลขปี — ต้องใช้ date()
+    bind = op.get_bind()
+    day = "date(created_at)" if bind.dialect.name == 'sqlite' else "CAST(created_at AS DATE)"
+    op.execute(f"UPDATE timesheets SET work_date = COALESCE({day}, CURRENT_DATE) WHERE work_date IS NULL")
+
+    if bind.dialect.name != 'postgresql':
+        with op.batch_alter_table('timesheets') as batch_op:
+            batch_op.alter_column('work_date', existing_type=sa.Date(), nullable=False)
+        return
+
+    seq = bind.execute(sa.text("SELECT pg_get_serial_sequence('timesheets', 'id')")).scalar()
+    # ช่วง partition จำกัดไว้ที่ MONTHS_BACK เดือนก่อน ถึง MONTHS_AHEAD เดือนหน้า — แถวเก่า/อนาคตผิดปกติ
+    # (เช่นปี 0001 หรือ 1970) ไปอยู่ timesheets_default แทนการสร้าง partition เป็นพันตัว
+    this_month = date.today().replace(day=1)
+    floor = _add_months(this_month, -MONTHS_BACK)
+    last = _add_months(this_month, MONTHS_AHEAD)
+    lo = bind.execute(sa.text("SELECT MIN(work_date) FROM timesheets WHERE work_date >= :f"), {"f": floor}).scalar()
+    first = (lo or this_month).replace(day=1)
+
+    # PK ของตาราง partition ต้องมี partition key → (id, work_date); id ยังมาจาก sequence เดิม
+    op.execute(f"ALTER SEQUENCE {seq} OWNED BY NONE")
+    op.execute(f"""
+        CREATE TABLE timesheets_new (
+            id integer NOT NULL DEFAULT nextval('{seq}'),
+            user_id integer NOT NULL REFERENCES users(id),
+            task_id integer REFERENCES tasks(id),
+            work_date date NOT NULL,
+            start_time time,
+            end_time time,
+            hours double precision NOT NULL,
+            notes text,
+            created_at timestamp DEFAULT now(),
+            PRIMARY KEY (id, work_date)
+        ) PARTITION BY RANGE (work_date)
+    """)
+    month = first
+    while month <= last:
+        nxt = _add_months(month, 1)
+        op.execute(f"CREATE TABLE timesheets_y{month.year:04d}m{month.month:02d} PARTITION OF timesheets_new "
+                   f"FOR VALUES FROM ('{month}') TO ('{nxt}')")
+        month = nxt
+    op.execute("CREATE TABLE timesheets_default PARTITION OF timesheets_new DEFAULT")
+
+    op.execute(f"INSERT INTO timesheets_new ({COLUMNS}) SELECT {COLUMNS} FROM timesheets")
+    op.execute("DROP TABLE timesheets")
+    op.execute("ALTER TABLE timesheets_new RENAME TO timesheets")
+    op.execute(f"ALTER SEQUENCE {seq} OWNED BY timesheets.id")
+    _create_indexes()
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        with op.batch_alter_table('timesheets') as batch_op:
+            batch_op.alter_column('work_date', existing_type=sa.Date(), nullable=True)
+        return
+
+    # partition ที่ archive ออกไปแล้ว (detach) จะไม่ถูกดึงกลับมา
+    seq = bind.execute(sa.text("SELECT pg_get_serial_sequence('timesheets', 'id')")).scalar()
+    op.execute(f"ALTER SEQUENCE {seq} OWNED BY NONE")
+    op.execute(f"""
+        CREATE TABLE timesheets_old (
+            id integer PRIMARY KEY DEFAULT nextval('{seq}'),
+            user_id integer NOT NULL REFERENCES users(id),
+            task_id integer REFERENCES tasks(id),
+            work_date date,
+            start_time time,
+            end_time time,
+            hours double precision NOT NULL,
+            notes text,
+            created_at timestamp DEFAULT now()
+        )
+    """)
+    op.execute(f"INSERT INTO timesheets_old ({COLUMNS}) SELECT {COLUMNS} FROM timesheets")
+    op.execute("DROP TABLE timesheets CASCADE")
+    op.execute("ALTER TABLE timesheets_old RENAME TO timesheets")
+    op.execute(f"ALTER SEQUENCE {seq} OWNED BY timesheets.id")
+    _create_indexes()
@@ -1,10 +1,10 @@
 from app import create_app
-from app.utils.seed import seed_admin
 
 app = create_app()
 
-with app.app_context():
-    seed_admin()
-
 if __name__ == "__main__":
+    # dev server: seed admin ครั้งเดียวตอนรันเอง (production ใช้ `flask seed-admin` ตอน deploy)
+    from app.utils.seed import seed_admin
+    with app.app_context():
+        print("✅ Admin seeded" if seed_admin() else "✅ Admin already exists, skip seeding")
     app.run(debug=True)
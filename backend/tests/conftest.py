@@ -0,0 +1,49 @@
+import datetime
+import os
+import tempfile
+
+import jwt
+import pytest
+
+# ต้องตั้งก่อน import app.config (Config อ่าน env ตอน import)
+_DB_DIR = tempfile.mkdtemp(prefix="crm-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_DB_DIR, 'test.db')}")
+os.environ.setdefault("PASSWORD_HASH_WORKERS", "0")
+os.environ.setdefault("BCRYPT_LOG_ROUNDS", "4")
+os.environ.setdefault("COMPRESS_ENABLED", "0")
+
+from app import create_app, db  # noqa: E402
+from app.models import User  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    app = create_app()
+    app.config.update(TESTING=True)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def make_user(username="alice", role="User", password_hash="x"):
+    u = User(username=username, email=f"{username}@example.com", password_hash=password_hash, role=role)
+    db.session.add(u)
+    db.session.commit()
+    return u
+
+
+def auth_header(user):
+    from flask import current_app
+    now = datetime.datetime.now(datetime.timezone.utc)
+    token = jwt.encode({"id": user.id, "username": user.username, "email": user.email, "role": user.role,
+                        "typ": "access", "exp": int((now + datetime.timedelta(minutes=5)).timestamp())},
+                       current_app.config["SECRET_KEY"], algorithm="HS256")
+    return {"Authorization": f"Bearer {token}"}
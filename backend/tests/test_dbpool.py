@@ -0,0 +1,33 @@
+import pytest
+from sqlalchemy import create_engine, exc
+from sqlalchemy.pool import NullPool
+
+from app.config import engine_options
+from app.utils.dbpool import TimedQueuePool, pool_stats
+
+PG = "postgresql://u:p@db/app"
+
+
+@pytest.mark.parametrize("env, expected", [
+    ({}, TimedQueuePool),
+    ({"DB_PGBOUNCER": "1"}, NullPool),
+    ({"DB_POOL_CLASS": "null"}, NullPool),
+    ({"DB_PGBOUNCER": "1", "DB_POOL_CLASS": "queue"}, TimedQueuePool),
+])
+def test_pool_class(monkeypatch, env, expected):
+    for k in ("DB_PGBOUNCER", "DB_POOL_CLASS"):
+        monkeypatch.delenv(k, raising=False)
+    for k, v in env.items():
+        monkeypatch.setenv(k, v)
+    assert engine_options(PG)["poolclass"] is expected
+
+
+def test_checkout_timeout_counted(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'p.db'}", poolclass=TimedQueuePool,
+                           pool_size=1, max_overflow=0, pool_timeout=0.05)
+    before = pool_stats.snapshot()["timeouts"]
+    with engine.connect():
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+    assert pool_stats.snapshot()["timeouts"] == before + 1
+    engine.dispose()
@@ -0,0 +1,23 @@
+import time
+
+import pytest
+
+from app.utils.hashing import HashingBusy, PasswordHasher
+
+
+def test_slot_held_until_timed_out_job_finishes():
+    hasher = PasswordHasher(workers=1, queue_size=0, timeout=0.05)
+    try:
+        with pytest.raises(HashingBusy):
+            hasher._run(time.sleep, 1.0)
+        # งานแรกยังรันอยู่ใน process ลูก → slot ยังไม่ว่าง
+        assert not hasher._slots.acquire(blocking=False)
+        deadline = time.monotonic() + 30
+        while not hasher._slots.acquire(blocking=False):
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+        hasher._slots.release()
+        hasher.timeout = 30
+        assert hasher._run(abs, -3) == 3
+    finally:
+        hasher.shutdown()
@@ -0,0 +1,80 @@
+import io
+import os
+import time
+
+import pytest
+
+from app import db
+from app.models import Task
+from app.utils import imports
+from tests.conftest import auth_header, make_user
+
+
+@pytest.fixture
+def import_dir(app, tmp_path):
+    app.config.update(IMPORT_RESULT_DIR=str(tmp_path))
+    return tmp_path
+
+
+def _post(client, user, body, **params):
+    return client.post("/api/timesheet/import", query_string=dict(format="csv", **params),
+                       data=body, content_type="text/csv", headers=auth_header(user))
+
+
+def test_csv_import_waits_for_result(client, import_dir):
+    u = make_user()
+    t = Task(title="t", assignee_id=u.id, task_code="T-1")
+    db.session.add(t); db.session.commit()
+    resp = _post(client, u, f"task_id,hours\n{t.id},2\n999,1\n", wait=1)
+    assert resp.status_code == 200
+    assert resp.get_json()["saved"] == 1 and resp.get_json()["errors"] == 1
+    assert not list(import_dir.glob("*.upload"))
+
+
+def test_missing_column_rejected_before_import(client, import_dir):
+    u = make_user()
+    resp = _post(client, u, "task_id,work_date\n1,2025-01-01\n")
+    assert resp.status_code == 400
+    assert "hours" in resp.get_json()["error"]
+    assert not os.listdir(import_dir)
+
+
+def test_upload_over_limit_is_413(app, client, import_dir):
+    app.config.update(IMPORT_MAX_BYTES=16)
+    u = make_user()
+    assert _post(client, u, "task_id,hours\n" + "1,1\n" * 20).status_code == 413
+    assert not os.listdir(import_dir)
+
+
+def test_multipart_upload_over_limit_rejected_before_parsing(app, client, import_dir):
+    app.config.update(IMPORT_MAX_BYTES=1000)
+    u = make_user()
+    body = ("task_id,hours\n" + "1,1\n" * 2000).encode()
+    resp = client.post("/api/timesheet/import", headers=auth_header(u),
+                       data={"file": (io.BytesIO(body), "ts.csv", "text/csv")}, content_type="multipart/form-data")
+    # 413 จาก werkzeug (Content-Length เกินก่อน parse form) ไม่ใช่จาก spool_upload หลัง parse ทั้งไฟล์แล้ว
+    assert resp.status_code == 413 and not resp.is_json
+    assert not os.listdir(import_dir)
+
+
+def test_stale_running_import_reported_failed(app, import_dir):
+    imports.write_status("b" * 32, {"import_id": "b" * 32, "state": "running"})
+    old = time.time() - 3600
+    os.utime(import_dir / f"{'b' * 32}.json", (old, old))
+    app.config.update(IMPORT_STALE_SECONDS=900)
+    assert imports.read_status("b" * 32)["state"] == "failed"
+
+
+def test_purge_removes_old_results(app, import_dir):
+    imports.write_status("c" * 32, {"state": "done"})
+    imports.write_status("d" * 32, {"state": "done"})
+    old = time.time() - 10 * 86400
+    os.utime(import_dir / f"{'c' * 32}.json", (old, old))
+    assert imports.purge_results(7 * 86400) == 1
+    assert imports.read_status("c" * 32) is None and imports.read_status("d" * 32) is not None
+
+
+def test_spool_removes_partial_file(app, import_dir):
+    with pytest.raises(imports.UploadTooLarge):
+        imports.spool_upload(io.BytesIO(b"x" * 100), "a" * 32, max_bytes=10, chunk_size=8)
+    assert not os.listdir(import_dir)
@@ -0,0 +1,49 @@
+from app.utils.hashing import hash_password
+from tests.conftest import make_user
+
+
+def test_negative_cache_ignored_after_user_created_elsewhere(app, client):
+    app.config["HTTP_VERSION_CACHE_TTL"] = 0   # เห็น version ของ users ทันที (ปกติ ≤ 1 วินาที)
+    creds = {"email": "bob@example.com", "password": "s3cret!"}
+    assert client.post("/api/auth/login", json=creds).status_code == 401   # เข้า negative cache
+
+    # สร้างผู้ใช้เหมือนทำใน worker อื่น — ไม่ได้เรียก forget_unknown ใน worker นี้
+    make_user("bob", password_hash=hash_password("s3cret!"))
+    assert client.post("/api/auth/login", json=creds).status_code == 200
+
+
+def test_negative_cache_still_short_circuits_without_user_writes(app, client):
+    from app.utils import ratelimit
+    creds = {"email": "nobody@example.com", "password": "x"}
+    assert client.post("/api/auth/login", json=creds).status_code == 401
+    assert ratelimit.is_known_unknown("nobody@example.com")
+
+
+def test_successful_logins_do_not_use_ip_quota(app, client):
+    app.config["LOGIN_RATE_LIMIT_PER_IP"] = 3
+    make_user("carol", password_hash=hash_password("s3cret!"))
+    for _ in range(5):
+        assert client.post("/api/auth/login", json={"email": "carol@example.com", "password": "s3cret!"}).status_code == 200
+
+
+def test_failed_logins_block_ip(app, client):
+    app.config["LOGIN_RATE_LIMIT_PER_IP"] = 3
+    make_user("dave", password_hash=hash_password("s3cret!"))
+    for i in range(3):
+        assert client.post("/api/auth/login", json={"email": f"x{i}@example.com", "password": "x"}).status_code == 401
+    assert client.post("/api/auth/login", json={"email": "dave@example.com", "password": "s3cret!"}).status_code == 429
+
+
+def test_client_ip_taken_from_trusted_proxy():
+    from app import create_app, db
+    app = create_app({"TRUSTED_PROXY_COUNT": 1, "LOGIN_RATE_LIMIT_PER_IP": 2, "TESTING": True})
+    with app.app_context():
+        db.drop_all(); db.create_all()
+        client = app.test_client()
+        bad = {"email": "nobody@example.com", "password": "x"}
+        for _ in range(2):
+            client.post("/api/auth/login", json=bad, headers={"X-Forwarded-For": "198.51.100.1"})
+        assert client.post("/api/auth/login", json=bad, headers={"X-Forwarded-For": "198.51.100.1"}).status_code == 429
+        # client อื่นหลัง proxy เดียวกันไม่โดนไปด้วย
+        assert client.post("/api/auth/login", json=bad, headers={"X-Forwarded-For": "198.51.100.2"}).status_code == 401
+        db.session.remove(); db.drop_all()
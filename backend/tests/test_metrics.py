@@ -0,0 +1,53 @@
+import re
+
+import pytest
+
+pytest.importorskip("prometheus_client")
+
+from app import create_app, db  # noqa: E402
+from app.utils.dbpool import TimedQueuePool  # noqa: E402
+from tests.conftest import auth_header, make_user  # noqa: E402
+
+
+@pytest.fixture
+def pooled_app():
+    # SQLite ใช้ pool default ของ dialect — บังคับ TimedQueuePool เหมือน PostgreSQL เพื่อให้มีเวลารอ checkout
+    app = create_app({"SQLALCHEMY_ENGINE_OPTIONS": {"poolclass": TimedQueuePool, "pool_size": 2}, "TESTING": True})
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def _value(text, series):
+    m = re.search(rf"^{re.escape(series)} ([0-9.e+-]+)$", text, re.M)
+    return float(m.group(1)) if m else None
+
+
+def test_metrics_exposes_latency_and_pool_wait(pooled_app):
+    client = pooled_app.test_client()
+    u = make_user()
+    assert client.get("/api/tasks/", headers=auth_header(u)).status_code == 200
+
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    text = resp.get_data(as_text=True)
+    assert _value(text, 'http_request_duration_seconds_count{blueprint="tasks",method="GET",route="/api/tasks/"}') >= 1
+    assert _value(text, "db_pool_checkout_wait_seconds_count") >= 1
+
+
+def test_metrics_token_required(app, client):
+    app.config.update(METRICS_TOKEN="s3cret")
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer s3cret"}).status_code == 200
+
+
+def test_dead_worker_gauges_removed(tmp_path, monkeypatch):
+    from app.utils.metrics import mark_worker_dead
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    (tmp_path / "gauge_livesum_4242.db").write_bytes(b"")
+    (tmp_path / "counter_4242.db").write_bytes(b"")
+    mark_worker_dead(4242)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["counter_4242.db"]
@@ -0,0 +1,70 @@
+from datetime import date, datetime, time
+
+from app import db
+from app.models import Task, Timesheet
+from tests.conftest import auth_header, make_user
+
+
+def _walk(client, url, key="data", headers=None):
+    seen, cursor = [], ""
+    for _ in range(100):   # กันวนไม่รู้จบ
+        body = client.get(f"{url}&cursor={cursor}", headers=headers).get_json()
+        seen.extend(r["id"] for r in body[key])
+        cursor = body["next_cursor"]
+        if not cursor:
+            assert len(seen) == len(set(seen)), f"duplicate rows across pages: {seen}"
+            return seen
+    raise AssertionError(f"cursor paging did not terminate: {seen[:20]}")
+
+
+def test_task_cursor_walks_every_page_with_equal_created_at(app, client):
+    # server_default สร้าง created_at วินาทีเดียวกันทั้งหมด → ต้องพึ่ง tie-breaker id
+    u = make_user()
+    db.session.add_all([Task(title=f"t{i}", assignee_id=u.id, task_code=f"X-{i}") for i in range(7)])
+    db.session.commit()
+
+    ids = _walk(client, "/api/tasks/?page_size=2&sort=-created_at")
+    assert ids == sorted(ids, reverse=True)
+    assert sorted(ids) == [t.id for t in Task.query.order_by(Task.id)]
+
+
+def test_task_cursor_ascending_sort(app, client):
+    u = make_user()
+    db.session.add_all([Task(title=f"t{i}", assignee_id=u.id, task_code=f"X-{i}") for i in range(5)])
+    db.session.commit()
+
+    ids = _walk(client, "/api/tasks/?page_size=2&sort=created_at")
+    assert ids == sorted(ids)
+    assert len(ids) == 5
+
+
+def test_timesheet_cursor_mixed_directions_and_null_start_time(app, client):
+    # TS_ORDER_KEYS: work_date DESC, start_time ASC (NULLS LAST), id DESC
+    u = make_user()
+    t = Task(title="t", assignee_id=u.id, task_code="X-1")
+    db.session.add(t); db.session.flush()
+    days = [date(2025, 1, 3), date(2025, 1, 2), date(2025, 1, 1)]
+    starts = [time(9), time(9), None, time(8), None, time(13, 30)]
+    db.session.add_all(Timesheet(user_id=u.id, task_id=t.id, hours=1, work_date=d, start_time=s)
+                       for d in days for s in starts)
+    db.session.commit()
+
+    expected = [r.id for r in sorted(Timesheet.query.all(), key=lambda r: (
+        -r.work_date.toordinal(), r.start_time is None, r.start_time or time(0), -r.id))]
+    for size in (1, 2, 5):
+        ids = _walk(client, f"/api/timesheet/?page_size={size}", key="items", headers=auth_header(u))
+        assert ids == expected
+
+
+def test_task_cursor_mixes_server_default_and_python_datetimes(app, client):
+    # server_default เก็บ 'YYYY-MM-DD HH:MM:SS' แต่ค่าจาก Python มีเศษวินาที — keyset_key เทียบผ่าน strftime
+    u = make_user()
+    db.session.add_all([Task(title=f"d{i}", assignee_id=u.id, task_code=f"D-{i}") for i in range(3)])
+    db.session.add_all([Task(title=f"p{i}", assignee_id=u.id, task_code=f"P-{i}",
+                             created_at=datetime(2030, 1, 1, 0, 0, 0, 250_000 * i)) for i in range(4)])
+    db.session.commit()
+
+    for sort in ("-created_at", "created_at"):
+        ids = _walk(client, f"/api/tasks/?page_size=2&sort={sort}")
+        rows = sorted(Task.query.all(), key=lambda r: (r.created_at, r.id), reverse=sort.startswith("-"))
+        assert ids == [r.id for r in rows]
@@ -0,0 +1,48 @@
+from datetime import date
+
+import pytest
+from flask import g
+from sqlalchemy import text
+
+from app import db
+from app.models import Task, Timesheet
+from app.utils.querystats import QueryBudgetExceeded, RequestQueryStats, query_budget
+from tests.conftest import auth_header, make_user
+
+
+@pytest.fixture
+def strict(app):
+    app.config.update(QUERY_BUDGET_STRICT=True)
+    return app
+
+
+def test_list_endpoints_stay_within_budget(strict, client):
+    u = make_user(role="Admin")
+    tasks = [Task(title=f"t{i}", assignee_id=u.id, task_code=f"T-{i}") for i in range(50)]
+    db.session.add_all(tasks); db.session.flush()
+    db.session.add_all(Timesheet(user_id=u.id, task_id=t.id, hours=1, work_date=date(2025, 1, 1)) for t in tasks)
+    db.session.commit()
+    # จำนวน query ต้องไม่โตตามจำนวนแถว (N+1) — เกิน @query_budget จะ raise QueryBudgetExceeded
+    for url in ("/api/tasks/?page_size=100", "/api/tasks/?cursor=", "/api/timesheet/?page_size=100"):
+        assert client.get(url, headers=auth_header(u)).status_code == 200
+
+
+def test_budget_violation_raises_in_strict_mode(strict, client):
+    @query_budget(1)
+    def chatty():
+        for _ in range(3):
+            db.session.execute(text("SELECT 1"))
+        return "ok"
+    strict.add_url_rule("/_chatty", "chatty", chatty)
+
+    with pytest.raises(QueryBudgetExceeded, match="3 queries > budget 1"):
+        client.get("/_chatty")
+
+
+def test_failed_statement_does_not_leave_start_time(app):
+    with app.test_request_context():
+        g.query_stats = RequestQueryStats()
+        conn = db.session.connection()
+        with pytest.raises(Exception):
+            db.session.execute(text("SELECT * FROM no_such_table"))
+        assert not conn.info.get("query_start")
@@ -0,0 +1,38 @@
+from app import db
+from app.models import RefreshToken, User
+from app.utils.authz import invalidate_user
+from app.utils.hashing import hash_password
+from tests.conftest import make_user
+
+
+def _login(client, email):
+    return client.post("/api/auth/login", json={"email": email, "password": "s3cret!"}).get_json()
+
+
+def _set_active(user_id, active):
+    db.session.get(User, user_id).is_active = active
+    db.session.commit()
+    invalidate_user(user_id)
+
+
+def test_rolled_back_refresh_does_not_mark_token_used(app, client):
+    u = make_user("erin", password_hash=hash_password("s3cret!"))
+    token = _login(client, "erin@example.com")["refresh_token"]
+
+    _set_active(u.id, False)
+    assert client.post("/api/auth/refresh", json={"refresh_token": token}).status_code == 401
+    _set_active(u.id, True)
+
+    # rotate ถูก rollback → token เดิมยังใช้ได้ ไม่ถูกมองว่าเป็นการ reuse
+    resp = client.post("/api/auth/refresh", json={"refresh_token": token})
+    assert resp.status_code == 200
+    assert RefreshToken.query.filter_by(user_id=u.id, revoked_at=None).count() == 1
+
+
+def test_reused_refresh_token_revokes_family(app, client):
+    make_user("finn", password_hash=hash_password("s3cret!"))
+    token = _login(client, "finn@example.com")["refresh_token"]
+    new = client.post("/api/auth/refresh", json={"refresh_token": token}).get_json()["refresh_token"]
+
+    assert client.post("/api/auth/refresh", json={"refresh_token": token}).status_code == 401
+    assert client.post("/api/auth/refresh", json={"refresh_token": new}).status_code == 401
@@ -0,0 +1,35 @@
+from sqlalchemy.dialects import postgresql
+
+from app import db
+from app.models import Task, User
+from app.utils import search
+from tests.conftest import make_user
+
+
+def _sql(app, monkeypatch, term):
+    monkeypatch.setattr(search, "is_postgres", lambda session=None: True)
+    q = db.session.query(Task.id).join(User, User.id == Task.assignee_id)
+    q, rank = search.apply_task_search(q, term)
+    compiled = q.statement.compile(dialect=postgresql.dialect())
+    return str(compiled), compiled.params, rank
+
+
+def test_short_term_keeps_substring_on_code_and_title(app, monkeypatch):
+    sql, params, rank = _sql(app, monkeypatch, "12")
+    # task_code/title/username ยังเป็น substring; details เป็น prefix ผ่าน search_vector
+    assert "%12%" in params.values() and "@@" in sql and rank is not None
+    assert "tasks.details ILIKE" not in sql
+
+
+def test_long_term_uses_trigram_substring(app, monkeypatch):
+    sql, params, _ = _sql(app, monkeypatch, "abc")
+    assert "@@" not in sql and "%abc%" in params.values()
+
+
+def test_short_term_finds_task_code_substring(app, client):
+    u = make_user()
+    db.session.add_all([Task(title="alpha", assignee_id=u.id, task_code="TS-0012"),
+                        Task(title="beta", assignee_id=u.id, task_code="TS-0034")])
+    db.session.commit()
+    data = client.get("/api/tasks/", query_string={"search": "12"}).get_json()["data"]
+    assert [r["task_code"] for r in data] == ["TS-0012"]
@@ -0,0 +1,25 @@
+from app import db
+from app.models import Task
+from app.utils.task_codes import next_task_code
+from tests.conftest import make_user
+
+
+def test_codes_continue_after_existing_codes(app):
+    u = make_user()
+    db.session.add(Task(title="legacy", assignee_id=u.id, task_code="TS-0041"))
+    db.session.commit()
+    # แถวตัวนับยังไม่มี (create_all) → สร้างจากเลขที่ใช้ไปแล้ว แล้วนับต่อ
+    assert [next_task_code() for _ in range(3)] == ["TS-0042", "TS-0043", "TS-0044"]
+
+
+def test_create_task_generates_unique_codes(app, client):
+    u = make_user()
+    codes = {client.post("/api/tasks/", json={"title": f"t{i}", "assignee_id": u.id}).get_json()["task_code"]
+             for i in range(5)}
+    assert len(codes) == 5
+
+
+def test_duplicate_explicit_code_is_conflict(app, client):
+    u = make_user()
+    assert client.post("/api/tasks/", json={"title": "a", "assignee_id": u.id, "task_code": "X-1"}).status_code == 201
+    assert client.post("/api/tasks/", json={"title": "b", "assignee_id": u.id, "task_code": "X-1"}).status_code == 409
@@ -0,0 +1,63 @@
+from sqlalchemy import event
+
+from app import db
+from app.models import Task, TaskStatusCount
+from app.utils.task_status import pending_transitions
+from tests.conftest import auth_header, make_user
+
+
+def test_pending_transitions_apply_once_at_commit(app):
+    u = make_user()
+    tasks = [Task(title=f"t{i}", assignee_id=u.id, task_code=f"T-{i}") for i in range(3)]
+    db.session.add_all(tasks); db.session.commit()
+    ids = [t.id for t in tasks]
+
+    statements = []
+    listener = lambda conn, cur, stmt, *a: statements.append(stmt)
+    event.listen(db.engine, "before_cursor_execute", listener)
+    try:
+        pending_transitions().add(ids[:2], "In Progress", only_from="Open")
+        pending_transitions().add(ids[1:], "In Progress", only_from="Open")
+        pending_transitions().add(ids[:1], "Complete")
+        assert not any(s.lstrip().upper().startswith("UPDATE TASKS") for s in statements)
+        db.session.commit()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", listener)
+
+    assert sum(s.lstrip().upper().startswith("UPDATE TASKS") for s in statements) == 1
+    assert dict(db.session.query(Task.id, Task.status).all()) == {
+        ids[0]: "Complete", ids[1]: "In Progress", ids[2]: "In Progress"}
+    counts = {r.status: r.count for r in TaskStatusCount.query.filter_by(assignee_id=u.id)}
+    assert counts.get("Open", 0) == 0 and counts["In Progress"] == 2 and counts["Complete"] == 1
+
+
+def test_pending_transitions_dropped_on_rollback(app):
+    u = make_user()
+    t = Task(title="t", assignee_id=u.id, task_code="T-1")
+    db.session.add(t); db.session.commit()
+    pending_transitions().add([t.id], "Complete")
+    db.session.rollback()
+    db.session.commit()
+    assert db.session.get(Task, t.id).status == "Open"
+
+
+def test_create_timesheet_moves_task_to_in_progress(app, client):
+    u = make_user()
+    t = Task(title="t", assignee_id=u.id, task_code="T-1")
+    db.session.add(t); db.session.commit()
+    resp = client.post("/api/timesheet/", json={"task_id": t.id, "hours": 1.5}, headers=auth_header(u))
+    assert resp.status_code == 201
+    db.session.expire_all()
+    assert db.session.get(Task, t.id).status == "In Progress"
+
+
+def test_batch_status_endpoints_are_admin_hr_only(app, client):
+    user, hr = make_user("uma"), make_user("hank", role="HR")
+    t = Task(title="t", assignee_id=user.id, task_code="T-1")
+    db.session.add(t); db.session.commit()
+
+    for path in ("/api/timesheet/tasks/complete", "/api/timesheet/tasks/reopen"):
+        assert client.post(path, json={"task_ids": [t.id]}, headers=auth_header(user)).status_code == 403
+        assert client.post(path, json={"task_ids": [t.id]}, headers=auth_header(hr)).status_code == 200
+    # ปิดงานทีละตัว User ยังทำได้เหมือนเดิม
+    assert client.post(f"/api/timesheet/tasks/{t.id}/complete", headers=auth_header(user)).status_code == 200
@@ -4,6 +4,7 @@ import {
   Home, FileText, FolderOpen, Settings,
   LogOut, ChevronLeft, ChevronRight, Users
 } from "lucide-react";
+import { logout } from "../services/auth";
 
 // decode username/email จาก JWT
 function getUserFromToken() {
@@ -137,8 +138,7 @@ export default function Sidebar() {
       <div className="p-3 border-t border-gray-100">
         <button
           onClick={() => {
-            localStorage.removeItem("mycase_token");
-            localStorage.removeItem("user"); // ถ้ามีเก็บ user ไว้
+            logout(); // revoke refresh token + ล้าง token/user ใน localStorage
             navigate("/login", { replace: true });
           }}
           className={`flex items-center w-full px-3 py-2.5 rounded-lg transition-all duration-200 text-gray-600 hover:bg-red-50 hover:text-red-600 ${collapsed ? "justify-center" : ""
@@ -1,9 +1,9 @@
 // src/services/api.js
 import axios from "axios";
 
-export const api = axios.create({
-  baseURL: import.meta.env.VITE_API_BASE || "https://my-crm-timesheet-backend.onrender.com/api", // ปรับให้ตรงของคุณ
-});
+const baseURL = import.meta.env.VITE_API_BASE || "https://my-crm-timesheet-backend.onrender.com/api"; // ปรับให้ตรงของคุณ
+
+export const api = axios.create({ baseURL });
 
 // แนบ JWT อัตโนมัติ
 api.interceptors.request.use((cfg) => {
@@ -12,12 +12,47 @@ api.interceptors.request.use((cfg) => {
   return cfg;
 });
 
+// access token อายุสั้น → ขอใหม่ด้วย refresh token (ครั้งเดียวต่อ request, ใช้ promise ร่วมกันถ้ามีหลาย request พร้อมกัน)
+let refreshing = null;
+
+function refreshAccessToken() {
+  const refreshToken = localStorage.getItem("mycase_refresh_token");
+  if (!refreshToken) return Promise.reject(new Error("no refresh token"));
+  if (!refreshing) {
+    refreshing = axios
+      .post(`${baseURL}/auth/refresh`, { refresh_token: refreshToken })
+      .then((res) => {
+        const { token, refresh_token } = res.data || {};
+        if (token) localStorage.setItem("mycase_token", token);
+        if (refresh_token) localStorage.setItem("mycase_refresh_token", refresh_token);
+        return token;
+      })
+      .finally(() => {
+        refreshing = null;
+      });
+  }
+  return refreshing;
+}
+
+// endpoint ที่ 401 แล้วห้าม refresh (จะวน) — /auth/me, /auth/change-password ฯลฯ ยัง refresh ได้ตามปกติ
+const NO_REFRESH = ["/auth/login", "/auth/refresh", "/auth/logout"];
+
 // จัดการ 401 (ถ้าอยากเด้งไปหน้า login)
 api.interceptors.response.use(
   (res) => res,
-  (err) => {
-    if (err?.response?.status === 401) {
-      // window.location.href = "/login";
+  async (err) => {
+    const cfg = err?.config;
+    if (err?.response?.status === 401 && cfg && !cfg._retried && !NO_REFRESH.some((p) => cfg.url?.startsWith(p))) {
+      cfg._retried = true;
+      try {
+        const token = await refreshAccessToken();
+        cfg.headers.Authorization = `Bearer ${token}`;
+        return api(cfg);
+      } catch {
+        localStorage.removeItem("mycase_token");
+        localStorage.removeItem("mycase_refresh_token");
+        // window.location.href = "/login";
+      }
     }
     return Promise.reject(err);
   }
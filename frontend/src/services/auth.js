@@ -2,8 +2,9 @@ import { api } from "./api";
 
 export async function login(data) {
   const res = await api.post("/auth/login", data);   // ไม่ต้องใส่ /api ซ้ำ
-  const { token, user } = res.data || {};
+  const { token, refresh_token, user } = res.data || {};
   if (token) localStorage.setItem("mycase_token", token);
+  if (refresh_token) localStorage.setItem("mycase_refresh_token", refresh_token);
   if (user)  localStorage.setItem("user", JSON.stringify(user));
   return user;
 }
@@ -15,6 +16,9 @@ export async function me() {
   return res.data?.user;
 }
 export function logout() {
+  const refreshToken = localStorage.getItem("mycase_refresh_token");
+  if (refreshToken) api.post("/auth/logout", { refresh_token: refreshToken }).catch(() => {});
   localStorage.removeItem("mycase_token");
+  localStorage.removeItem("mycase_refresh_token");
   localStorage.removeItem("user");
 }